@@ -1,119 +1,664 @@
-from flask import Flask, request, render_template, jsonify
-import pdfplumber
+from flask import Flask, request, render_template, jsonify, url_for, stream_with_context
 import os
+import io
+import sys
+import json
 import logging
+import hashlib
+import functools
+import shutil
+import tempfile
+import threading
+from contextlib import closing
+from concurrent.futures import FIRST_COMPLETED, wait
 from werkzeug.utils import secure_filename
-from weekly_analyzer import WeeklyAnalyzer
+from pdf_extractor import (
+    extract_tables_parallel, iter_page_tables, iter_table_rows, layout_fingerprint, settings_cache
+)
+from result_cache import ResultCache, content_key
+from job_queue import JobQueue, QueueFullError
+from single_flight import SingleFlight
+from dataset_store import DatasetStore
+from metrics import collect_timings, count, metrics, timed
+from columnar import to_columnar
+from compression import choose_encoding, compress
+import worker_pool
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+# pandas, NumPy, pdfplumber and the analysis modules built on them are imported
+# inside the functions that use them, so a cold start serves / and /health
+# without loading them (see benchmarks/import_times.py)
+
+# Set up logging; LOG_LEVEL=DEBUG adds per-page and per-file detail
+log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+known_log_level = isinstance(getattr(logging, log_level, None), int)  # getLevelNamesMapping() is Python 3.11+
+logging.basicConfig(level=log_level if known_log_level else logging.INFO)
+# pdfminer logs every token it parses at DEBUG level, hundreds of thousands of records per PDF
+logging.getLogger('pdfminer').setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
+if not known_log_level:
+    logger.warning(f"Unknown LOG_LEVEL {log_level!r}, logging at INFO")
 
 # Force rebuild - added to clear cache
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024  # 10MB max file size
 app.config['UPLOAD_FOLDER'] = '/tmp'  # Change upload folder to /tmp for Vercel
+app.config['PROCESS_WORKERS'] = int(os.environ.get('PROCESS_WORKERS', os.cpu_count() or 1))  # Worker processes shared by all requests
+app.config['PDF_WORKERS'] = int(os.environ.get('PDF_WORKERS', os.cpu_count() or 1))  # Worker processes one PDF is split over
+app.config['PDF_PARALLEL_MIN_PAGES'] = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 8))  # Smaller files are extracted serially
+app.config['PDF_STREAM_MIN_PAGES'] = int(os.environ.get('PDF_STREAM_MIN_PAGES', 100))  # Larger files are streamed, 0 disables
+app.config['PDF_TEXT_LAYER'] = os.environ.get('PDF_TEXT_LAYER', '1') == '1'  # Read tables from the text layer first
+app.config['SPREADSHEET_CHUNK_ROWS'] = int(os.environ.get('SPREADSHEET_CHUNK_ROWS', 50000))  # CSV/Excel rows read at once
+app.config['LOG_REJECTED_SAMPLE'] = int(os.environ.get('LOG_REJECTED_SAMPLE', 5))  # Rejected cells quoted per table in logs
+app.config['SETTINGS_CACHE_SIZE'] = int(os.environ.get('SETTINGS_CACHE_SIZE', 256))  # Remembered PDF layouts
+app.config['UPLOAD_IN_MEMORY'] = os.environ.get('UPLOAD_IN_MEMORY', '1') == '1'  # Parse uploads without saving them
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024))  # Bytes kept in memory
+app.config['RESULT_CACHE_SIZE'] = int(os.environ.get('RESULT_CACHE_SIZE', 64))  # In-memory cached results, 0 disables
+app.config['RESULT_CACHE_DISK'] = os.environ.get('RESULT_CACHE_DISK', '0') == '1'  # Also keep results in SQLite
+app.config['RESULT_CACHE_DISK_SIZE'] = int(os.environ.get('RESULT_CACHE_DISK_SIZE', 1000))
+app.config['RESULT_CACHE_MAX_AGE'] = int(os.environ.get('RESULT_CACHE_MAX_AGE', 7 * 24 * 3600))  # Seconds
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # Background jobs running at once
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 16))  # Queued or running jobs before uploads are refused
+app.config['JOB_TTL'] = int(os.environ.get('JOB_TTL', 3600))  # Seconds finished jobs stay available
+app.config['COALESCE_TIMEOUT'] = float(os.environ.get('COALESCE_TIMEOUT', 120))  # Seconds to wait for an identical upload, 0 disables
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', os.cpu_count() or 1))  # Files of one batch analyzed at once
+app.config['BATCH_MAX_FILES'] = int(os.environ.get('BATCH_MAX_FILES', 100))
+app.config['DATASET_STORE'] = os.environ.get('DATASET_STORE', '0') == '1'  # Keep extracted rows for re-analysis
+app.config['DATASET_FOLDER'] = os.environ.get('DATASET_FOLDER', os.path.join(app.config['UPLOAD_FOLDER'], 'datasets'))
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Smaller responses are sent uncompressed, 0 disables
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip level 1-9, scaled for brotli
+app.config['PRELOAD_ANALYSIS'] = os.environ.get('PRELOAD_ANALYSIS', '0') == '1'  # Import the analysis stack in the background at startup
+
+UPLOAD_EXTENSIONS = ('.pdf', '.csv', '.xlsx', '.xls')
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain')
+
+settings_cache.maxsize = app.config['SETTINGS_CACHE_SIZE']
+worker_pool.max_workers = app.config['PROCESS_WORKERS']
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+result_cache = ResultCache(
+    maxsize=app.config['RESULT_CACHE_SIZE'],
+    max_age=app.config['RESULT_CACHE_MAX_AGE'],
+    db_path=os.path.join(app.config['UPLOAD_FOLDER'], 'result_cache.sqlite3') if app.config['RESULT_CACHE_DISK'] else None,
+    disk_maxsize=app.config['RESULT_CACHE_DISK_SIZE']
+)
+
+dataset_store = DatasetStore(app.config['DATASET_FOLDER'])
+dataset_append_lock = threading.Lock()  # Appends read, merge and rewrite a whole dataset
+
+job_queue = JobQueue(
+    workers=app.config['JOB_WORKERS'],
+    max_pending=app.config['JOB_QUEUE_SIZE'],
+    ttl=app.config['JOB_TTL']
+)
+
+# Concurrent uploads of the same file wait for the first one instead of analyzing it again
+upload_flights = SingleFlight(timeout=app.config['COALESCE_TIMEOUT'])
+
+
+PRELOAD_MODULES = ('pdfplumber', 'incremental', 'parsing', 'streaming', 'weekly_analyzer')
+
+
+def preload_analysis():
+    """Import the analysis stack ahead of the first upload."""
+    import importlib
+    
+    # Imported only to fill the module cache for the first request
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    logger.debug("Analysis stack loaded")
+
+
+if app.config['PRELOAD_ANALYSIS']:
+    threading.Thread(target=preload_analysis, name='preload', daemon=True).start()
+
+
+def _resolve_pdf_workers(workers, page_count):
+    """Number of extraction processes to use; 1 means the serial path."""
+    if workers is None:
+        workers = app.config['PDF_WORKERS']
+    if page_count < app.config['PDF_PARALLEL_MIN_PAGES']:
+        return 1
+    return max(1, min(workers, page_count))
+
+
+def _read_all(stream):
+    """Read a seekable binary stream from the start without moving its position."""
+    position = stream.tell()
+    stream.seek(0)
+    data = stream.read()
+    stream.seek(position)
+    return data
+
+
+def spool_upload(stream):
+    """
+    Copy an upload into an anonymous buffer, hashing it on the way.
+    
+    The buffer stays in memory up to UPLOAD_SPOOL_THRESHOLD bytes and is moved
+    to an unnamed temporary file above that.
+    
+    Returns:
+        Tuple of (buffer positioned at the start, SHA-256 hex digest)
+    """
+    digest = hashlib.sha256()
+    buffer = tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_THRESHOLD'])
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(chunk)
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer, digest.hexdigest()
+
+
+def _with_progress(page_tables, page_count, progress):
+    """Pass page tables through, calling progress(pages_processed, page_count) after each page."""
+    progress(0, page_count)
+    for page_num, tables in enumerate(page_tables, 1):
+        yield tables
+        progress(page_num, page_count)
+
+
+def process_pdf(file_path, workers=None, progress=None, dataset_id=None):
+    """
+    Extract the price table from a PDF and run the daily and weekly analysis.
+    
+    PDFs with at least PDF_STREAM_MIN_PAGES pages are processed in streaming
+    mode, see _stream_pdf.
+    
+    Args:
+        file_path: Path of the PDF, or a seekable binary file object holding it
+        workers: Number of extraction processes (defaults to PDF_WORKERS)
+        progress: Optional callback, called as progress(pages_processed, total_pages)
+        dataset_id: If given, the normalized rows are kept in the dataset store under this id
+    """
+    from streaming import StreamOrderError
+    
+    logger.debug("Opening PDF file: %s", file_path)
+    try:
+        pdf, page_count, fingerprint = _open_pdf(file_path)
+        with pdf:
+            stream_min_pages = app.config['PDF_STREAM_MIN_PAGES']
+            if stream_min_pages and page_count >= stream_min_pages:
+                try:
+                    return _stream_pdf(pdf, page_count, fingerprint, progress, dataset_id)
+                except StreamOrderError as e:
+                    logger.warning(f"Could not stream PDF, extracting it whole: {str(e)}")
+            
+            all_data, positive_changes, negative_changes = _extract_rows(
+                pdf, file_path, page_count, fingerprint, workers, progress
+            )
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+        raise
+    
+    return analyze_rows(all_data, positive_changes, negative_changes, dataset_id)
+
 
-def process_pdf(file_path):
+def extract_pdf_rows(file_path, workers=None, progress=None):
+    """
+    Extract the table rows of a PDF and parse their Change % values.
+    
+    Args:
+        file_path: Path of the PDF, or a seekable binary file object holding it
+        workers: Number of extraction processes (defaults to PDF_WORKERS)
+        progress: Optional callback, called as progress(pages_processed, total_pages)
+    Returns:
+        Tuple of (all table rows, positive changes, negative changes)
+    """
+    logger.debug("Opening PDF file: %s", file_path)
+    try:
+        pdf, page_count, fingerprint = _open_pdf(file_path)
+        with pdf:
+            return _extract_rows(pdf, file_path, page_count, fingerprint, workers, progress)
+    except Exception as e:
+        logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+        raise
+
+
+def _open_pdf(file_path):
+    """Open a PDF and read its layout; returns (pdf, page count, layout fingerprint)."""
+    import pdfplumber
+    
+    with timed('pdf_open'):
+        pdf = pdfplumber.open(file_path)
+    try:
+        with timed('pdf_layout'):
+            page_count = len(pdf.pages)
+            fingerprint = layout_fingerprint(pdf)
+    except Exception:
+        pdf.close()
+        raise
+    
+    logger.debug("Number of pages in PDF: %s", page_count)
+    return pdf, page_count, fingerprint
+
+
+def _extract_rows(pdf, file_path, page_count, fingerprint, workers=None, progress=None):
+    """Extract the table rows of an open PDF; see extract_pdf_rows."""
     positive_changes = []
     negative_changes = []
     all_data = []  # Store all table data for weekly analysis
     
-    logger.debug(f"Opening PDF file: {file_path}")
+    workers = _resolve_pdf_workers(workers, page_count)
+    if workers > 1:
+        # Workers reopen the document themselves: hand them a path or the raw bytes
+        source = file_path if isinstance(file_path, (str, os.PathLike)) else _read_all(file_path)
+        page_tables = extract_tables_parallel(source, page_count, workers, fingerprint, app.config['PDF_TEXT_LAYER'])
+    else:
+        page_tables = iter_page_tables(pdf.pages, fingerprint, text_layer=app.config['PDF_TEXT_LAYER'])
+    if progress:
+        page_tables = _with_progress(page_tables, page_count, progress)
+    
+    with timed('pdf_extract'):
+        _collect_pdf_rows(page_tables, all_data, positive_changes, negative_changes)
+    
+    return all_data, positive_changes, negative_changes
+
+
+def _stream_pdf(pdf, page_count, fingerprint, progress=None, dataset_id=None):
+    """
+    Bounded-memory variant of process_pdf for very large PDFs.
+    
+    Pages are extracted one at a time and their pdfplumber caches dropped
+    right after, and each page's rows are analyzed through _analyze_stream,
+    so about one page and one week of rows are held at once.
+    
+    Raises:
+        StreamOrderError: If the pages are not newest first
+    """
+    logger.debug("Streaming %s pages", page_count)
+    page_tables = iter_page_tables(pdf.pages, fingerprint, release=True, text_layer=app.config['PDF_TEXT_LAYER'])
+    if progress:
+        page_tables = _with_progress(page_tables, page_count, progress)
+    
+    chunks = ((cells, df) for _, cells, df in _pdf_chunks(page_tables))
+    return _analyze_stream(chunks, 'pdf_stream', dataset_id)
+
+
+def _pdf_chunks(page_tables):
+    """(Page number, Change % cells, normalized rows or None) of each page with tables."""
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    analyzer = WeeklyAnalyzer()  # One per file, so every page is read with the same decimal separators
+    for page_num, header, rows in iter_table_rows(page_tables):
+        if not rows:
+            yield page_num, [], None
+            continue
+        with timed('weekly_prepare'):
+            df = analyzer.prepare_frame([header] + rows)
+        yield page_num, [row[6] for row in rows if len(row) >= 7], df
+
+
+def _analyze_stream(chunks, stage, dataset_id=None, newest_first=True):
+    """
+    Run the daily and weekly analysis on rows arriving in chunks, newest or oldest first.
+    
+    Each chunk's Change % cells are added to the daily totals and its
+    normalized rows fed to a WeekStream, which analyzes every week as soon
+    as it is complete. When the rows are kept as a dataset, each chunk is
+    written to the dataset store as it arrives, so memory stays bounded by
+    the chunk size either way.
+    
+    Args:
+        chunks: Iterable of (Change % cells, normalized rows as returned by WeeklyAnalyzer.prepare_frame, or None)
+        stage: Name of the timing span covering the reading and analysis of the chunks
+        dataset_id: If given, the normalized rows are kept in the dataset store under this id
+        newest_first: Order the chunks arrive in, or None for any order: the
+            normalized rows are then kept and sorted once after the last chunk
+    Raises:
+        StreamOrderError: If a chunk is out of order with the rows before it
+    """
+    analysis = _stream_analysis(chunks, stage, dataset_id, newest_first)
+    while True:
+        try:
+            next(analysis)
+        except StopIteration as done:
+            return done.value
+
+
+def _stream_analysis(chunks, stage, dataset_id=None, newest_first=True):
+    """Generator form of _analyze_stream: yields (rows so far, DailyTotals, WeekStream) after each chunk and returns the results."""
+    import pandas as pd
+    from streaming import DailyTotals, WeekStream
+    
+    totals = DailyTotals()
+    weeks = WeekStream(newest_first is not False)
+    frames = [] if newest_first is None else None
+    writer = None
+    if dataset_id and app.config['DATASET_STORE']:
+        writer = _dataset_writer(dataset_id, newest_first is not False)
+    row_count = 0
+    
+    def feed(df):
+        nonlocal writer
+        weeks.feed(df)
+        if writer is not None:
+            writer = _append_dataset_chunk(writer, df)
+    
     try:
-        with pdfplumber.open(file_path) as pdf:
-            logger.debug(f"Number of pages in PDF: {len(pdf.pages)}")
-            
-            for page_num, page in enumerate(pdf.pages, 1):
-                logger.debug(f"Processing page {page_num}")
-                
-                # Try different table extraction settings
-                table_settings = [
-                    {},  # Default settings
-                    {
-                        'text_x_tolerance': 5,
-                        'text_y_tolerance': 5
-                    },
-                    {
-                        'text_x_tolerance': 10,
-                        'text_y_tolerance': 3,
-                        'intersection_x_tolerance': 10,
-                        'intersection_y_tolerance': 3
-                    }
-                ]
-                
-                tables = None
-                for settings in table_settings:
-                    try:
-                        tables = page.extract_tables(**settings)
-                        if tables and any(len(table) > 1 for table in tables):
-                            logger.debug(f"Successfully extracted tables with settings: {settings}")
-                            break
-                    except Exception as e:
-                        logger.debug(f"Failed to extract tables with settings {settings}: {str(e)}")
-                        continue
-                
-                if not tables:
-                    logger.warning(f"No tables found on page {page_num}")
-                    continue
-                
-                logger.debug(f"Found {len(tables)} tables on page {page_num}")
-                
-                for table_idx, table in enumerate(tables):
-                    if not table or len(table) < 2:  # Skip empty tables or tables with just headers
-                        continue
-                    
-                    logger.debug(f"Processing table {table_idx + 1}")
-                    logger.debug(f"Table headers: {table[0]}")
+        with timed(stage):
+            for cells, df in chunks:
+                if df is not None and not df.empty:
+                    row_count += len(df)
                     
-                    # Store all rows for weekly analysis
-                    all_data.extend(table)
+                    positive_changes = []
+                    negative_changes = []
+                    _collect_change_cells(cells, positive_changes, negative_changes)
+                    totals.add(positive_changes, negative_changes)
                     
-                    # Process each row in the table (skip header)
-                    for row in table[1:]:
-                        if len(row) >= 7:  # Make sure row has enough columns
-                            try:
-                                # Get the percentage value from the last column
-                                value_str = str(row[6]).strip()
-                                logger.debug(f"Processing value: {value_str}")
-                                
-                                # Remove any spaces and the % sign
-                                value_str = value_str.replace(' ', '').replace('%', '')
-                                logger.debug(f"Cleaned value string: {value_str}")
-                                
-                                # Convert to float
-                                value = float(value_str.replace(',', '.'))
-                                logger.debug(f"Converted to float: {value}")
-                                
-                                if value > 0:
-                                    positive_changes.append(value)
-                                    logger.debug(f"Added positive value: {value}")
-                                elif value < 0:
-                                    negative_changes.append(value)
-                                    logger.debug(f"Added negative value: {value}")
-                                        
-                            except (ValueError, TypeError) as e:
-                                logger.debug(f"Could not convert value '{row[6]}': {e}")
-                                continue
+                    if frames is None:
+                        feed(df)
+                    else:
+                        frames.append(df)
+                yield row_count, totals, weeks
+            
+            if frames:
+                feed(pd.concat(frames, ignore_index=True).sort_values('Date', ascending=False, kind='stable'))
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    
+    if row_count == 0:
+        if writer is not None:
+            writer.abort()
+        logger.error("Table data is empty or has insufficient rows")
+        raise ValueError("Invalid table data: insufficient rows")
+    
+    results = {
+        'daily': totals.results(),
+        'weekly': weeks.finish()
+    }
+    if writer is not None:
+        _store_dataset(dataset_id, writer, results, dict(totals.sums))
+    
+    _log_summary(stage, row_count, results)
+    return results
 
+
+def stream_pdf_events(file_path, dataset_id=None):
+    """
+    Analyze a PDF page by page, yielding progress and results as they are known.
+    
+    Pages are extracted and analyzed one at a time as in _stream_pdf, and
+    weeks sent as soon as they are complete. If the pages turn out not to be
+    newest first, a reset event is sent and the pages are read again, oldest
+    first, then, if that fails too, in any order; the weeks of these passes
+    are sent once the last page is read.
+    
+    Args:
+        file_path: Path of the PDF, or a seekable binary file object holding it
+        dataset_id: If given, the normalized rows are kept in the dataset store under this id
+    Yields:
+        (event, data) pairs:
+        start: {'pages'}, before the first page
+        page: {'page', 'pages', 'rows', 'positive_count', 'negative_count'}, after each page
+        weeks: the weeks completed since the last weeks event, in the columnar format
+        reset: {}, when the pages are read again and the weeks and counts sent so far must be discarded
+        done: the full results, as returned by process_pdf
+    """
+    from streaming import StreamOrderError
+    
+    pdf, page_count, fingerprint = _open_pdf(file_path)
+    with pdf:
+        yield 'start', {'pages': page_count}
+        for newest_first in (True, False, None):
+            try:
+                results = yield from _pdf_pass_events(pdf, page_count, fingerprint, dataset_id, newest_first)
+                break
+            except StreamOrderError as e:
+                logger.warning(f"Could not stream PDF in this order, reading it again: {str(e)}")
+                yield 'reset', {}
+    yield 'done', results
+
+
+def _pdf_pass_events(pdf, page_count, fingerprint, dataset_id, newest_first):
+    """Page and weeks events of one pass over the pages of a PDF (see stream_pdf_events); returns the results."""
+    page_tables = iter_page_tables(pdf.pages, fingerprint, release=True, text_layer=app.config['PDF_TEXT_LAYER'])
+    page = 0
+    
+    def chunks():
+        nonlocal page
+        for page, cells, df in _pdf_chunks(page_tables):
+            yield cells, df
+    
+    analysis = _stream_analysis(chunks(), 'pdf_stream', dataset_id, newest_first)
+    sent = 0
+    while True:
+        try:
+            row_count, totals, weeks = next(analysis)
+        except StopIteration as done:
+            results = done.value
+            break
+        
+        yield 'page', {
+            'page': page,
+            'pages': page_count,
+            'rows': row_count,
+            'positive_count': totals.sums['positive_count'],
+            'negative_count': totals.sums['negative_count']
+        }
+        # Weeks streamed oldest first are only in their final order once the stream is finished
+        if newest_first and len(weeks.weekly_results) > sent:
+            yield 'weeks', _columnar_weeks(weeks.weekly_results[sent:])
+            sent = len(weeks.weekly_results)
+    
+    weekly_results = results['weekly']['weekly_results']
+    if len(weekly_results) > sent:
+        yield 'weeks', _columnar_weeks(weekly_results[sent:])
+    return results
+
+
+def _columnar_weeks(weekly_results):
+    """Columnar form of some weeks, as sent in weeks events."""
+    return to_columnar({'weekly': {'weekly_results': weekly_results, 'total_weeks': len(weekly_results)}})
+
+
+def _collect_pdf_rows(page_tables, all_data, positive_changes, negative_changes):
+    """Gather the header and data rows of every extracted table and parse their Change % values."""
+    for page_num, header, rows in iter_table_rows(page_tables):
+        if not all_data and header is not None:
+            all_data.append(header)
+        
+        # Store all rows for weekly analysis
+        all_data.extend(rows)
+        
+        _collect_changes(rows, positive_changes, negative_changes)
+
+
+def process_spreadsheet(file_path, filename=None, dataset_id=None):
+    """
+    Run the daily and weekly analysis on a CSV or Excel export with the same
+    columns as the PDF table (Date, Price, Open, High, Low, Vol., Change %).
+    
+    The file is read through DataProcessor in chunks of SPREADSHEET_CHUNK_ROWS
+    rows, parsing only those columns, and each chunk is analyzed as it is read
+    (see _analyze_stream), so memory does not grow with the file. Exports that
+    turn out to be oldest first are streamed again in that order; exports in
+    neither order are normalized chunk by chunk and sorted once.
+    
+    Args:
+        file_path: Path of the file, or a seekable binary file object holding it
+        filename: Name used to tell CSV from Excel when file_path is a file object
+        dataset_id: If given, the normalized rows are kept in the dataset store under this id
+    """
+    from streaming import StreamOrderError
+    
+    for newest_first in (True, False, None):
+        try:
+            with closing(_spreadsheet_chunks(file_path, filename)) as chunks:
+                return _analyze_stream(chunks, 'spreadsheet_stream', dataset_id, newest_first)
+        except StreamOrderError as e:
+            logger.warning(f"Could not stream spreadsheet in this order, reading it again: {str(e)}")
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
+
+
+def _spreadsheet_chunks(file_path, filename=None):
+    """(Change % cells, normalized rows) of each chunk of a CSV or Excel export, in file order."""
+    from data_processor import DataProcessor
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    analyzer = WeeklyAnalyzer()  # One per file, so every chunk is read with the same decimal separators
+    reader = DataProcessor().iter_chunks(file_path, filename, app.config['SPREADSHEET_CHUNK_ROWS'])
+    for chunk in reader:
+        with timed('weekly_prepare'):
+            df = analyzer.normalize_frame(chunk)
+        yield chunk['Change %'].tolist(), df
+
+
+def read_spreadsheet_frame(file_path, filename=None):
+    """Normalized rows of a CSV or Excel export in any order, newest first, read chunk by chunk."""
+    import pandas as pd
+    
+    frames = [df for _, df in _spreadsheet_chunks(file_path, filename)]
+    if not frames:
+        raise ValueError("No data could be extracted from the file")
+    return pd.concat(frames, ignore_index=True).sort_values('Date', ascending=False, kind='stable')
+
+
+def read_spreadsheet_rows(file_path, filename=None):
+    """Read a CSV or Excel export into table rows (header first) of strings."""
+    import pandas as pd
+    
+    name = (filename or str(file_path)).lower()
+    try:
+        with timed('spreadsheet_read'):
+            if name.endswith('.csv'):
+                df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
+            else:
+                df = pd.read_excel(file_path, dtype=str, keep_default_na=False)
     except Exception as e:
-        logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+        logger.error(f"Error reading spreadsheet: {str(e)}", exc_info=True)
         raise
+    
+    count('rows', len(df))
+    return [list(df.columns)] + df.values.tolist()
 
-    logger.debug(f"Found {len(positive_changes)} positive changes: {positive_changes}")
-    logger.debug(f"Found {len(negative_changes)} negative changes: {negative_changes}")
 
-    # Calculate daily results
-    daily_results = {
+def _collect_changes(rows, positive_changes, negative_changes):
+    """Parse the Change % column (7th) of table rows into the positive and negative lists."""
+    cells = [row[6] for row in rows if len(row) >= 7]  # Make sure rows have enough columns
+    _collect_change_cells(cells, positive_changes, negative_changes)
+
+
+def _collect_change_cells(cells, positive_changes, negative_changes):
+    """Parse Change % cells into the positive and negative lists."""
+    from parsing import describe_rejected, split_changes
+    
+    if not cells:
+        return
+    
+    positive, negative, rejected = split_changes(cells)
+    positive_changes.extend(positive)
+    negative_changes.extend(negative)
+    if not rejected.empty:
+        count('rejected_cells', len(rejected))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Could not convert %d of %d Change %% values, e.g. %s", len(rejected), len(cells),
+                        describe_rejected(rejected, app.config['LOG_REJECTED_SAMPLE']))
+
+
+def _log_summary(source, row_count, results):
+    """One record per analyzed file instead of its rows and results."""
+    daily = results['daily']
+    logger.info("Analyzed %d rows (%s): %d positive and %d negative days, %d weeks", row_count, source,
+                daily['positive_count'], daily['negative_count'], results['weekly']['total_weeks'])
+
+
+def extract_upload_frame(stream, filename):
+    """Normalized rows, newest first, of an uploaded PDF, CSV or Excel file, without analyzing them."""
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    if not filename.lower().endswith('.pdf'):
+        return read_spreadsheet_frame(stream, filename)
+    return WeeklyAnalyzer().prepare_frame(extract_pdf_rows(stream)[0])
+
+
+def process_upload(file_path, filename, workers=None, progress=None, dataset_id=None):
+    """
+    Analyze an uploaded PDF, CSV or Excel file, telling them apart by filename.
+    
+    See process_pdf and process_spreadsheet; progress is only reported for PDFs.
+    """
+    if filename.lower().endswith('.pdf'):
+        return process_pdf(file_path, workers=workers, progress=progress, dataset_id=dataset_id)
+    return process_spreadsheet(file_path, filename, dataset_id=dataset_id)
+
+
+def analyze_upload(data, filename, dataset_id=None):
+    """Analyze one uploaded file held in memory; runs in the batch worker processes."""
+    return process_upload(io.BytesIO(data), filename, workers=1, dataset_id=dataset_id)
+
+
+def summarize_batch(entries):
+    """
+    Build the combined summary table of a batch upload.
+    
+    Args:
+        entries: Per-file results, each with 'filename' and either 'daily'/'weekly' or 'error'
+    """
+    files = []
+    positive_count = negative_count = 0
+    positive_total = negative_total = 0.0
+    
+    for entry in entries:
+        if 'error' in entry:
+            files.append({'filename': entry['filename'], 'error': entry['error']})
+            continue
+        
+        daily = entry['daily']
+        files.append({
+            'filename': entry['filename'],
+            'positive_count': daily['positive_count'],
+            'negative_count': daily['negative_count'],
+            'positive_avg': daily['positive_avg'],
+            'negative_avg': daily['negative_avg'],
+            'total_weeks': entry['weekly']['total_weeks']
+        })
+        positive_count += daily['positive_count']
+        negative_count += daily['negative_count']
+        positive_total += daily['positive_avg'] * daily['positive_count']
+        negative_total += daily['negative_avg'] * daily['negative_count']
+    
+    return {
+        'files': files,
+        'total': {
+            'files': len(entries),
+            'failed': sum(1 for entry in entries if 'error' in entry),
+            'positive_count': positive_count,
+            'negative_count': negative_count,
+            'positive_avg': positive_total / positive_count if positive_count else 0,
+            'negative_avg': negative_total / negative_count if negative_count else 0
+        }
+    }
+
+
+def summarize_daily(positive_changes, negative_changes):
+    """Daily results: count and average of the positive and negative Change % values."""
+    return {
         'positive_count': len(positive_changes),
         'negative_count': len(negative_changes),
         'positive_avg': sum(positive_changes) / len(positive_changes) if positive_changes else 0,
         'negative_avg': sum(negative_changes) / len(negative_changes) if negative_changes else 0
     }
+
+
+def analyze_rows(all_data, positive_changes, negative_changes, dataset_id=None):
+    """
+    Combine the daily statistics and the weekly analysis of extracted table rows.
+    
+    Args:
+        all_data: Table rows, header first, as passed to WeeklyAnalyzer
+        positive_changes: Positive Change % values
+        negative_changes: Negative Change % values
+        dataset_id: If given, the normalized rows are kept in the dataset store under this id
+    """
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    # Calculate daily results
+    daily_results = summarize_daily(positive_changes, negative_changes)
     
     # Process weekly analysis
     weekly_analyzer = WeeklyAnalyzer()
@@ -125,15 +670,581 @@ def process_pdf(file_path):
         'weekly': weekly_results
     }
     
-    logger.debug(f"Final results: {results}")
+    if dataset_id and app.config['DATASET_STORE']:
+        _store_dataset(dataset_id, weekly_analyzer.df, results)
+    
+    _log_summary('whole', max(len(all_data) - 1, 0), results)
     return results
 
+def _store_dataset(dataset_id, rows, results, sums=None):
+    """
+    Keep normalized rows and their summary in the dataset store and add the id to the results.
+    
+    Args:
+        dataset_id: Id to store the rows under
+        rows: Normalized rows, or a DatasetWriter they were appended to
+        results: Analysis results of the rows
+        sums: Daily sums of the rows, required with a DatasetWriter (see incremental.build_summary)
+    """
+    from dataset_store import DatasetWriter
+    from incremental import build_summary
+    
+    from query_engine import QueryIndex
+    
+    weekly_results = results['weekly']['weekly_results']
+    
+    def build_index(columns):
+        return QueryIndex.build(columns, weekly_results).arrays
+    
+    try:
+        with timed('dataset_save'):
+            if isinstance(rows, DatasetWriter):
+                rows.commit(build_summary(None, weekly_results, sums), build_index)
+            else:
+                dataset_store.save(dataset_id, rows, build_summary(rows, weekly_results), build_index)
+        results['dataset_id'] = dataset_id
+    except Exception as e:
+        logger.warning(f"Could not store dataset {dataset_id}: {str(e)}")
+
+def _dataset_writer(dataset_id, newest_first=True):
+    """DatasetWriter for streamed rows, or None when the dataset cannot be written."""
+    try:
+        return dataset_store.writer(dataset_id, newest_first)
+    except Exception as e:
+        logger.warning(f"Could not store dataset {dataset_id}: {str(e)}")
+        return None
+
+def _append_dataset_chunk(writer, df):
+    """Append a chunk to a DatasetWriter; on failure drop the dataset and return None, keeping the analysis going."""
+    try:
+        with timed('dataset_save'):
+            writer.append(df)
+        return writer
+    except Exception as e:
+        logger.warning(f"Could not store dataset {writer.dataset_id}: {str(e)}")
+        writer.abort()
+        return None
+
+def _save_query_index(dataset_id, weekly_results):
+    """Build and store the query index of a stored dataset from its week results."""
+    from query_engine import QueryIndex
+    
+    index = QueryIndex.build(dataset_store.load_columns(dataset_id), weekly_results)
+    dataset_store.save_index(dataset_id, index.arrays)
+    return index
+
+def _query_index(dataset_id):
+    """Query index of a stored dataset, built on first use for datasets stored without one."""
+    from query_engine import QueryIndex
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    arrays = dataset_store.load_index(dataset_id)
+    if arrays is not None:
+        return QueryIndex(arrays)
+    
+    logger.debug("Building query index of dataset %s", dataset_id)
+    weekly_results = WeeklyAnalyzer().process_frame(dataset_store.load(dataset_id))['weekly_results']
+    return _save_query_index(dataset_id, weekly_results)
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON, HTML and text responses with br or gzip when the client accepts it."""
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    if (not min_size or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.is_streamed or 'Content-Encoding' in response.headers):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None or not 200 <= response.status_code < 300:
+        return response
+    
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    with timed('compress'):
+        response.set_data(compress(data, encoding, app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def _wants_columnar():
+    return request.args.get('format') == 'columnar'
+
+def _conditional(response, etag):
+    """Set a weak ETag on a response (the same body is sent gzip- or br-encoded)."""
+    response.set_etag(etag, weak=True)
+    return response
+
+def _not_modified(etag):
+    """304 response for a request whose If-None-Match holds etag, or None."""
+    if request.if_none_match.contains_weak(etag):
+        return _conditional(app.response_class(status=304), etag)
+    return None
+
+def dataset_resource(view):
+    """
+    Decorate a GET view of a stored dataset.
+    
+    Unknown datasets get a 404. Successful responses carry a weak ETag
+    naming the dataset as written and the analyzer version, so sending it
+    back in If-None-Match returns 304 Not Modified without reading the dataset.
+    """
+    @functools.wraps(view)
+    def wrapper(dataset_id):
+        from weekly_analyzer import ANALYZER_VERSION
+        
+        if not dataset_store.exists(dataset_id):
+            return jsonify({'error': 'Unknown dataset'}), 404
+        # An id always holds the same rows, but a dataset written again is checked anew
+        etag = f"{dataset_id}:{dataset_store.meta(dataset_id)['created']}:{ANALYZER_VERSION}"
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        
+        response = app.make_response(view(dataset_id))
+        if response.status_code == 200:
+            _conditional(response, etag)
+        return response
+    return wrapper
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/health')
+def health():
+    return jsonify({
+        'status': 'ok',
+        'analysis_loaded': 'pandas' in sys.modules
+    })
+
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'settings_cache': settings_cache.stats(),
+        'result_cache': result_cache.stats(),
+        'job_queue': job_queue.stats(),
+        'upload_flights': upload_flights.stats()
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def _timings_breakdown(timings):
+    """Per-request timings as returned with ?timings=1, in milliseconds."""
+    return {
+        'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in timings['stages'].items()},
+        'counts': timings['counts']
+    }
+
+def _run_upload_job(job, buffer, filename, cache_key, dataset_id):
+    """Background job: analyze a spooled upload and cache its results."""
+    try:
+        results = process_upload(buffer, filename, progress=job.report_progress, dataset_id=dataset_id)
+    finally:
+        buffer.close()
+    result_cache.put(cache_key, app.json.response(results).get_data())
+    return results
+
+def _queue_upload(buffer, filename, cache_key, dataset_id):
+    try:
+        job = job_queue.submit(_run_upload_job, buffer, filename, cache_key, dataset_id)
+    except QueueFullError as e:
+        logger.warning(f"Refusing async upload: {str(e)}")
+        buffer.close()
+        response = jsonify({'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    
+    status_url = url_for('job_status', job_id=job.id)
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    # Finished jobs no longer change
+    finished = job.status in ('done', 'failed')
+    etag = f"{job.id}:{job.status}:{'columnar' if _wants_columnar() else 'json'}"
+    if finished:
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+    
+    status = job.to_dict()
+    if 'results' in status and _wants_columnar():
+        status['results'] = to_columnar(status['results'])
+    response = jsonify(status)
+    return _conditional(response, etag) if finished else response
+
+def _run_batch(pending, workers):
+    """
+    Analyze pending batch files, yielding (index, results or the exception raised) as they finish.
+    
+    With more than one worker the files run in the shared worker processes,
+    at most `workers` at once so a large batch leaves room for other requests.
+    """
+    if workers > 1:
+        queued = iter(pending.items())
+        running = {}
+        try:
+            while True:
+                for index, (data, filename, digest, _) in queued:
+                    running[worker_pool.submit(analyze_upload, data, filename, digest)] = index
+                    if len(running) >= workers:
+                        break
+                if not running:
+                    return
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        yield index, future.result()
+                    except Exception as e:
+                        yield index, e
+        finally:
+            for future in running:
+                future.cancel()
+    else:
+        for index, (data, filename, digest, _) in pending.items():
+            try:
+                yield index, analyze_upload(data, filename, digest)
+            except Exception as e:
+                yield index, e
+
+@app.route('/datasets/<dataset_id>')
+@dataset_resource
+def dataset_info(dataset_id):
+    return jsonify(dataset_store.meta(dataset_id))
+
+@app.route('/datasets/<dataset_id>/analyze')
+@dataset_resource
+def analyze_dataset(dataset_id):
+    from weekly_analyzer import WeeklyAnalyzer
+    
+    try:
+        df = dataset_store.load(dataset_id, start=request.args.get('start'), end=request.args.get('end'))
+        changes = df['Change %']
+        daily_results = summarize_daily(changes[changes > 0].tolist(), changes[changes < 0].tolist())
+        weekly_results = WeeklyAnalyzer().process_frame(df)
+    except ValueError as e:
+        logger.warning(f"Could not analyze dataset {dataset_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'dataset_id': dataset_id,
+        'rows': len(df),
+        'daily': daily_results,
+        'weekly': weekly_results
+    })
+
+@app.route('/datasets/<dataset_id>/append', methods=['POST'])
+def append_dataset(dataset_id):
+    """
+    Store a stored dataset plus the new dates of a newer export as a new dataset.
+    
+    Only the rows from the week of the oldest new date on are loaded and
+    re-analyzed; older rows are copied over as they are, and the summary and
+    query index are patched for the affected weeks. The stored dataset is
+    kept, and the new one gets its own id, so uploading the original file
+    again does not drop the appended rows.
+    """
+    from incremental import add_daily_sums, append_rows, daily_sums, daily_from_sums, new_rows, tail_start
+    
+    if not dataset_store.exists(dataset_id):
+        return jsonify({'error': 'Unknown dataset'}), 404
+    
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    if not file.filename.lower().endswith(UPLOAD_EXTENSIONS):
+        return jsonify({'error': 'Invalid file type'}), 400
+    
+    try:
+        buffer, digest = spool_upload(file.stream)
+        incoming = extract_upload_frame(buffer, file.filename)
+        
+        with dataset_append_lock:
+            columns = dataset_store.load_columns(dataset_id)
+            index = _query_index(dataset_id)
+            summary = dataset_store.load_summary(dataset_id) or {'daily_sums': daily_sums(columns['Change %'])}
+            new = new_rows(columns['Date'], incoming)
+            appended_id, rows, weeks = dataset_id, len(columns['Date']), []
+            if not new.empty:
+                appended_id = hashlib.sha256(f'{dataset_id}:{digest}'.encode()).hexdigest()
+                start = tail_start(columns['Date'], new)
+                tail = dataset_store.load(dataset_id, start=str(columns['Date'][start]))
+                merged, weeks, affected = append_rows(tail, new)
+                
+                summary = {'daily_sums': add_daily_sums(summary['daily_sums'], daily_sums(new['Change %']))}
+                index = index.replace_weeks(weeks, affected)
+                summary['total_weeks'] = index.total_weeks
+                rows = _store_appended(dataset_id, appended_id, start, merged, summary, index)
+    except ValueError as e:
+        logger.warning(f"Could not append to dataset {dataset_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error appending to dataset {dataset_id}: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+    
+    return jsonify({
+        'dataset_id': appended_id,
+        'rows': rows,
+        'new_rows': len(new),
+        'daily': daily_from_sums(summary['daily_sums']),
+        'total_weeks': index.total_weeks,
+        'updated_weeks': weeks
+    })
+
+def _store_appended(dataset_id, appended_id, start, merged, summary, index):
+    """
+    Write a stored dataset's rows before position start, then the merged newer rows, as another dataset.
+    
+    Returns:
+        Number of rows of the new dataset
+    """
+    writer = dataset_store.writer(appended_id, newest_first=False)
+    try:
+        with timed('dataset_save'):
+            if start:
+                end = dataset_store.load_columns(dataset_id)['Date'][start - 1]
+                writer.append(dataset_store.load(dataset_id, end=str(end)))
+            writer.append(merged)
+            return writer.commit(summary, lambda columns: index.replace_days(columns).arrays)['rows']
+    except Exception:
+        writer.abort()
+        raise
+
+def _float_arg(name):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid value for {name}: {value}")
+
+def _int_arg(name, default=None):
+    value = _float_arg(name)
+    return default if value is None else int(value)
+
+def _day_arg(name):
+    from weekdays import parse_weekday
+    
+    value = request.args.get(name)
+    return parse_weekday(value) if value else None
+
+@app.route('/datasets/<dataset_id>/query/weekdays')
+@dataset_resource
+def query_weekdays(dataset_id):
+    from weekdays import parse_weekday
+    
+    try:
+        with timed('query'):
+            weekdays = request.args.get('weekday')
+            stats = _query_index(dataset_id).weekdays(
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                weekdays=[parse_weekday(day) for day in weekdays.split(',')] if weekdays else None,
+                min_range=_float_arg('min_range'),
+                max_range=_float_arg('max_range')
+            )
+    except ValueError as e:
+        logger.warning(f"Could not query dataset {dataset_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'dataset_id': dataset_id, 'weekdays': stats})
+
+@app.route('/datasets/<dataset_id>/query/weeks')
+@dataset_resource
+def query_weeks(dataset_id):
+    try:
+        with timed('query'):
+            stats = _query_index(dataset_id).weeks(
+                start=request.args.get('start'),
+                end=request.args.get('end'),
+                turned_positive_by=_day_arg('turned_positive_by'),
+                turned_negative_by=_day_arg('turned_negative_by'),
+                streak=request.args.get('streak') or None,
+                min_streak=_int_arg('min_streak'),
+                min_volatility=_float_arg('min_volatility'),
+                max_volatility=_float_arg('max_volatility'),
+                final=request.args.get('final') or None,
+                limit=_int_arg('limit', 0)
+            )
+    except ValueError as e:
+        logger.warning(f"Could not query dataset {dataset_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'dataset_id': dataset_id, **stats})
+
+@app.route('/datasets/<dataset_id>/periods')
+@dataset_resource
+def dataset_periods(dataset_id):
+    from period_engine import DEFAULT_WINDOWS, analyze_periods
+    
+    try:
+        windows = request.args.get('windows')
+        if windows is None:
+            windows = DEFAULT_WINDOWS
+        else:
+            windows = [int(window) for window in windows.split(',') if window.strip()]
+        with timed('periods'):
+            df = dataset_store.load(dataset_id, start=request.args.get('start'), end=request.args.get('end'))
+            stats = analyze_periods(
+                df,
+                period=request.args.get('period', 'week'),
+                week_start=_day_arg('week_start') or 0,
+                trading_days=_int_arg('trading_days', 5),
+                min_days=_int_arg('min_days'),
+                windows=windows
+            )
+    except ValueError as e:
+        logger.warning(f"Could not analyze periods of dataset {dataset_id}: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'dataset_id': dataset_id, 'rows': len(df), **stats})
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    from weekly_analyzer import ANALYZER_VERSION
+    
+    files = [file for file in request.files.getlist('files') if file.filename]
+    if not files:
+        return jsonify({'error': 'No selected files'}), 400
+    if len(files) > app.config['BATCH_MAX_FILES']:
+        return jsonify({'error': f"Too many files (max {app.config['BATCH_MAX_FILES']})"}), 400
+    
+    entries = [None] * len(files)
+    pending = {}  # index -> (data, filename, content digest, cache key)
+    for index, file in enumerate(files):
+        if not file.filename.lower().endswith(UPLOAD_EXTENSIONS):
+            entries[index] = {'filename': file.filename, 'error': 'Invalid file type'}
+            continue
+        
+        data = file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        cache_key = content_key(digest, ANALYZER_VERSION)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            entries[index] = {'filename': file.filename, **json.loads(cached)}
+        else:
+            pending[index] = (data, file.filename, digest, cache_key)
+    
+    logger.debug("Batch upload: %s files, %s to process", len(files), len(pending))
+    
+    workers = min(app.config['BATCH_WORKERS'], len(pending))
+    for index, outcome in _run_batch(pending, workers):
+        _, filename, _, cache_key = pending[index]
+        if isinstance(outcome, Exception):
+            logger.error(f"Error processing {filename}: {str(outcome)}")
+            entries[index] = {'filename': filename, 'error': f'Error processing file: {str(outcome)}'}
+            continue
+        result_cache.put(cache_key, app.json.response(outcome).get_data())
+        entries[index] = {'filename': filename, **outcome}
+    
+    return jsonify({
+        'files': entries,
+        'summary': summarize_batch(entries)
+    })
+
+def _done_event(results):
+    """Data of the final /upload/stream event: everything but the weeks, which were already sent."""
+    done = {key: value for key, value in results.items() if key != 'weekly'}
+    done['total_weeks'] = results['weekly']['total_weeks']
+    return done
+
+def _cached_events(results):
+    """Events of /upload/stream for results found in the result cache."""
+    yield 'start', {'pages': None, 'cached': True}
+    if results['weekly']['weekly_results']:
+        yield 'weeks', _columnar_weeks(results['weekly']['weekly_results'])
+    yield 'done', _done_event(results)
+
+def _upload_events(buffer, cache_key, dataset_id):
+    """Events of /upload/stream for a new upload; caches the results once done."""
+    try:
+        for event, data in stream_pdf_events(buffer, dataset_id):
+            if event == 'done':
+                result_cache.put(cache_key, app.json.response(data).get_data())
+                data = _done_event(data)
+            yield event, data
+    finally:
+        buffer.close()
+
+def _server_sent_events(events):
+    """Format (event, data) pairs as Server-Sent Events; an error ends the stream with an error event."""
+    try:
+        for event, data in events:
+            yield f"event: {event}\ndata: {app.json.dumps(data)}\n\n"
+    except Exception as e:
+        logger.error(f"Error processing upload: {str(e)}", exc_info=True)
+        yield f"event: error\ndata: {app.json.dumps({'error': f'Error processing PDF: {str(e)}'})}\n\n"
+
+@app.route('/upload/stream', methods=['POST'])
+def upload_stream():
+    from weekly_analyzer import ANALYZER_VERSION
+    
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    if not file.filename.lower().endswith('.pdf'):
+        return jsonify({'error': 'Invalid file type'}), 400
+    
+    buffer, digest = spool_upload(file.stream)
+    cache_key = content_key(digest, ANALYZER_VERSION)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        logger.debug("Result cache hit for %s", cache_key)
+        buffer.close()
+        events = _cached_events(json.loads(cached))
+    else:
+        events = _upload_events(buffer, cache_key, digest)
+    
+    response = app.response_class(stream_with_context(_server_sent_events(events)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep proxies from holding events back
+    response.headers['X-Cache'] = 'HIT' if cached is not None else 'MISS'
+    return response
+
+def _analyze_and_cache(buffer, filename, cache_key, dataset_id):
+    """
+    Analyze an upload and cache its serialized results.
+    
+    Returns:
+        Tuple of (results, serialized results); shared by coalesced uploads, so neither may be modified
+    """
+    if app.config['UPLOAD_IN_MEMORY']:
+        logger.debug("Processing %s from memory", filename)
+        results = process_upload(buffer, filename, dataset_id=dataset_id)
+    else:
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(filename))
+        logger.debug("Saving uploaded file to %s", file_path)
+        try:
+            with open(file_path, 'wb') as f:
+                shutil.copyfileobj(buffer, f)
+            
+            logger.debug("Processing %s", filename)
+            results = process_upload(file_path, filename, dataset_id=dataset_id)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)  # Clean up the uploaded file
+    
+    with timed('serialize'):
+        body = app.json.response(results).get_data()
+    result_cache.put(cache_key, body)
+    return results, body
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
+    from weekly_analyzer import ANALYZER_VERSION
+    
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'}), 400
     
@@ -141,25 +1252,54 @@ def upload_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
-    if file and file.filename.lower().endswith('.pdf'):
-        filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    if file and file.filename.lower().endswith(UPLOAD_EXTENSIONS):
+        columnar = _wants_columnar()
+        buffer, digest = spool_upload(file.stream)
+        cache_key = content_key(digest, ANALYZER_VERSION)
+        
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Result cache hit for %s", cache_key)
+            buffer.close()
+            if columnar:
+                response = jsonify(to_columnar(json.loads(cached)))
+            else:
+                response = app.response_class(cached, mimetype='application/json')
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        
+        if request.args.get('async') == '1':
+            return _queue_upload(buffer, file.filename, cache_key, digest)
         
         try:
-            logger.debug(f"Saving uploaded file to {file_path}")
-            file.save(file_path)
-            
-            logger.debug("Processing PDF file")
-            results = process_pdf(file_path)
-            
-            logger.debug(f"Processing complete. Results: {results}")
-            os.remove(file_path)  # Clean up the uploaded file
-            return jsonify(results)
+            with collect_timings() as timings:
+                if app.config['COALESCE_TIMEOUT']:
+                    (results, body), shared = upload_flights.do(
+                        cache_key, _analyze_and_cache, buffer, file.filename, cache_key, digest
+                    )
+                else:
+                    (results, body), shared = _analyze_and_cache(buffer, file.filename, cache_key, digest), False
+                if shared:
+                    logger.debug("Shared the analysis of a concurrent upload of %s", cache_key)
+                    count('coalesced_uploads')
+                
+                if columnar:
+                    with timed('serialize_columnar'):
+                        results = to_columnar(results)
+                        response = jsonify(results)
+                else:
+                    response = app.response_class(body, mimetype='application/json')
+            if request.args.get('timings') == '1':
+                # Only the plain results are cached; the breakdown is for this request alone
+                response = jsonify({**results, 'timings': _timings_breakdown(timings)})
+            response.headers['X-Cache'] = 'COALESCED' if shared else 'MISS'
+            return response
             
         except Exception as e:
             logger.error(f"Error processing upload: {str(e)}", exc_info=True)
-            if os.path.exists(file_path):
-                os.remove(file_path)  # Clean up the uploaded file
-            return jsonify({'error': f'Error processing PDF: {str(e)}'}), 500
+            kind = 'PDF' if file.filename.lower().endswith('.pdf') else 'file'
+            return jsonify({'error': f'Error processing {kind}: {str(e)}'}), 500
+        finally:
+            buffer.close()
     
     return jsonify({'error': 'Invalid file type'}), 400
\ No newline at end of file
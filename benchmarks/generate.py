@@ -0,0 +1,173 @@
+"""
+Generate synthetic broker exports for the benchmarks.
+
+The rows look like the investing.com style exports the app is used with
+(Date, Price, Open, High, Low, Vol., Change %), newest first, and are
+written either as a CSV file or as a PDF with one ruled table per page.
+The PDF is written by hand so no extra dependency is needed.
+
+Usage:
+    python benchmarks/generate.py out.pdf --rows 260 --pages 10
+    python benchmarks/generate.py out.csv --years 5
+"""
+import argparse
+import csv
+import datetime
+import math
+import random
+import zlib
+
+HEADER = ['Date', 'Price', 'Open', 'High', 'Low', 'Vol.', 'Change %']
+
+TRADING_DAYS_PER_YEAR = 260
+
+COLUMN_WIDTHS = [70, 70, 70, 70, 70, 60, 60]
+ROW_HEIGHT = 18
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 42
+
+
+def generate_rows(count, seed=0, end=datetime.date(2024, 12, 31)):
+    """
+    Random-walk price rows for `count` trading days ending at `end`, newest first.
+
+    About one weekday in twenty is skipped, like a market holiday.
+    """
+    rnd = random.Random(seed)
+    rows = []
+    day = end
+    price = 1000.0
+    while len(rows) < count:
+        if day.weekday() < 5 and rnd.random() > 0.05:
+            change = round(rnd.gauss(0, 1.2), 2)
+            open_ = price * (1 + rnd.gauss(0, 0.005))
+            high = max(open_, price) * (1 + abs(rnd.gauss(0, 0.01)))
+            low = min(open_, price) * (1 - abs(rnd.gauss(0, 0.01)))
+            rows.append([
+                day.strftime('%d/%m/%Y'),
+                f'{price:,.2f}',
+                f'{open_:,.2f}',
+                f'{high:,.2f}',
+                f'{low:,.2f}',
+                f'{rnd.uniform(1, 900):.2f}K',
+                f'{change:.2f}%'
+            ])
+            price = price / (1 + change / 100)
+        day -= datetime.timedelta(days=1)
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _page_content(rows, height):
+    """PDF content stream drawing rows as a ruled table at the top of a page."""
+    ops = []
+    top = height - MARGIN
+    for row_idx, row in enumerate(rows):
+        y = top - row_idx * ROW_HEIGHT
+        x = MARGIN
+        for col_idx, cell in enumerate(row):
+            ops.append(f'BT /F1 8 Tf {x + 3} {y - 12} Td ({_escape(cell)}) Tj ET')
+            x += COLUMN_WIDTHS[col_idx]
+
+    xs = [MARGIN]
+    for width in COLUMN_WIDTHS:
+        xs.append(xs[-1] + width)
+    bottom = top - len(rows) * ROW_HEIGHT
+    for row_idx in range(len(rows) + 1):
+        y = top - row_idx * ROW_HEIGHT
+        ops.append(f'{MARGIN} {y} m {xs[-1]} {y} l S')
+    for x in xs:
+        ops.append(f'{x} {top} m {x} {bottom} l S')
+    return ('\n'.join(ops) + '\n').encode('latin-1')
+
+
+def write_pdf(path, rows, pages=None, header_each_page=False):
+    """
+    Write rows as a PDF table spread evenly over `pages` pages.
+
+    The header row is on the first page only, as in the broker exports,
+    unless header_each_page is set. Pages grow taller when they have to
+    hold more rows than fit on A4.
+    """
+    pages = max(1, min(pages or math.ceil(len(rows) / 40), len(rows)))
+    per_page = math.ceil(len(rows) / pages)
+    chunks = []
+    for start in range(0, len(rows), per_page):
+        chunk = rows[start:start + per_page]
+        if start == 0 or header_each_page:
+            chunk = [HEADER] + chunk
+        chunks.append(chunk)
+
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    pages_id = font_id + 2 * len(chunks) + 1
+    page_ids = []
+    for chunk in chunks:
+        height = max(PAGE_HEIGHT, 2 * MARGIN + len(chunk) * ROW_HEIGHT)
+        data = zlib.compress(_page_content(chunk, height))
+        content_id = add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream')
+        page_ids.append(add(
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (pages_id, PAGE_WIDTH, height, font_id, content_id)
+        ))
+    add(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % i for i in page_ids), len(page_ids)))
+    catalog_id = add(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_id)
+    info_id = add(b'<< /Producer (Synthetic Broker Export) >>')
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, catalog_id, info_id, xref
+    )
+    with open(path, 'wb') as f:
+        f.write(bytes(out))
+
+
+def write_export(path, rows, pages=None):
+    """Write rows as a PDF or CSV export, depending on the file extension."""
+    if path.lower().endswith('.csv'):
+        write_csv(path, rows)
+    else:
+        write_pdf(path, rows, pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='Output file, .pdf or .csv')
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('--rows', type=int, default=TRADING_DAYS_PER_YEAR, help='Number of trading days')
+    size.add_argument('--years', type=float, help='Number of years of trading days')
+    parser.add_argument('--pages', type=int, help='Number of PDF pages (default: 40 rows per page)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    count = round(args.years * TRADING_DAYS_PER_YEAR) if args.years else args.rows
+    write_export(args.path, generate_rows(count, args.seed), args.pages)
+
+
+if __name__ == '__main__':
+    main()
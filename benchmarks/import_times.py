@@ -0,0 +1,99 @@
+"""
+Report the import cost of the app, per module, as seen on a cold start.
+
+Imports the app in a fresh interpreter with `python -X importtime`, sums the
+self time of every top-level package and lists the most expensive ones. It
+then checks which heavy dependencies are loaded after importing the app and
+after serving / and /health, which should need none of them.
+
+Usage:
+    python benchmarks/import_times.py
+    python benchmarks/import_times.py --top 30 --output imports.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('numpy', 'pandas', 'pdfplumber', 'pdfminer')
+
+# Run in the child interpreter: time the import and the light endpoints
+PROBE = f'''
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+loaded_after_import = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+client = app.app.test_client()
+start = time.perf_counter()
+statuses = [client.get('/').status_code, client.get('/health').status_code]
+served = time.perf_counter() - start
+print(json.dumps({{
+    'import_seconds': imported,
+    'light_requests_seconds': served,
+    'statuses': statuses,
+    'loaded_after_import': loaded_after_import,
+    'loaded_after_light_requests': [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+}}))
+'''
+
+
+def parse_importtime(stderr):
+    """Return {module: (self microseconds, cumulative microseconds)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def by_package(modules):
+    """Sum the self time of modules per top-level package, in microseconds."""
+    totals = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.split('.')[0]] += self_us
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15, help='Number of packages to list')
+    parser.add_argument('--output', help='Write the report to this JSON file')
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+    packages = by_package(modules)
+
+    print(f"import app: {probe['import_seconds'] * 1000:.0f}ms, "
+          f"/ and /health: {probe['light_requests_seconds'] * 1000:.0f}ms {probe['statuses']}")
+    print(f"heavy modules loaded after import: {probe['loaded_after_import'] or 'none'}")
+    print(f"heavy modules loaded after / and /health: {probe['loaded_after_light_requests'] or 'none'}\n")
+    print(f"{'package':<30} {'self ms':>8}")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<30} {self_us / 1000:>8.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                **probe,
+                'packages_ms': {name: self_us / 1000 for name, self_us in packages.items()},
+                'modules_ms': {
+                    name: {'self': self_us / 1000, 'cumulative': cumulative_us / 1000}
+                    for name, (self_us, cumulative_us) in modules.items()
+                }
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
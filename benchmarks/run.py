@@ -0,0 +1,222 @@
+"""
+Time the upload pipeline stage by stage on synthetic broker exports.
+
+Each scenario generates a PDF and a CSV export of a given number of rows and
+pages, then times opening the file, table extraction, numeric parsing, week
+segmentation and the per-week analysis separately, followed by the end to
+end entry points (process_pdf / process_spreadsheet, DataProcessor and
+WeeklyAnalyzer.process_table_data). Results can be written to a JSON file
+and compared against an earlier run.
+
+Usage:
+    python benchmarks/run.py --output baseline.json
+    python benchmarks/run.py --baseline baseline.json --output current.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+import pdfplumber
+
+import app as webapp
+from benchmarks.generate import generate_rows, write_export
+from data_processor import DataProcessor
+from pdf_extractor import iter_page_tables, layout_fingerprint
+from weekly_analyzer import WeeklyAnalyzer
+
+# name -> (rows, PDF pages): from one month to twenty years of trading days
+SCENARIOS = {
+    '1-month': (22, 1),
+    '1-year': (260, 7),
+    '5-years': (1300, 33),
+    '20-years': (5200, 200)
+}
+
+FORMATS = ('pdf', 'csv')
+
+# Stages faster than this are too noisy to report as regressions
+NOISE_FLOOR = 0.001
+
+
+def _timed(fn, repeat):
+    """Run fn once to warm up, then `repeat` times; return (timings, last result)."""
+    result = fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _open_pdf(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages), layout_fingerprint(pdf)
+
+
+def _extract_pdf(path):
+    # No fingerprint: every run walks the settings chain as a first upload would
+    rows = []
+    with pdfplumber.open(path) as pdf:
+        for tables in iter_page_tables(pdf.pages):
+            for table in tables:
+                if table and len(table) >= 2:
+                    rows.extend(table)
+    return rows
+
+
+def _parse(rows):
+    positive_changes, negative_changes = [], []
+    webapp._collect_changes(rows[1:], positive_changes, negative_changes)
+    return WeeklyAnalyzer().prepare_frame(rows)
+
+
+def _segment(df):
+    return WeeklyAnalyzer()._assign_weeks(df)
+
+
+def _analyze(df, week_ids):
+    analyzer = WeeklyAnalyzer()
+    return analyzer._analyze_weeks(analyzer._add_metrics(df), week_ids)
+
+
+def run_scenario(path, fmt, repeat):
+    """Time every stage on one generated export; return {stage: timings}."""
+    timings = {}
+    if fmt == 'pdf':
+        timings['open'], _ = _timed(lambda: _open_pdf(path), repeat)
+        timings['extract'], rows = _timed(lambda: _extract_pdf(path), repeat)
+    else:
+        timings['extract'], rows = _timed(lambda: webapp.read_spreadsheet_rows(path), repeat)
+
+    timings['parse'], df = _timed(lambda: _parse(rows), repeat)
+    timings['segment'], week_ids = _timed(lambda: _segment(df), repeat)
+    timings['analyze'], _ = _timed(lambda: _analyze(df, week_ids), repeat)
+
+    if fmt == 'pdf':
+        timings['process_pdf'], _ = _timed(lambda: webapp.process_pdf(path, workers=1), repeat)
+    else:
+        timings['process_spreadsheet'], _ = _timed(lambda: webapp.process_spreadsheet(path), repeat)
+    timings['data_processor'], _ = _timed(lambda: DataProcessor().process_file(path), repeat)
+    timings['process_table_data'], _ = _timed(lambda: WeeklyAnalyzer().process_table_data(rows), repeat)
+    return timings, len(rows) - 1
+
+
+def _summarize(timings):
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'runs': timings
+    }
+
+
+def _environment():
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pdfplumber': pdfplumber.__version__,
+        'created': time.time()
+    }
+
+
+def run(scenarios, formats, repeat, seed=0):
+    results = {'environment': _environment(), 'repeat': repeat, 'scenarios': {}}
+    with tempfile.TemporaryDirectory(prefix='change-bench-') as workdir:
+        for name in scenarios:
+            row_count, pages = SCENARIOS[name]
+            rows = generate_rows(row_count, seed)
+            for fmt in formats:
+                path = os.path.join(workdir, f'{name}.{fmt}')
+                write_export(path, rows, pages)
+                timings, parsed_rows = run_scenario(path, fmt, repeat)
+                key = f'{name}/{fmt}'
+                results['scenarios'][key] = {
+                    'rows': parsed_rows,
+                    'pages': pages if fmt == 'pdf' else None,
+                    'bytes': os.path.getsize(path),
+                    'stages': {stage: _summarize(values) for stage, values in timings.items()}
+                }
+                print(f"{key}: " + ', '.join(
+                    f"{stage} {min(values) * 1000:.1f}ms" for stage, values in timings.items()
+                ), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the median of every stage against the baseline run.
+
+    Returns:
+        List of (scenario, stage, ratio) slower than threshold times the baseline
+    """
+    regressions = []
+    print(f"\n{'scenario':<20} {'stage':<20} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, scenario in results['scenarios'].items():
+        base_stages = baseline.get('scenarios', {}).get(key, {}).get('stages', {})
+        for stage, summary in scenario['stages'].items():
+            if stage not in base_stages:
+                continue
+            before = base_stages[stage]['median']
+            after = summary['median']
+            ratio = after / before if before else float('inf')
+            slower = ratio > threshold and after > NOISE_FLOOR
+            if slower:
+                regressions.append((key, stage, ratio))
+            print(f"{key:<20} {stage:<20} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms "
+                  f"{ratio:>6.2f}x{' !' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per stage, after one warm-up run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against the results in this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='Ratio to the baseline median reported as a regression (default: 1.2)')
+    args = parser.parse_args()
+
+    # The app logs a record per analyzed file at INFO level, which would add to the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = run(args.scenarios, args.formats, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stages slower than {args.threshold}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
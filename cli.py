@@ -0,0 +1,249 @@
+"""
+Analyze a directory or glob of PDF, CSV and Excel exports without the web server.
+
+Files are analyzed in parallel, one per worker process, with the same code
+as POST /upload. Results are written as JSON Lines (one full result per
+file) or as one combined summary table in CSV or Parquet. Files whose
+SHA-256 is already in the output with a result are skipped, so a run that
+was interrupted can simply be started again.
+
+Usage:
+    python cli.py exports/ --output results.jsonl
+    python cli.py 'exports/**/*.pdf' --output summary.csv --workers 8
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import app as webapp
+
+FORMATS = ('jsonl', 'csv', 'parquet')
+
+SUMMARY_COLUMNS = [
+    'path', 'sha256', 'analyzer_version', 'positive_count', 'negative_count', 'positive_avg',
+    'negative_avg', 'total_weeks', 'error'
+]
+
+
+def find_files(inputs, recursive=False):
+    """Expand files, directories and glob patterns into the export files they hold, sorted."""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            if recursive:
+                candidates = [
+                    os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names
+                ]
+            else:
+                candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        elif glob.has_magic(pattern):
+            candidates = glob.glob(pattern, recursive=True)
+        else:
+            candidates = [pattern]
+
+        for path in candidates:
+            if os.path.isfile(path) and path.lower().endswith(webapp.UPLOAD_EXTENSIONS):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analyze_file(path):
+    """Analyze one export; runs in the worker processes."""
+    return webapp.process_upload(path, os.path.basename(path), workers=1)
+
+
+def summary_row(record):
+    """One row of the combined summary table from a per-file record."""
+    row = {
+        'path': record['path'],
+        'sha256': record['sha256'],
+        'analyzer_version': record['analyzer_version'],
+        'error': record.get('error', '')
+    }
+    if 'daily' in record:
+        row.update({
+            'positive_count': record['daily']['positive_count'],
+            'negative_count': record['daily']['negative_count'],
+            'positive_avg': record['daily']['positive_avg'],
+            'negative_avg': record['daily']['negative_avg'],
+            'total_weeks': record['weekly']['total_weeks']
+        })
+    return row
+
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in FORMATS else 'jsonl'
+
+
+def completed_digests(path, fmt, version):
+    """Digests of the files that already have a result in the output, for this analyzer version."""
+    if not os.path.exists(path):
+        return set()
+
+    if fmt == 'jsonl':
+        records = []
+        with open(path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # A line cut short by an interrupted run
+    elif fmt == 'csv':
+        with open(path, newline='') as f:
+            records = list(csv.DictReader(f))
+    else:
+        import pandas as pd
+        records = pd.read_parquet(path).fillna('').to_dict('records')
+
+    return {
+        record['sha256'] for record in records
+        if not record.get('error') and str(record.get('analyzer_version')) == version
+    }
+
+
+class OutputWriter:
+    """
+    Writes per-file records as they complete.
+
+    JSON Lines and CSV outputs are appended to and flushed after every file;
+    Parquet cannot be appended to, so its rows are written, after the rows
+    already in the file, when the writer is closed.
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self._rows = []
+        self._file = None
+        self._csv = None
+        if fmt == 'jsonl':
+            self._file = open(path, 'a')
+        elif fmt == 'csv':
+            exists = os.path.exists(path) and os.path.getsize(path) > 0
+            self._file = open(path, 'a', newline='')
+            self._csv = csv.DictWriter(self._file, fieldnames=SUMMARY_COLUMNS)
+            if not exists:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'jsonl':
+            self._file.write(webapp.app.json.dumps(record) + '\n')
+            self._file.flush()
+        elif self.fmt == 'csv':
+            self._csv.writerow(summary_row(record))
+            self._file.flush()
+        else:
+            self._rows.append(summary_row(record))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        if self.fmt == 'parquet' and self._rows:
+            import pandas as pd
+            df = pd.DataFrame(self._rows, columns=SUMMARY_COLUMNS)
+            if os.path.exists(self.path):
+                df = pd.concat([pd.read_parquet(self.path), df], ignore_index=True)
+            staging = f'{self.path}.tmp'
+            df.to_parquet(staging, index=False)
+            os.replace(staging, self.path)
+
+
+def run(paths, output, fmt, workers, resume=True):
+    """
+    Analyze files in a process pool and write their results.
+
+    Returns:
+        Tuple of (files analyzed, files skipped, files failed)
+    """
+    from weekly_analyzer import ANALYZER_VERSION
+
+    done = completed_digests(output, fmt, ANALYZER_VERSION) if resume else set()
+    pending = {}  # path -> digest
+    skipped = 0
+    for path in paths:
+        digest = file_digest(path)
+        if digest in done:
+            skipped += 1
+        else:
+            pending[path] = digest
+            done.add(digest)  # Identical files are analyzed once
+
+    failed = 0
+    writer = OutputWriter(output, fmt)
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1))) as executor:
+            futures = {executor.submit(analyze_file, path): path for path in pending}
+            for index, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                record = {'path': path, 'sha256': pending[path], 'analyzer_version': ANALYZER_VERSION}
+                try:
+                    results = future.result()
+                    record.update(daily=results['daily'], weekly=results['weekly'])
+                    status = f"{results['weekly']['total_weeks']} weeks"
+                except Exception as e:
+                    failed += 1
+                    record['error'] = str(e)
+                    status = f"error: {str(e)}"
+                writer.write(record)
+                print(f"[{index}/{len(pending)}] {path}: {status}", file=sys.stderr, flush=True)
+    finally:
+        writer.close()
+
+    return len(pending), skipped, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Export files, directories or glob patterns')
+    parser.add_argument('--output', '-o', required=True, help='Output file (.jsonl, .csv or .parquet)')
+    parser.add_argument('--format', choices=FORMATS,
+                        help='Output format (default: from the output extension, else jsonl)')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--recursive', '-r', action='store_true', help='Also search subdirectories')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Analyze every file even if its result is already in the output')
+    args = parser.parse_args()
+
+    # The app logs a summary record per file at INFO level; keep the console to progress lines
+    logging.getLogger().setLevel(logging.WARNING)
+
+    fmt = output_format(args.output, args.format)
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error('Parquet output needs pyarrow (pip install pyarrow)')
+
+    paths = find_files(args.inputs, args.recursive)
+    if not paths:
+        parser.error('No PDF, CSV or Excel files found')
+
+    start = time.perf_counter()
+    analyzed, skipped, failed = run(paths, args.output, fmt, args.workers, resume=not args.no_resume)
+    print(f"{analyzed} analyzed, {skipped} skipped, {failed} failed in "
+          f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
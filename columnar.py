@@ -0,0 +1,92 @@
+import math
+from datetime import date
+
+from weekdays import DAY_CODES, DAY_NAMES, STREAK_CODES, day_code
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Per-week fields that are copied as they are
+WEEK_VALUES = [
+    'avg_positive', 'avg_negative', 'max_positive_value', 'max_negative_value', 'days_in_week', 'final_change'
+]
+# Per-week fields holding a day name
+WEEK_DAYS = ['max_positive_day', 'max_negative_day', 'turned_positive', 'turned_negative']
+# Fields of each daily_progress entry that are copied as they are
+PROGRESS_VALUES = ['change', 'cumulative', 'price_range', 'range_percent', 'high_change', 'low_change', 'high', 'low']
+
+
+def epoch_days(iso_date):
+    """Days since 1970-01-01 of a YYYY-MM-DD string."""
+    return date.fromisoformat(iso_date).toordinal() - EPOCH_ORDINAL
+
+
+def streak_mask(days):
+    """Bit mask (Monday = bit 0) of a streak's days, e.g. 'Monday-Tuesday' -> 3."""
+    if not days:
+        return 0
+    return sum(1 << DAY_CODES[name] for name in days.split('-'))
+
+
+def finite(values):
+    """Replace NaN and infinities, which JSON.parse rejects, with None."""
+    return [None if isinstance(value, float) and not math.isfinite(value) else value for value in values]
+
+
+def weekly_to_columnar(weekly):
+    """
+    Turn weekly results into parallel arrays, one per field.
+
+    Args:
+        weekly: Dict with weekly_results and total_weeks, as returned by WeeklyAnalyzer
+    Returns:
+        Dict with total_weeks, weeks ({field: [value per week]}) and daily_progress
+        ({field: [value per day]}, five Monday-Friday entries per week, week after week)
+    """
+    weeks = weekly['weekly_results']
+    progress = [day for week in weeks for day in week['daily_progress']]
+
+    columns = {
+        'week_start': [epoch_days(week['week_start']) for week in weeks],
+        'week_end': [epoch_days(week['week_end']) for week in weeks]
+    }
+    for field in WEEK_VALUES:
+        columns[field] = finite(week[field] for week in weeks)
+    for field in WEEK_DAYS:
+        columns[field] = [day_code(week[field]) for week in weeks]
+    columns['highest_point_value'] = finite(week['highest_point']['value'] for week in weeks)
+    columns['highest_point_day'] = [day_code(week['highest_point']['day']) for week in weeks]
+    columns['longest_streak_direction'] = [STREAK_CODES[week['longest_streak']['direction']] for week in weeks]
+    columns['longest_streak_count'] = [week['longest_streak']['count'] for week in weeks]
+    columns['longest_streak_days'] = [streak_mask(week['longest_streak']['days']) for week in weeks]
+    columns['max_volatility_day'] = [day_code(week['max_volatility']['day']) for week in weeks]
+    columns['max_volatility_range_percent'] = finite(week['max_volatility']['range_percent'] for week in weeks)
+    columns['max_volatility_price_range'] = finite(week['max_volatility']['price_range'] for week in weeks)
+
+    # The day and arrow of each entry follow from its position and the sign of its change
+    daily_progress = {
+        'date': [epoch_days(day['date']) for day in progress],
+        'is_market_closed': [int(day['is_market_closed']) for day in progress]
+    }
+    for field in PROGRESS_VALUES:
+        daily_progress[field] = finite(day[field] for day in progress)
+
+    return {
+        'total_weeks': weekly['total_weeks'],
+        'weeks': columns,
+        'daily_progress': daily_progress
+    }
+
+
+def to_columnar(results):
+    """
+    Compact form of upload results for ?format=columnar.
+
+    Everything but the weekly results is kept as it is. Dates become days
+    since 1970-01-01, day names codes into `day_names` and non-finite
+    numbers null.
+    """
+    columnar = {key: value for key, value in results.items() if key != 'weekly'}
+    columnar['format'] = 'columnar'
+    columnar['day_names'] = DAY_NAMES
+    columnar['weekly'] = weekly_to_columnar(results['weekly'])
+    return columnar
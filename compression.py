@@ -0,0 +1,30 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are only gzip-compressed
+    brotli = None
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the content coding for a response.
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+    Returns:
+        'br', 'gzip' or None when the client accepts neither
+    """
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress(data, encoding, level=6):
+    """Compress bytes with 'br' or 'gzip'; level is the gzip level, scaled for brotli."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(11, round(level * 11 / 9)))
+    return gzip.compress(data, compresslevel=level, mtime=0)
@@ -1,17 +1,29 @@
 import pandas as pd
 import pdfplumber
 import logging
+import itertools
 import numpy as np
 
+from metrics import count, timed
+from parsing import parse_numeric
+from pdf_extractor import iter_page_tables, iter_table_rows, layout_fingerprint
+
 logger = logging.getLogger(__name__)
 
 class DataProcessor:
-    # Only focus on essential columns
+    # Column names used by the exports, per standard column; other columns are skipped
     COLUMN_VARIATIONS = {
         'Date': ['date', 'fecha', 'data'],
+        'Price': ['price', 'close', 'último', 'ultimo', 'cierre', 'fechamento'],
+        'Open': ['open', 'apertura', 'abertura'],
+        'High': ['high', 'máximo', 'maximo', 'máxima', 'maxima'],
+        'Low': ['low', 'mínimo', 'minimo', 'mínima', 'minima'],
+        'Vol.': ['vol.', 'vol', 'volume', 'volumen'],
         'Change %': ['change %', 'var %', 'change', 'variation %', 'var. %', '% change']
     }
 
+    CHUNK_SIZE = 50000  # Rows per chunk when reading a spreadsheet in chunks
+
     def __init__(self):
         self.df = None
 
@@ -20,17 +32,20 @@ class DataProcessor:
         try:
             file_extension = file_path.lower().split('.')[-1]
             
-            if file_extension == 'pdf':
-                self.df = self._process_pdf(file_path)
-            elif file_extension in ['csv', 'xlsx', 'xls']:
-                self.df = self._process_spreadsheet(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_extension}")
+            with timed('processor_read'):
+                if file_extension == 'pdf':
+                    self.df = self._process_pdf(file_path)
+                elif file_extension in ['csv', 'xlsx', 'xls']:
+                    self.df = self._process_spreadsheet(file_path)
+                else:
+                    raise ValueError(f"Unsupported file format: {file_extension}")
 
             if self.df is not None and not self.df.empty:
-                self._standardize_columns()
-                self._clean_data()
-                return self._calculate_metrics()
+                with timed('processor_clean'):
+                    self._standardize_columns()
+                    self._clean_data()
+                with timed('processor_metrics'):
+                    return self._calculate_metrics()
             else:
                 raise ValueError("No data could be extracted from the file")
 
@@ -39,28 +54,64 @@ class DataProcessor:
             raise
 
     def _process_pdf(self, file_path):
-        """Extract data from PDF using pdfplumber."""
+        """
+        Extract the price table from every page of a PDF into one DataFrame.
+        
+        Pages are read like app.process_pdf reads them (text layer first, then
+        the table settings chain) and dropped from memory once their rows are
+        taken, then stitched together by _stitch_tables.
+        """
         try:
             with pdfplumber.open(file_path) as pdf:
-                tables = []
-                for page in pdf.pages:
-                    extracted_tables = page.extract_tables()
-                    if extracted_tables:
-                        tables.extend(extracted_tables)
-                
-                if not tables:
-                    raise ValueError("No tables found in PDF")
-                
-                # Convert the first table with headers to DataFrame
-                table = tables[0]
-                headers = table[0]
-                data = table[1:]
-                return pd.DataFrame(data, columns=headers)
+                page_tables = iter_page_tables(pdf.pages, layout_fingerprint(pdf), release=True)
+                header = None
+                page_rows = []
+                for page_num, header, rows in iter_table_rows(page_tables):
+                    if rows:
+                        page_rows.append(rows)
+            
+            if header is None or not page_rows:
+                raise ValueError("No tables found in PDF")
+            
+            return self._stitch_tables(header, page_rows)
                 
         except Exception as e:
             logger.error(f"PDF processing failed: {str(e)}")
             raise
 
+    def _stitch_tables(self, header, page_rows):
+        """
+        Build one DataFrame from the table rows of every page.
+        
+        The cells are transposed into one object array per column, which the
+        DataFrame takes as its columns. Rows repeating the header, as printed
+        on every page by some exports, are dropped.
+        
+        Args:
+            header: Header row of the document
+            page_rows: Data rows of each page, as lists of cells
+        Returns:
+            DataFrame with the header as column names
+        """
+        width = len(header)
+        rows = [row for rows in page_rows for row in rows]
+        # Ragged rows are padded with None and cut to the header width
+        columns = [np.array(values, dtype=object) for values in itertools.zip_longest(*rows)][:width]
+        columns += [np.full(len(rows), None, dtype=object)] * (width - len(columns))
+        
+        repeated_header = np.ones(len(rows), dtype=bool)
+        for values, name in zip(columns, header):
+            column = pd.Series(values, copy=False).fillna('').astype(str).str.strip()
+            repeated_header &= (column == ('' if name is None else str(name).strip())).to_numpy()
+        if repeated_header.any():
+            logger.debug("Dropping %s repeated header rows", int(repeated_header.sum()))
+            columns = [values[~repeated_header] for values in columns]
+        
+        # Columns by position, as header names may repeat
+        df = pd.DataFrame(dict(enumerate(columns)), copy=False)
+        df.columns = header
+        return df
+
     def _process_spreadsheet(self, file_path):
         """Process CSV or Excel files."""
         try:
@@ -72,34 +123,139 @@ class DataProcessor:
             logger.error(f"Spreadsheet processing failed: {str(e)}")
             raise
 
-    def _standardize_columns(self):
-        """Standardize column names."""
-        # Convert all column names to strings and clean them
-        self.df.columns = self.df.columns.astype(str)
-        self.df.columns = [col.strip().lower() for col in self.df.columns]
+    def iter_chunks(self, file_path, filename=None, chunksize=None):
+        """
+        Read a CSV or Excel file in chunks of rows, parsing only the known columns.
+        
+        Cells are kept as strings and the columns renamed to their standard
+        names, ready for WeeklyAnalyzer.normalize_frame. CSV and .xlsx files
+        are read incrementally; .xls files have no streaming reader and are
+        loaded whole, then sliced.
         
-        # Create mapping for found columns
+        Args:
+            file_path: Path of the file, or a seekable binary file object holding it
+            filename: Name used to tell CSV from Excel when file_path is a file object
+            chunksize: Rows per chunk (defaults to CHUNK_SIZE)
+        Yields:
+            DataFrames with the COLUMN_VARIATIONS columns, in file order
+        """
+        chunksize = chunksize or self.CHUNK_SIZE
+        file_extension = (filename or str(file_path)).lower().split('.')[-1]
+        try:
+            if file_extension == 'csv':
+                chunks = self._iter_csv(file_path, chunksize)
+            elif file_extension == 'xlsx':
+                chunks = self._iter_xlsx(file_path, chunksize)
+            elif file_extension == 'xls':
+                chunks = self._iter_xls(file_path, chunksize)
+            else:
+                raise ValueError(f"Unsupported file format: {file_extension}")
+            
+            for chunk in chunks:
+                count('rows', len(chunk))
+                yield chunk
+        except Exception as e:
+            logger.error(f"Spreadsheet processing failed: {str(e)}")
+            raise
+
+    def _iter_csv(self, file_path, chunksize):
+        header = pd.read_csv(file_path, nrows=0).columns
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
+        
+        column_mapping = self._required_columns(header)
+        reader = pd.read_csv(
+            file_path,
+            usecols=list(column_mapping),
+            dtype={col: str for col in column_mapping},
+            keep_default_na=False,
+            chunksize=chunksize
+        )
+        with reader:
+            for chunk in reader:
+                yield chunk.rename(columns=column_mapping)
+
+    def _iter_xlsx(self, file_path, chunksize):
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise ValueError("No data could be extracted from the file")
+            
+            column_mapping = self._required_columns(header)
+            positions = [i for i, col in enumerate(header) if col in column_mapping]
+            columns = [column_mapping[header[i]] for i in positions]
+            
+            batch = []
+            for row in rows:
+                cells = [row[i] if i < len(row) else None for i in positions]
+                batch.append(['' if cell is None else str(cell) for cell in cells])
+                if len(batch) == chunksize:
+                    yield pd.DataFrame(batch, columns=columns)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=columns)
+        finally:
+            workbook.close()
+
+    def _iter_xls(self, file_path, chunksize):
+        df = pd.read_excel(file_path, dtype=str, keep_default_na=False)
+        column_mapping = self._required_columns(df.columns)
+        df = df[list(column_mapping)].rename(columns=column_mapping)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+    def resolve_columns(self, columns):
+        """
+        Match column names against COLUMN_VARIATIONS.
+        
+        Args:
+            columns: Column names as found in the file
+        Returns:
+            Dict of {column name: standard name} for the columns recognized
+        """
         column_mapping = {}
         for standard_name, variations in self.COLUMN_VARIATIONS.items():
-            for col in self.df.columns:
-                if col in variations or col == standard_name.lower():
+            for col in columns:
+                name = str(col).strip().lower()
+                if col not in column_mapping and (name in variations or name == standard_name.lower()):
                     column_mapping[col] = standard_name
                     break
+        return column_mapping
+
+    def _required_columns(self, columns):
+        """resolve_columns, raising ValueError unless every standard column is found."""
+        column_mapping = self.resolve_columns(columns)
+        missing_columns = [name for name in self.COLUMN_VARIATIONS if name not in column_mapping.values()]
+        if missing_columns:
+            logger.error(f"Missing required columns: {missing_columns}")
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        return column_mapping
+
+    def _standardize_columns(self):
+        """Standardize column names."""
+        # Convert all column names to strings and clean them
+        self.df.columns = self.df.columns.astype(str)
+        self.df.columns = [col.strip().lower() for col in self.df.columns]
         
-        # Rename columns using the mapping
-        self.df = self.df.rename(columns=column_mapping)
+        # Rename the columns found using the mapping
+        self.df = self.df.rename(columns=self.resolve_columns(self.df.columns))
 
     def _clean_data(self):
         """Clean and convert data to appropriate types."""
         try:
-            # Convert date
-            self.df['Date'] = pd.to_datetime(self.df['Date'])
+            # Convert date, day first as in the exports, like WeeklyAnalyzer does
+            try:
+                self.df['Date'] = pd.to_datetime(self.df['Date'], format='%d/%m/%Y')
+            except ValueError:
+                self.df['Date'] = pd.to_datetime(self.df['Date'])
             
             # Clean Change % column
             if 'Change %' in self.df.columns:
-                # Remove any non-numeric characters except decimal point and minus sign
-                self.df['Change %'] = self.df['Change %'].astype(str).str.replace('[^0-9.-]', '', regex=True)
-                self.df['Change %'] = pd.to_numeric(self.df['Change %'], errors='coerce').fillna(0)
+                self.df['Change %'] = parse_numeric(self.df['Change %'], 'percent').values.fillna(0)
             
             # Sort by date
             self.df = self.df.sort_values('Date', ascending=False)
@@ -0,0 +1,299 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# Normalized column -> file name; rows are stored oldest first
+COLUMN_FILES = {
+    'Date': 'date',
+    'Close': 'close',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Volume': 'volume',
+    'Change %': 'change'
+}
+
+# Bumped when the stored columns change; datasets in another format are treated as missing
+FORMAT_VERSION = 2
+
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{16,64}$')
+
+
+class DatasetStore:
+    """
+    Columnar on-disk store of normalized price rows.
+
+    Each dataset is a directory holding one .npy file per column plus a
+    meta.json file, so a dataset can be re-analyzed without re-parsing the
+    source file. Columns are memory-mapped when read. Datasets written in
+    an older FORMAT_VERSION are not read; uploading the file again replaces
+    them.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, dataset_id):
+        if not DATASET_ID_PATTERN.match(dataset_id or ''):
+            raise ValueError(f"Invalid dataset id: {dataset_id}")
+        return os.path.join(self.root, dataset_id)
+
+    def exists(self, dataset_id):
+        try:
+            return self.meta(dataset_id).get('format') == FORMAT_VERSION
+        except (ValueError, OSError):
+            return False
+
+    def save(self, dataset_id, df, summary=None, build_index=None):
+        """
+        Store normalized rows (as returned by WeeklyAnalyzer.prepare_frame), in any order.
+
+        The dataset is written to a temporary directory and moved into place,
+        so readers never see a partially written dataset. See DatasetWriter.commit
+        for the optional summary and query index stored with it.
+        """
+        writer = self.writer(dataset_id)
+        try:
+            writer.append(df)
+            return writer.commit(summary, build_index)
+        except Exception:
+            writer.abort()
+            raise
+
+    def writer(self, dataset_id, newest_first=True):
+        """Return a DatasetWriter storing a dataset chunk by chunk, the chunks arriving newest or oldest first."""
+        return DatasetWriter(self, dataset_id, newest_first)
+
+    def save_summary(self, dataset_id, summary):
+        """Store the analysis summary of a dataset next to its columns."""
+        _write_summary(self._path(dataset_id), summary)
+
+    def load_summary(self, dataset_id):
+        """Return the stored analysis summary of a dataset, or None."""
+        path = os.path.join(self._path(dataset_id), 'summary.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def save_index(self, dataset_id, arrays):
+        """Store the query index arrays of a dataset (see query_engine.QueryIndex) next to its columns."""
+        path = os.path.join(self._path(dataset_id), 'query_index')
+        staging = tempfile.mkdtemp(prefix='.query_index-', dir=self._path(dataset_id))
+        try:
+            _write_index(staging, arrays)
+            _replace_dir(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def load_index(self, dataset_id):
+        """Return the memory-mapped query index arrays of a dataset, or None."""
+        import numpy as np
+        
+        path = os.path.join(self._path(dataset_id), 'query_index')
+        try:
+            names = [name[:-len('.npy')] for name in os.listdir(path) if name.endswith('.npy')]
+        except FileNotFoundError:
+            return None
+        return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in names}
+
+    def meta(self, dataset_id):
+        with open(os.path.join(self._path(dataset_id), 'meta.json')) as f:
+            return json.load(f)
+
+    def load_columns(self, dataset_id):
+        """Return the memory-mapped column arrays of a dataset, oldest row first."""
+        import numpy as np
+        
+        path = self._path(dataset_id)
+        return {
+            column: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for column, name in COLUMN_FILES.items()
+        }
+
+    def load(self, dataset_id, start=None, end=None):
+        """
+        Load a dataset as a normalized DataFrame, newest first.
+
+        Args:
+            dataset_id: Id the dataset was saved under
+            start: Optional first date to include (inclusive)
+            end: Optional last date to include (inclusive)
+        """
+        import numpy as np
+        import pandas as pd
+        
+        columns = self.load_columns(dataset_id)
+        dates = columns['Date']
+        lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start else 0
+        hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end else len(dates)
+
+        # Only the selected slice of each memory-mapped column is read, newest row first
+        return pd.DataFrame({
+            column: (values[lo:hi][::-1].astype('datetime64[ns]') if column == 'Date' else values[lo:hi][::-1])
+            for column, values in columns.items()
+        })
+
+
+class DatasetWriter:
+    """
+    Writes a dataset from chunks of normalized rows arriving newest first,
+    or oldest first.
+
+    Each chunk's columns are saved to segment files in a temporary directory
+    as soon as it arrives. commit() joins the segments, oldest first, into
+    the column files one segment at a time and moves the dataset into place,
+    so only one chunk is held in memory.
+    """
+
+    def __init__(self, store, dataset_id, newest_first=True):
+        self.store = store
+        self.dataset_id = dataset_id
+        self.path = store._path(dataset_id)
+        self.newest_first = newest_first
+        self.rows = 0
+        self._segments = []  # Row count of each appended chunk, in the order they arrived
+        self._oldest = None  # Oldest date appended so far
+        self._newest = None
+        self._staging = tempfile.mkdtemp(prefix=f'.{dataset_id}-', dir=store.root)
+
+    def _segment_path(self, index, name):
+        return os.path.join(self._staging, f'{index:06d}-{name}.npy')
+
+    def append(self, df):
+        """
+        Add a chunk of normalized rows, in any order within the chunk.
+
+        Raises:
+            ValueError: If the chunk is out of order with the earlier chunks
+        """
+        import numpy as np
+        
+        if df.empty:
+            return
+        # Oldest first, so date ranges can be found with a binary search
+        if df['Date'].is_monotonic_decreasing:
+            df = df.iloc[::-1]
+        elif not df['Date'].is_monotonic_increasing:
+            df = df.sort_values('Date', kind='stable')
+
+        dates = df['Date'].to_numpy(dtype='datetime64[D]')
+        if self.newest_first and self._oldest is not None and dates[-1] > self._oldest:
+            raise ValueError("Dataset chunks are not sorted newest first")
+        if not self.newest_first and self._newest is not None and dates[0] < self._newest:
+            raise ValueError("Dataset chunks are not sorted oldest first")
+
+        index = len(self._segments)
+        for column, name in COLUMN_FILES.items():
+            values = dates if column == 'Date' else df[column].to_numpy(dtype=float)
+            np.save(self._segment_path(index, name), values)
+        self._segments.append(len(df))
+        self.rows += len(df)
+        if self._oldest is None or dates[0] < self._oldest:
+            self._oldest = dates[0]
+        if self._newest is None or dates[-1] > self._newest:
+            self._newest = dates[-1]
+
+    def commit(self, summary=None, build_index=None):
+        """
+        Join the chunks into the dataset, replacing any dataset stored under the same id.
+
+        The summary and query index are written next to the columns before the
+        dataset is moved into place, so it never appears without them.
+
+        Args:
+            summary: Optional analysis summary to store with the rows (see save_summary)
+            build_index: Optional function of the joined, memory-mapped columns returning
+                the query index arrays to store with them (see save_index)
+        """
+        import numpy as np
+        
+        try:
+            for column, name in COLUMN_FILES.items():
+                path = os.path.join(self._staging, f'{name}.npy')
+                if len(self._segments) == 1:
+                    os.replace(self._segment_path(0, name), path)
+                    continue
+                dtype = 'datetime64[D]' if column == 'Date' else float
+                if not self._segments:
+                    np.save(path, np.empty(0, dtype=dtype))
+                    continue
+                values = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(self.rows,))
+                offset = 0
+                order = range(len(self._segments))
+                for index in (reversed(order) if self.newest_first else order):
+                    segment_path = self._segment_path(index, name)
+                    segment = np.load(segment_path)
+                    values[offset:offset + len(segment)] = segment
+                    offset += len(segment)
+                    os.remove(segment_path)
+                values.flush()
+                del values
+
+            meta = {
+                'dataset_id': self.dataset_id,
+                'format': FORMAT_VERSION,
+                'rows': self.rows,
+                'first_date': str(self._oldest) if self.rows else None,
+                'last_date': str(self._newest) if self.rows else None,
+                'created': time.time()
+            }
+            with open(os.path.join(self._staging, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            if summary is not None:
+                _write_summary(self._staging, summary)
+            if build_index is not None:
+                columns = {
+                    column: np.load(os.path.join(self._staging, f'{name}.npy'), mmap_mode='r')
+                    for column, name in COLUMN_FILES.items()
+                }
+                index_path = os.path.join(self._staging, 'query_index')
+                os.mkdir(index_path)
+                _write_index(index_path, build_index(columns))
+
+            _replace_dir(self._staging, self.path)
+        except Exception as e:
+            logger.error(f"Could not store dataset {self.dataset_id}: {str(e)}")
+            self.abort()
+            raise
+
+        logger.debug("Stored dataset %s with %s rows", self.dataset_id, meta['rows'])
+        return meta
+
+    def abort(self):
+        """Drop the chunks written so far."""
+        shutil.rmtree(self._staging, ignore_errors=True)
+
+
+def _write_summary(directory, summary):
+    path = os.path.join(directory, 'summary.json')
+    staging = f'{path}.tmp'
+    with open(staging, 'w') as f:
+        json.dump(summary, f)
+    os.replace(staging, path)
+
+
+def _write_index(directory, arrays):
+    import numpy as np
+    
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), values)
+
+
+def _replace_dir(staging, path):
+    """Move a directory into place; an existing one is moved aside first and deleted after."""
+    if os.path.exists(path):
+        old = tempfile.mkdtemp(prefix=f'.{os.path.basename(path)}-old-', dir=os.path.dirname(path))
+        os.replace(path, os.path.join(old, 'previous'))
+        os.replace(staging, path)
+        shutil.rmtree(old, ignore_errors=True)
+    else:
+        os.replace(staging, path)
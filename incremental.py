@@ -0,0 +1,129 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from weekly_analyzer import WeeklyAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+def daily_sums(changes):
+    """Running daily totals of a Change % column: sums and counts of positive and negative days."""
+    changes = np.asarray(changes, dtype=float)
+    positive = changes[changes > 0]
+    negative = changes[changes < 0]
+    return {
+        'positive_sum': sum(positive.tolist()),
+        'positive_count': len(positive),
+        'negative_sum': sum(negative.tolist()),
+        'negative_count': len(negative)
+    }
+
+
+def add_daily_sums(sums, other):
+    return {key: sums[key] + other[key] for key in sums}
+
+
+def daily_from_sums(sums):
+    """Daily results (as returned by /upload) from running daily totals."""
+    return {
+        'positive_count': sums['positive_count'],
+        'negative_count': sums['negative_count'],
+        'positive_avg': sums['positive_sum'] / sums['positive_count'] if sums['positive_count'] else 0,
+        'negative_avg': sums['negative_sum'] / sums['negative_count'] if sums['negative_count'] else 0
+    }
+
+
+def build_summary(df, weekly_results, sums=None):
+    """
+    Summary kept next to a stored dataset so later appends can reuse it.
+
+    Only the daily sums and the number of weeks are kept: the week results
+    themselves are much larger than the rows, and the query index already
+    holds what queries need of them.
+
+    Args:
+        df: Normalized rows of the dataset; not used when sums is given
+        weekly_results: List of week results for those rows
+        sums: Daily sums of the rows, when already known (e.g. from DailyTotals while streaming)
+    """
+    return {
+        'daily_sums': daily_sums(df['Change %']) if sums is None else sums,
+        'total_weeks': len(weekly_results)
+    }
+
+
+def _monday(dates):
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    weekday = (dates.astype('int64') - 4) % 7  # 1970-01-01 was a Thursday
+    return dates - weekday.astype('timedelta64[D]')
+
+
+def new_rows(stored_dates, incoming):
+    """Rows of a newer export whose date is not stored yet, one per date."""
+    incoming_dates = incoming['Date'].to_numpy(dtype='datetime64[D]')
+    rows = incoming[~np.isin(incoming_dates, np.asarray(stored_dates, dtype='datetime64[D]'))]
+    return rows[~rows['Date'].duplicated()]
+
+
+def tail_start(stored_dates, new):
+    """
+    Position, in the oldest-first stored dates, of the first row append_rows needs.
+
+    That is the last row before the week of the oldest new row, which gives
+    the previous close of that week.
+    """
+    oldest = _monday([new['Date'].min()])[0]
+    return max(int(np.searchsorted(np.asarray(stored_dates, dtype='datetime64[D]'), oldest)) - 1, 0)
+
+
+def append_rows(stored, new):
+    """
+    Merge new rows into the newest stored rows of a dataset, re-analyzing only the affected weeks.
+
+    A week is affected if it gains a row, or if its oldest row is the day
+    right after a new row (its previous close changes). Every other week
+    result stays as it is.
+
+    Args:
+        stored: Normalized rows of the dataset, newest first; only the rows from
+            tail_start on are needed
+        new: Normalized rows with dates not in the dataset, as returned by new_rows
+    Returns:
+        Tuple of (merged rows newest first, week results of the affected weeks
+        newest first, Mondays of the affected weeks)
+    """
+    logger.debug("Appending %s new rows to %s stored rows", len(new), len(stored))
+
+    merged = pd.concat([stored, new[stored.columns]], ignore_index=True)
+    merged = merged.sort_values('Date', ascending=False, kind='stable').reset_index(drop=True)
+
+    merged_dates = merged['Date'].to_numpy(dtype='datetime64[D]')
+    is_new = np.isin(merged_dates, new['Date'].to_numpy(dtype='datetime64[D]'))
+    new_positions = np.flatnonzero(is_new)
+    newer_positions = new_positions[new_positions > 0] - 1  # Rows whose previous close is a new row
+
+    merged_monday = _monday(merged_dates)
+    affected = np.unique(np.concatenate([merged_monday[new_positions], merged_monday[newer_positions]]))
+
+    # Rows of the affected weeks, plus the row just older than each affected run for its close
+    in_affected = np.isin(merged_monday, affected)
+    context = np.zeros(len(merged), dtype=bool)
+    context[1:] = in_affected[:-1] & ~in_affected[1:]
+    subset = merged[in_affected | context]
+
+    # Context rows are never in an affected week, so they can only form too-short weeks
+    recomputed = WeeklyAnalyzer().process_frame(subset)['weekly_results']
+    logger.debug("Re-analyzed %s weeks", len(affected))
+    return merged, recomputed, affected
+
+
+def replace_weeks(weekly_results, recomputed, affected):
+    """Week results with those of the affected weeks (see append_rows) replaced, newest first."""
+    affected_starts = set(np.datetime_as_string(affected, unit='D').tolist())
+    kept = [
+        week for week in weekly_results
+        if str(_monday([week['week_start']])[0]) not in affected_starts
+    ]
+    return sorted(kept + recomputed, key=lambda week: week['week_end'], reverse=True)
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    """State of one background job, updated by the worker thread running it."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'queued'  # queued -> running -> done | failed
+        self.pages_processed = 0
+        self.total_pages = None
+        self.results = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    def report_progress(self, pages_processed, total_pages):
+        self.pages_processed = pages_processed
+        self.total_pages = total_pages
+
+    def to_dict(self):
+        job = {
+            'id': self.id,
+            'status': self.status,
+            'pages_processed': self.pages_processed,
+            'total_pages': self.total_pages
+        }
+        if self.status == 'done':
+            job['results'] = self.results
+        if self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+
+class JobQueue:
+    """
+    Bounded pool of worker threads running jobs in the background.
+
+    At most `workers` jobs run at once and at most `max_pending` jobs may be
+    queued or running; further submissions raise QueueFullError. Finished
+    jobs are forgotten `ttl` seconds after they complete.
+    """
+
+    def __init__(self, workers=2, max_pending=16, ttl=3600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue fn(job, *args, **kwargs); its return value becomes the job results.
+
+        Returns:
+            The queued Job
+        """
+        with self._lock:
+            self._expire()
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._pending += 1
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the Job with this id, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        try:
+            job.results = fn(job, *args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}", exc_info=True)
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'jobs': len(self._jobs)
+            }
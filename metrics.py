@@ -0,0 +1,134 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds, in seconds, of the stage duration histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER_HELP = {
+    'pages': 'PDF pages processed',
+    'tables': 'Tables extracted from PDF pages',
+    'rows': 'Table rows extracted from uploads',
+    'rejected_cells': 'Change % cells that could not be parsed as numbers',
+    'coalesced_uploads': 'Uploads answered with the analysis of a concurrent identical upload',
+    'settings_retries': 'Table extractions retried with the next table settings',
+    'text_layer_pages': 'PDF pages read from the text layer without table detection',
+    'text_layer_fallbacks': 'PDF pages the text layer could not read, extracted with table detection'
+}
+
+# Timings and counts of the request being handled, when it asked for them
+_request_timings = ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values, as exported to Prometheus."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot counts values above every bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class Metrics:
+    """
+    Thread-safe registry of per-stage duration histograms and counters.
+
+    Values are kept per process: stages run in extraction or batch worker
+    processes are only seen through the wall time of the parent stage.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                '# HELP change_stage_seconds Time spent in each processing stage',
+                '# TYPE change_stage_seconds histogram'
+            ]
+            for stage, histogram in sorted(self._histograms.items()):
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'change_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+                lines.append(f'change_stage_seconds_sum{{stage="{stage}"}} {histogram.sum!r}')
+                lines.append(f'change_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'# HELP change_{name}_total {COUNTER_HELP.get(name, name)}')
+                lines.append(f'# TYPE change_{name}_total counter')
+                lines.append(f'change_{name}_total {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by every request handled in this process
+metrics = Metrics()
+
+
+@contextmanager
+def timed(stage):
+    """Time the enclosed block as one span of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe(stage, elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings['stages'][stage] = timings['stages'].get(stage, 0.0) + elapsed
+
+
+def count(name, amount=1):
+    """Add to the counter `name`, e.g. count('pages')."""
+    metrics.increment(name, amount)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings['counts'][name] = timings['counts'].get(name, 0) + amount
+
+
+@contextmanager
+def collect_timings():
+    """
+    Collect the spans and counts recorded by this thread into a breakdown.
+
+    Yields:
+        Dict of {'stages': {stage: seconds}, 'counts': {name: count}}, filled in as stages finish
+    """
+    timings = {'stages': {}, 'counts': {}}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
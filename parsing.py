@@ -0,0 +1,131 @@
+import logging
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Cells treated as missing rather than rejected
+MISSING_VALUES = {'', '-', '—', '–', 'n/a', 'N/A', 'nan', 'NaN', 'None'}
+
+VOLUME_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+
+class ParsedColumn(NamedTuple):
+    values: 'pd.Series'  # float64, NaN where the cell was missing or rejected
+    rejected: 'pd.Series'  # Original text of the cells that could not be parsed
+    decimal: Optional[str] = None  # Decimal separator given or shown by the cells, None if they could be read either way
+
+
+def infer_decimal_separator(cells, default='.'):
+    """
+    Infer whether a column of number strings uses '.' or ',' as decimal separator.
+
+    Cells holding both separators decide by majority (the last one is the
+    decimal separator). Otherwise a comma not followed by exactly three digits,
+    or several dots in one cell, means comma decimals. Cells that could be
+    read either way, such as '1,234' or '12.5', return `default`.
+    """
+    has_comma = cells.str.contains(',', regex=False)
+    has_dot = cells.str.contains('.', regex=False)
+    both = cells[has_comma & has_dot]
+    if not both.empty:
+        comma_last = both.str.rfind(',') > both.str.rfind('.')
+        return ',' if comma_last.mean() > 0.5 else '.'
+    if cells[has_comma].str.contains(r',(?!\d{3}(?:\D|$))', regex=True).any():
+        return ','
+    if cells[has_dot].str.contains(r'\..*\.', regex=True).any():
+        return ','
+    if cells[has_dot].str.contains(r'\.(?!\d{3}(?:\D|$))', regex=True).any():
+        return '.'  # Not followed by exactly three digits, so not a thousands separator
+    return default
+
+
+def _normalize_separators(cells, decimal):
+    """Drop thousands separators and make '.' the decimal separator."""
+    if decimal == ',':
+        return cells.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return cells.str.replace(',', '', regex=False)
+
+
+def _clean_cells(series, kind):
+    """Cells without whitespace, '%' or volume suffix; returns (raw text, cells, missing mask, suffix multiplier)."""
+    raw = series.astype(str)
+    cells = raw.str.replace(r'\s', '', regex=True).str.replace('−', '-', regex=False)
+    missing = cells.isin(MISSING_VALUES) | series.isna()
+
+    multiplier = None
+    if kind == 'volume':
+        suffix = cells.str[-1:].str.upper()
+        multiplier = suffix.map(VOLUME_SUFFIXES)
+        cells = cells.where(multiplier.isna(), cells.str[:-1])
+    elif kind == 'percent':
+        cells = cells.str.replace('%', '', regex=False)
+    return raw, cells, missing, multiplier
+
+
+def _has_both_separators(cells):
+    return cells.str.contains(',', regex=False) & cells.str.contains('.', regex=False)
+
+
+def parse_numeric(values, kind='number', decimal=None):
+    """
+    Parse a column of number strings in one vectorized pass.
+
+    Handles surrounding whitespace, thousands separators, decimal commas, a
+    trailing '%' and, for volumes, K/M/B/T suffixes. Cells that cannot be
+    parsed become NaN and are returned together instead of raising.
+
+    Args:
+        values: Sequence or Series of cells
+        kind: 'number', 'percent' or 'volume'
+        decimal: '.' or ','; inferred from the column when None. A lone
+            separator in a percentage is always read as the decimal one, so
+            for percentages it only applies to cells with both separators.
+            Pass the decimal of an earlier chunk of the same column to read
+            cells that could be read either way, such as '1,234', like it.
+    Returns:
+        ParsedColumn of (values, rejected, decimal)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return ParsedColumn(series.astype(float), series.iloc[0:0].astype(str))
+
+    raw, cells, missing, multiplier = _clean_cells(series, kind)
+    if kind == 'percent':
+        both = _has_both_separators(cells)
+        cells = cells.where(both, cells.str.replace(',', '.', regex=False))
+        if both.any():
+            decimal = decimal or infer_decimal_separator(cells[both], default=None)
+            cells[both] = _normalize_separators(cells[both], decimal or '.')
+    else:
+        decimal = decimal or infer_decimal_separator(cells[~missing], default=None)
+        cells = _normalize_separators(cells, decimal or '.')
+
+    parsed = pd.to_numeric(cells.where(~missing), errors='coerce').astype(float)
+    if multiplier is not None:
+        parsed = parsed * multiplier.fillna(1.0)
+
+    rejected = raw[parsed.isna() & ~missing]
+    if not rejected.empty and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Rejected %d of %d %s cells, e.g. %s", len(rejected), len(raw), kind, describe_rejected(rejected))
+    return ParsedColumn(parsed, rejected, decimal)
+
+
+def describe_rejected(rejected, limit=5):
+    """Short description of the first rejected cells, for log and error messages."""
+    sample = ', '.join(f'{index}: {value!r}' for index, value in rejected.iloc[:limit].items())
+    more = len(rejected) - limit
+    return f'{sample} (+{more} more)' if more > 0 else sample
+
+
+def split_changes(values):
+    """
+    Parse Change % cells and split them into positive and negative values.
+
+    Returns:
+        Tuple of (positive values, negative values, rejected cells)
+    """
+    parsed, rejected, _ = parse_numeric(values, 'percent')
+    changes = parsed.to_numpy()
+    return changes[changes > 0].tolist(), changes[changes < 0].tolist(), rejected
@@ -0,0 +1,442 @@
+import bisect
+import io
+import logging
+import threading
+from collections import OrderedDict
+
+from metrics import count
+from worker_pool import submit
+
+logger = logging.getLogger(__name__)
+
+# Table extraction settings, tried in order until one yields a table with data rows
+TABLE_SETTINGS = [
+    {},  # Default settings
+    {
+        'text_x_tolerance': 5,
+        'text_y_tolerance': 5
+    },
+    {
+        'text_x_tolerance': 10,
+        'text_y_tolerance': 3,
+        'intersection_x_tolerance': 10,
+        'intersection_y_tolerance': 3
+    }
+]
+
+# Header row of the broker exports, read straight from the text layer by extract_text_tables
+TEXT_HEADER = ['Date', 'Price', 'Open', 'High', 'Low', 'Vol.', 'Change %']
+TEXT_NUMERIC_COLUMNS = {1: 'number', 2: 'number', 3: 'number', 4: 'number', 6: 'percent'}
+LINE_TOLERANCE = 3  # Words whose tops differ by at most this many points are on one line
+
+
+class SettingsCache:
+    """
+    Bounded LRU map from a document layout fingerprint to the index of the
+    TABLE_SETTINGS entry that last extracted tables for that layout.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0  # Pages where the remembered settings worked on the first try
+        self.misses = 0  # Pages with no remembered settings, or where they failed
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint):
+        """Return the remembered settings index for a layout, or None."""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            index = self._entries.get(fingerprint)
+            if index is not None:
+                self._entries.move_to_end(fingerprint)
+            return index
+
+    def record(self, fingerprint, preferred, winner):
+        """Record the outcome of one page extracted with `preferred` settings tried first."""
+        with self._lock:
+            if preferred is not None and winner == preferred:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if fingerprint is None or winner is None:
+                return
+            self._entries[fingerprint] = winner
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# Shared by every request handled in this process
+settings_cache = SettingsCache()
+
+
+def layout_fingerprint(pdf):
+    """
+    Identify a document layout by its producer metadata, first page size and header row text.
+
+    Returns:
+        Hashable fingerprint, or None for documents without pages
+    """
+    if not pdf.pages:
+        return None
+
+    page = pdf.pages[0]
+    metadata = pdf.metadata or {}
+    producer = str(metadata.get('Producer') or metadata.get('Creator') or '')
+
+    header = ''
+    try:
+        words = page.extract_words()
+        if words:
+            top = min(word['top'] for word in words)
+            header = ' '.join(word['text'] for word in words if abs(word['top'] - top) <= 3)
+    except Exception as e:
+        logger.debug("Could not read header row for layout fingerprint: %s", e)
+
+    return (producer, round(float(page.width)), round(float(page.height)), header)
+
+
+def settings_order(preferred=None):
+    """Indexes into TABLE_SETTINGS, starting with `preferred` when given."""
+    order = list(range(len(TABLE_SETTINGS)))
+    if preferred is not None and preferred in order:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    return order
+
+
+def settings_retries(preferred, winner):
+    """Number of settings that failed before `winner` (all but the first when none worked)."""
+    order = settings_order(preferred)
+    return order.index(winner) if winner is not None else len(order) - 1
+
+
+def extract_page_tables(page, preferred=None):
+    """
+    Extract the tables of a single page, retrying with each of TABLE_SETTINGS.
+
+    Args:
+        page: pdfplumber page
+        preferred: Index of the settings to try first, e.g. the winner for this layout
+    Returns:
+        Tuple of (tables, index of the settings that worked or None)
+    """
+    tables = None
+    for index in settings_order(preferred):
+        settings = TABLE_SETTINGS[index]
+        try:
+            tables = page.extract_tables(**settings)
+            if tables and any(len(table) > 1 for table in tables):
+                logger.debug("Successfully extracted tables with settings: %s", settings)
+                return tables, index
+        except Exception as e:
+            logger.debug("Failed to extract tables with settings %s: %s", settings, e)
+            continue
+    return tables, None
+
+
+def _group_lines(words):
+    """Group words into lines by their top coordinate, each line sorted left to right."""
+    lines = []
+    for word in sorted(words, key=lambda word: (word['top'], word['x0'])):
+        if lines and word['top'] - lines[-1][0]['top'] <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [sorted(line, key=lambda word: word['x0']) for line in lines]
+
+
+def _match_header(line):
+    """Return the (x0, x1) span of each TEXT_HEADER column if the line is the header row, else None."""
+    columns = []
+    words = iter(line)
+    for name in TEXT_HEADER:
+        word = next(words, None)
+        if word is None:
+            return None
+        text, x0, x1 = word['text'], word['x0'], word['x1']
+        while len(text) < len(name) and name.startswith(text):
+            word = next(words, None)
+            if word is None:
+                return None
+            text, x1 = f"{text} {word['text']}", word['x1']
+        if text != name:
+            return None
+        columns.append((x0, x1))
+    return columns if next(words, None) is None else None
+
+
+def _split_line(line, boundaries):
+    """Split a line's words into cells, one per column between the boundaries."""
+    cells = [[] for _ in range(len(boundaries) + 1)]
+    for word in line:
+        cells[bisect.bisect_right(boundaries, (word['x0'] + word['x1']) / 2)].append(word['text'])
+    return [' '.join(cell) for cell in cells]
+
+
+def _parse_dates(cells):
+    """Parse date cells, day first as in the exports, then any format; NaT where neither works."""
+    import pandas as pd
+    
+    dates = pd.Series(cells, dtype=object)
+    parsed = pd.to_datetime(dates, format='%d/%m/%Y', errors='coerce')
+    if parsed.isna().any():
+        parsed = pd.to_datetime(dates, format='mixed', errors='coerce')
+    return parsed
+
+
+def _has_date_and_price(rows):
+    """Whether each row's date and price cells parse, e.g. a data row with an empty Vol. cell."""
+    import numpy as np
+    from parsing import parse_numeric
+    
+    if not rows:
+        return np.zeros(0, dtype=bool)
+    dates, prices = zip(*((row[0], row[1]) for row in rows))
+    price = parse_numeric(list(prices), 'number').values
+    return (_parse_dates(list(dates)).notna() & price.notna()).to_numpy()
+
+
+def _valid_rows(rows):
+    """Whether every row has a parseable date and parseable prices and change."""
+    from parsing import parse_numeric
+    
+    if not rows:
+        return True
+    columns = list(zip(*rows))
+    if _parse_dates(list(columns[0])).isna().any():
+        return False
+    return all(
+        parse_numeric(columns[index], kind).rejected.empty
+        for index, kind in TEXT_NUMERIC_COLUMNS.items()
+    )
+
+
+def extract_text_tables(page, columns=None):
+    """
+    Read the price table of a page from its words, without table geometry.
+
+    Lines are split by their y position and cells by the x positions of the
+    TEXT_HEADER columns, taken from the header row on this page or from
+    `columns` found on an earlier page. Lines with a cell in every column
+    are rows; lines with empty cells are rows too when their date and price
+    parse (e.g. an empty Vol.), and page furniture otherwise. Furniture
+    before the first and after the last row of a table is ignored.
+
+    Returns:
+        Tuple of (tables as extract_tables would return them, or None when
+        the page does not validate, columns for the next page)
+    """
+    lines = []  # (table number, cells or None for a header row), in page order
+    table_number = 0
+    for line in _group_lines(page.extract_words()):
+        header = _match_header(line)
+        if header is not None:
+            columns = header
+            table_number += 1
+            lines.append((table_number, None))
+            continue
+        if columns is None:
+            continue
+
+        boundaries = [(columns[i - 1][1] + columns[i][0]) / 2 for i in range(1, len(columns))]
+        cells = _split_line(line, boundaries)
+        if any(cells):
+            lines.append((table_number, cells))
+
+    partial = [cells for _, cells in lines if cells is not None and not all(cells)]
+    partial_rows = iter(_has_date_and_price(partial).tolist())
+
+    tables = {}
+    ended = set()  # Tables where furniture followed rows
+    for number, cells in lines:
+        if cells is None:
+            tables[number] = [list(TEXT_HEADER)]
+            continue
+        is_row = all(cells) or next(partial_rows)
+        if not is_row:
+            if number in tables:
+                ended.add(number)  # Furniture after rows ends the table
+            continue
+        if number in ended:
+            return None, columns  # Rows on both sides of a furniture line
+        tables.setdefault(number, []).append(cells)
+
+    tables = list(tables.values())
+    data_rows = [row for table in tables for row in table if row != TEXT_HEADER]
+    if not data_rows or not _valid_rows(data_rows):
+        return None, columns
+    return tables, columns
+
+
+def _extract_tables(page, preferred, columns, text_layer):
+    """
+    Extract a page's tables with the text layer first, then the settings chain.
+
+    Returns:
+        Tuple of (tables, whether the text layer was used, winning settings index or None, columns)
+    """
+    if text_layer:
+        tables, columns = extract_text_tables(page, columns)
+        if tables is not None:
+            return tables, True, None, columns
+    tables, winner = extract_page_tables(page, preferred)
+    return tables, False, winner, columns
+
+
+def _record_page(fingerprint, preferred, used_text, winner, text_layer):
+    """Update settings_cache and the extraction counters for one page."""
+    if used_text:
+        count('text_layer_pages')
+        return
+    if text_layer:
+        count('text_layer_fallbacks')
+    settings_cache.record(fingerprint, preferred, winner)
+    count('settings_retries', settings_retries(preferred, winner))
+
+
+def iter_page_tables(pages, fingerprint=None, release=False, text_layer=True):
+    """
+    Yield the tables of each page in order.
+
+    With text_layer set, each page is first read with extract_text_tables;
+    pages it cannot validate go through the settings chain, trying the
+    settings that worked last for this layout first and remembering the
+    winner in settings_cache.
+
+    With release set, each page's parsed objects and layout are dropped once
+    its tables are extracted, so memory does not grow with the page count.
+    """
+    preferred = settings_cache.get(fingerprint)
+    columns = None
+    for page in pages:
+        tables, used_text, winner, columns = _extract_tables(page, preferred, columns, text_layer)
+        _record_page(fingerprint, preferred, used_text, winner, text_layer)
+        if winner is not None:
+            preferred = winner
+        if release:
+            page.flush_cache()
+        yield tables
+
+
+def _normalize_row(row):
+    return [str(cell).strip() if cell is not None else '' for cell in row]
+
+
+def iter_table_rows(page_tables):
+    """
+    Yield the data rows of each page, with the header row of the document.
+
+    The first row of the first table with data is the header. Later tables
+    only lose their first row when it repeats that header, as in exports
+    that print the header on every page.
+
+    Yields:
+        Tuple of (page number, header row, data rows of the page)
+    """
+    header = None
+    for page_num, tables in enumerate(page_tables, 1):
+        count('pages')
+
+        if not tables:
+            logger.warning(f"No tables found on page {page_num}")
+            continue
+
+        count('tables', len(tables))
+
+        rows = []
+        for table in tables:
+            if not table or len(table) < 2:  # Skip empty tables or tables with just headers
+                continue
+
+            if header is None:
+                header = table[0]
+                logger.debug("Table headers: %s", header)
+                table = table[1:]
+            elif _normalize_row(table[0]) == _normalize_row(header):
+                table = table[1:]
+            rows.extend(table)
+
+        count('rows', len(rows))
+        logger.debug("Page %d: %d tables, %d rows", page_num, len(tables), len(rows))
+        yield page_num, header, rows
+
+
+def split_page_range(page_count, chunks):
+    """Split range(page_count) into at most `chunks` contiguous (start, stop) ranges."""
+    chunks = max(1, min(chunks, page_count))
+    size, remainder = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_page_range(source, start, stop, preferred, text_layer=True):
+    """
+    Worker entry point: open the PDF and extract the tables of pages[start:stop].
+
+    `source` is a file path or the raw bytes of the document. Ranges that do
+    not start at the first page take the text layer columns from its header.
+
+    Returns:
+        List of (tables, preferred index tried, whether the text layer was used, winning index) per page
+    """
+    import pdfplumber
+    
+    results = []
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with pdfplumber.open(source) as pdf:
+        columns = None
+        if text_layer and start > 0:
+            columns = extract_text_tables(pdf.pages[0])[1]
+        for page in pdf.pages[start:stop]:
+            tables, used_text, winner, columns = _extract_tables(page, preferred, columns, text_layer)
+            results.append((tables, preferred, used_text, winner))
+            if winner is not None:
+                preferred = winner
+    return results
+
+
+def extract_tables_parallel(source, page_count, workers, fingerprint=None, text_layer=True):
+    """
+    Extract tables from every page in the shared worker processes.
+
+    `source` is a file path or the raw bytes of the document. The pages are split into `workers` contiguous ranges;
+    the worker handling each range opens the PDF itself and starts from the settings remembered for `fingerprint`.
+
+    Returns:
+        List with the tables of each page, in page order
+    """
+    ranges = split_page_range(page_count, workers)
+    preferred = settings_cache.get(fingerprint)
+    logger.debug("Extracting %s pages with %s workers: %s", page_count, len(ranges), ranges)
+
+    futures = [submit(_extract_page_range, source, start, stop, preferred, text_layer) for start, stop in ranges]
+    try:
+        # Collect in submission order so pages stay in document order
+        page_tables = []
+        for future in futures:
+            for tables, tried_first, used_text, winner in future.result():
+                _record_page(fingerprint, tried_first, used_text, winner, text_layer)
+                page_tables.append(tables)
+    finally:
+        for future in futures:
+            future.cancel()  # Ranges not started yet when a range failed
+
+    return page_tables
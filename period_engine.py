@@ -0,0 +1,212 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from columnar import finite
+from weekdays import DAY_NAMES
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('week', 'month')
+DEFAULT_WINDOWS = (5, 20, 60)
+
+
+def _runs(sign, breaks):
+    """
+    Length of the same-direction run each day ends, 0 on flat or missing days.
+
+    Args:
+        sign: Direction of each day's change (1, -1 or 0), oldest first
+        breaks: True where a run must start over even if the direction is unchanged
+    """
+    sign = pd.Series(sign)
+    run_id = ((sign != sign.shift()) | breaks).cumsum()
+    return np.where(sign.to_numpy() != 0, sign.groupby(run_id).cumcount().to_numpy() + 1, 0)
+
+
+def _chronological(df):
+    """The columns the engine needs, oldest row first."""
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable')
+    dates = df['Date'].to_numpy(dtype='datetime64[D]')
+    change = df['Change %'].to_numpy(dtype=float)
+    close = df['Close'].to_numpy(dtype=float)
+    high = df['High'].to_numpy(dtype=float)
+    low = df['Low'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        range_percent = (high - low) / low * 100  # As WeeklyAnalyzer computes Range_Percent
+    return dates, change, close, range_percent
+
+
+def _iso(dates):
+    return np.datetime_as_string(dates, unit='D').tolist()
+
+
+def _columns(frame):
+    """DataFrame to {column: [values]}, with NaN as None."""
+    return {column: finite(values.tolist()) for column, values in frame.items()}
+
+
+def period_stats(dates, change, close, range_percent, period='week', week_start=0, trading_days=5, min_days=None):
+    """
+    Statistics of every calendar week or month.
+
+    A week starts on `week_start` and its trading days are the `trading_days`
+    days from there, e.g. week_start=6 (Sunday) and trading_days=5 for a
+    Sunday-Thursday market; rows on other days are left out of weeks. Periods
+    with fewer than `min_days` rows are dropped: by default weeks need
+    trading_days - 1 days, as the 4-of-5 rule of WeeklyAnalyzer, and months one.
+    Streaks are runs of days moving the same way; a flat day ends them.
+
+    Args:
+        dates, change, close, range_percent: Columns of the rows, oldest first
+    Returns:
+        Dict of {column: [value per period]}, oldest period first
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period: {period}")
+    if not 0 <= week_start <= 6:
+        raise ValueError(f"Week start must be a weekday number between 0 and 6, not {week_start}")
+    if not 1 <= trading_days <= 7:
+        raise ValueError(f"Trading days must be between 1 and 7, not {trading_days}")
+    if min_days is None:
+        min_days = max(1, trading_days - 1) if period == 'week' else 1
+
+    day_number = dates.astype('int64')
+    if period == 'week':
+        offset = (day_number + 3 - week_start) % 7  # 1970-01-01 was a Thursday
+        keep = offset < trading_days
+        period_start = dates - offset.astype('timedelta64[D]')
+    else:
+        keep = np.ones(len(dates), dtype=bool)
+        period_start = dates.astype('datetime64[M]').astype('datetime64[D]')
+
+    prev_close = np.r_[np.nan, close[:-1]]  # Close before each row, whether or not it is kept
+    dates, change, close, prev_close, range_percent, period_start = (
+        values[keep] for values in (dates, change, close, prev_close, range_percent, period_start)
+    )
+    key = period_start.astype('int64')
+    new_period = np.r_[True, key[1:] != key[:-1]]
+    sign = np.sign(np.nan_to_num(change)).astype(int)
+    runs = _runs(sign, new_period)
+
+    frame = pd.DataFrame({
+        'key': key,
+        'date': dates,
+        'change': change,
+        'positive': np.where(change > 0, change, np.nan),
+        'negative': np.where(change < 0, change, np.nan),
+        'close': close,
+        'range_percent': np.where(np.isfinite(range_percent), range_percent, np.nan),
+        'positive_run': np.where(sign > 0, runs, 0),
+        'negative_run': np.where(sign < 0, runs, 0)
+    })
+    stats = frame.groupby('key', sort=True).agg(
+        first_date=('date', 'first'),
+        last_date=('date', 'last'),
+        days=('date', 'size'),
+        change=('change', 'sum'),
+        positive_days=('positive', 'count'),
+        negative_days=('negative', 'count'),
+        avg_positive=('positive', 'mean'),
+        avg_negative=('negative', 'mean'),
+        close=('close', 'last'),
+        avg_range_percent=('range_percent', 'mean'),
+        max_range_percent=('range_percent', 'max'),
+        longest_positive_streak=('positive_run', 'max'),
+        longest_negative_streak=('negative_run', 'max')
+    )
+    # Keys increase with time, so groups are in the order their first rows appear
+    stats['prev_close'] = prev_close[new_period]
+    stats = stats[stats['days'] >= min_days]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return_percent = (stats['close'] / stats['prev_close'] - 1) * 100
+    columns = {
+        'start': _iso(stats.index.to_numpy().astype('datetime64[D]')),
+        'first_date': _iso(stats['first_date'].to_numpy(dtype='datetime64[D]')),
+        'last_date': _iso(stats['last_date'].to_numpy(dtype='datetime64[D]'))
+    }
+    columns.update(_columns(stats.drop(columns=['first_date', 'last_date', 'prev_close'])))
+    columns['return_percent'] = finite(return_percent.tolist())
+    return columns
+
+
+def _longest_runs(runs, window):
+    """Longest run inside each window of `window` days ending on each day; NaN for the first window - 1 days."""
+    longest = np.full(len(runs), np.nan)
+    if len(runs) >= window:
+        # A run that started before the window only counts its days inside it
+        views = np.lib.stride_tricks.sliding_window_view(runs, window)
+        longest[window - 1:] = np.minimum(views, np.arange(1, window + 1)).max(axis=1)
+    return longest
+
+
+def rolling_stats(change, range_percent, windows=DEFAULT_WINDOWS):
+    """
+    Rolling statistics over the last N trading days, for every day and window size.
+
+    Args:
+        change, range_percent: Columns of the rows, oldest first
+        windows: Window sizes in trading days
+    Returns:
+        Dict of {window size: {column: [value per day]}}; values are None
+        until a full window of days is available
+    """
+    sign = np.sign(np.nan_to_num(change)).astype(int)
+    runs = _runs(sign, np.zeros(len(sign), dtype=bool))
+    frame = pd.DataFrame({
+        'change': change,
+        'positive': np.where(change > 0, change, 0.0),
+        'positive_days': (change > 0).astype(float),
+        'negative': np.where(change < 0, change, 0.0),
+        'negative_days': (change < 0).astype(float)
+    })
+    range_percent = pd.Series(np.where(np.isfinite(range_percent), range_percent, np.nan))
+
+    result = {}
+    for window in windows:
+        if window < 1:
+            raise ValueError(f"Window must be at least 1 day, not {window}")
+        sums = frame.rolling(window, min_periods=window).sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats = pd.DataFrame({
+                'avg_change': sums['change'] / window,
+                'positive_ratio': sums['positive_days'] / window,
+                'avg_positive': sums['positive'] / sums['positive_days'],
+                'avg_negative': sums['negative'] / sums['negative_days'],
+                'avg_range_percent': range_percent.rolling(window, min_periods=window).mean(),
+                'longest_positive_streak': _longest_runs(np.where(sign > 0, runs, 0), window),
+                'longest_negative_streak': _longest_runs(np.where(sign < 0, runs, 0), window)
+            })
+        result[window] = _columns(stats)
+    return result
+
+
+def analyze_periods(df, period='week', week_start=0, trading_days=5, min_days=None, windows=DEFAULT_WINDOWS):
+    """
+    Period and rolling-window statistics of normalized rows.
+
+    Args:
+        df: DataFrame with Date, Close, High, Low and Change % columns, in any order
+        period: 'week' or 'month'
+        week_start: Weekday number (Monday = 0) weeks start on
+        trading_days: Trading days per week, counted from week_start
+        min_days: Rows a period needs to be reported (see period_stats)
+        windows: Rolling window sizes in trading days
+    Returns:
+        Dict with the settings used, `periods` ({column: [value per period]}),
+        `dates` of the rows and `rolling` ({window: {column: [value per row]}})
+    """
+    dates, change, close, range_percent = _chronological(df)
+    periods = period_stats(dates, change, close, range_percent, period, week_start, trading_days, min_days)
+    return {
+        'period': period,
+        'week_start': DAY_NAMES[week_start],
+        'trading_days': trading_days,
+        'total_periods': len(periods['start']),
+        'periods': periods,
+        'dates': _iso(dates),
+        'rolling': {str(window): stats for window, stats in rolling_stats(change, range_percent, windows).items()}
+    }
@@ -0,0 +1,269 @@
+import logging
+
+import numpy as np
+
+from weekdays import DAY_CODES, DAY_NAMES, STREAK_CODES
+
+logger = logging.getLogger(__name__)
+
+FINAL_DIRECTIONS = {'positive': 1, 'negative': -1, 'flat': 0}
+
+
+def _prefix(values):
+    """Prefix sums with a leading 0: the sum of values[a:b] is prefix[b] - prefix[a]."""
+    return np.concatenate([[0], np.cumsum(values)])
+
+
+def _ratio(part, whole):
+    return part / whole if whole else 0
+
+
+def _date_bounds(dates, start, end):
+    """Slice bounds of the sorted dates between start and end, both inclusive."""
+    lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left') if start else 0
+    hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end else len(dates)
+    return int(lo), int(hi)
+
+
+def _day_arrays(columns):
+    """Days grouped by weekday, each group sorted by date, with prefix sums of their statistics."""
+    dates = np.asarray(columns['Date'], dtype='datetime64[D]')
+    change = np.asarray(columns['Change %'], dtype=float)
+    high = np.asarray(columns['High'], dtype=float)
+    low = np.asarray(columns['Low'], dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        range_percent = (high - low) / low * 100  # As WeeklyAnalyzer computes Range_Percent
+
+    weekday = (dates.astype('int64') + 3) % 7  # 1970-01-01 was a Thursday
+    order = np.lexsort((dates, weekday))
+    change = change[order]
+    range_percent = range_percent[order]
+    has_range = np.isfinite(range_percent)
+    positive = change > 0
+    negative = change < 0
+
+    return {
+        'day_date': dates[order],
+        'day_change': change,
+        'day_range_percent': range_percent,
+        'weekday_bounds': np.searchsorted(weekday[order], np.arange(8)),
+        'change_sum': _prefix(change),
+        'positive_count': _prefix(positive),
+        'positive_sum': _prefix(np.where(positive, change, 0.0)),
+        'negative_count': _prefix(negative),
+        'negative_sum': _prefix(np.where(negative, change, 0.0)),
+        'range_count': _prefix(has_range),
+        'range_sum': _prefix(np.where(has_range, range_percent, 0.0))
+    }
+
+
+def _week_arrays(weekly_results):
+    """Records of the weeks, as parallel arrays sorted by start date."""
+
+    def code(name):
+        return -1 if name is None else DAY_CODES[name]
+
+    weeks = sorted(weekly_results, key=lambda week: week['week_start'])
+    return {
+        'week_start': np.array([week['week_start'] for week in weeks], dtype='datetime64[D]'),
+        'week_end': np.array([week['week_end'] for week in weeks], dtype='datetime64[D]'),
+        'week_final_change': np.array([week['final_change'] for week in weeks], dtype=float),
+        'week_days': np.array([week['days_in_week'] for week in weeks], dtype=int),
+        'week_turned_positive': np.array([code(week['turned_positive']) for week in weeks], dtype=int),
+        'week_turned_negative': np.array([code(week['turned_negative']) for week in weeks], dtype=int),
+        'week_streak_direction': np.array(
+            [STREAK_CODES[week['longest_streak']['direction']] for week in weeks], dtype=int
+        ),
+        'week_streak_count': np.array([week['longest_streak']['count'] for week in weeks], dtype=int),
+        'week_volatility': np.array(
+            [week['max_volatility']['range_percent'] for week in weeks], dtype=float
+        )
+    }
+
+
+class QueryIndex:
+    """
+    Precomputed per-weekday and per-week aggregates of a stored dataset.
+
+    Days are grouped by weekday, each group sorted by date and carrying prefix
+    sums of its Change % statistics, so a weekday's aggregate over any date
+    range takes two binary searches. Weeks are parallel arrays sorted by start
+    date, filtered with vectorized masks. Both are small enough to be kept
+    next to the dataset, one .npy file per array in a query_index directory,
+    and are memory-mapped when loaded.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    @classmethod
+    def build(cls, columns, weekly_results):
+        """
+        Args:
+            columns: Normalized columns of the dataset (as returned by DatasetStore.load_columns)
+            weekly_results: Week results of the dataset, as returned by WeeklyAnalyzer
+        """
+        return cls({**_day_arrays(columns), **_week_arrays(weekly_results)})
+
+    def replace_weeks(self, weekly_results, affected):
+        """
+        Index with the records of some weeks replaced, e.g. after an append (see incremental.append_rows).
+
+        Args:
+            weekly_results: Week results of the affected weeks
+            affected: Mondays of the affected weeks; their old records are dropped
+        """
+        a = self.arrays
+        starts = np.asarray(a['week_start'], dtype='datetime64[D]')
+        weekday = (starts.astype('int64') + 3) % 7  # 1970-01-01 was a Thursday
+        kept = ~np.isin(starts - weekday.astype('timedelta64[D]'), np.asarray(affected, dtype='datetime64[D]'))
+        weeks = {
+            name: np.concatenate([np.asarray(a[name])[kept], values])
+            for name, values in _week_arrays(weekly_results).items()
+        }
+        order = np.argsort(weeks['week_start'], kind='stable')
+        return QueryIndex({**a, **{name: values[order] for name, values in weeks.items()}})
+
+    def replace_days(self, columns):
+        """Index with the per-weekday arrays rebuilt from the dataset's columns, keeping the week records."""
+        return QueryIndex({**self.arrays, **_day_arrays(columns)})
+
+    @property
+    def total_weeks(self):
+        return len(self.arrays['week_start'])
+
+    def weekdays(self, start=None, end=None, weekdays=None, min_range=None, max_range=None):
+        """
+        Change % statistics per weekday.
+
+        Args:
+            start: Optional first date to include (inclusive)
+            end: Optional last date to include (inclusive)
+            weekdays: Optional weekday numbers to report (defaults to every weekday with data)
+            min_range: Only count days whose range percent is at least this
+            max_range: Only count days whose range percent is at most this
+        Returns:
+            List of per-weekday dicts: days, average change, positive and negative
+            days with their ratio and averages, and average range percent
+        """
+        a = self.arrays
+        bounds = a['weekday_bounds']
+        if weekdays is None:
+            weekdays = [day for day in range(7) if bounds[day + 1] > bounds[day]]
+
+        stats = []
+        for day in weekdays:
+            first, last = int(bounds[day]), int(bounds[day + 1])
+            lo, hi = _date_bounds(a['day_date'][first:last], start, end)
+            lo, hi = first + lo, first + hi
+
+            if min_range is None and max_range is None:
+                # Whole date range: read the aggregates off the prefix sums
+                total = {
+                    name: a[name][hi] - a[name][lo]
+                    for name in ('change_sum', 'positive_count', 'positive_sum', 'negative_count',
+                                 'negative_sum', 'range_count', 'range_sum')
+                }
+                days = hi - lo
+            else:
+                change = a['day_change'][lo:hi]
+                range_percent = a['day_range_percent'][lo:hi]
+                keep = np.isfinite(range_percent)
+                if min_range is not None:
+                    keep &= range_percent >= min_range
+                if max_range is not None:
+                    keep &= range_percent <= max_range
+                change = change[keep]
+                range_percent = range_percent[keep]
+                total = {
+                    'change_sum': change.sum(),
+                    'positive_count': int((change > 0).sum()),
+                    'positive_sum': change[change > 0].sum(),
+                    'negative_count': int((change < 0).sum()),
+                    'negative_sum': change[change < 0].sum(),
+                    'range_count': len(range_percent),
+                    'range_sum': range_percent.sum()
+                }
+                days = len(change)
+
+            positive_count = int(total['positive_count'])
+            negative_count = int(total['negative_count'])
+            stats.append({
+                'weekday': DAY_NAMES[day],
+                'days': days,
+                'avg_change': _ratio(float(total['change_sum']), days),
+                'positive_days': positive_count,
+                'negative_days': negative_count,
+                'positive_ratio': _ratio(positive_count, days),
+                'avg_positive': _ratio(float(total['positive_sum']), positive_count),
+                'avg_negative': _ratio(float(total['negative_sum']), negative_count),
+                'avg_range_percent': _ratio(float(total['range_sum']), int(total['range_count']))
+            })
+        return stats
+
+    def weeks(self, start=None, end=None, turned_positive_by=None, turned_negative_by=None, streak=None,
+              min_streak=None, min_volatility=None, max_volatility=None, final=None, limit=0):
+        """
+        How the weeks matching some filters ended.
+
+        Args:
+            start: Optional first week start to include (inclusive)
+            end: Optional last week start to include (inclusive)
+            turned_positive_by: Weekday number by which the week's cumulative change turned positive
+            turned_negative_by: Weekday number by which the week's cumulative change turned negative
+            streak: Direction of the week's longest streak, 'positive' or 'negative'
+            min_streak: Minimum length of the week's longest streak
+            min_volatility: Minimum range percent of the week's most volatile day
+            max_volatility: Maximum range percent of the week's most volatile day
+            final: Only weeks that ended 'positive', 'negative' or 'flat'
+            limit: Number of matching week start dates to list, newest first
+        Returns:
+            Dict with the number of matching weeks, how many ended positive,
+            negative or flat, their ratios and average final change
+        """
+        if limit < 0:
+            raise ValueError(f"Limit must not be negative, not {limit}")
+
+        a = self.arrays
+        lo, hi = _date_bounds(a['week_start'], start, end)
+        final_change = a['week_final_change'][lo:hi]
+        keep = np.ones(hi - lo, dtype=bool)
+
+        if turned_positive_by is not None:
+            turned = a['week_turned_positive'][lo:hi]
+            keep &= (turned >= 0) & (turned <= turned_positive_by)
+        if turned_negative_by is not None:
+            turned = a['week_turned_negative'][lo:hi]
+            keep &= (turned >= 0) & (turned <= turned_negative_by)
+        if streak is not None:
+            if streak not in ('positive', 'negative'):
+                raise ValueError(f"Unknown streak direction: {streak}")
+            keep &= a['week_streak_direction'][lo:hi] == STREAK_CODES[streak]
+        if min_streak is not None:
+            keep &= a['week_streak_count'][lo:hi] >= min_streak
+        if min_volatility is not None:
+            keep &= a['week_volatility'][lo:hi] >= min_volatility
+        if max_volatility is not None:
+            keep &= a['week_volatility'][lo:hi] <= max_volatility
+        if final is not None:
+            if final not in FINAL_DIRECTIONS:
+                raise ValueError(f"Unknown final direction: {final}")
+            keep &= np.sign(final_change) == FINAL_DIRECTIONS[final]
+
+        final_change = final_change[keep]
+        weeks = len(final_change)
+        ended_positive = int((final_change > 0).sum())
+        ended_negative = int((final_change < 0).sum())
+        result = {
+            'weeks': weeks,
+            'ended_positive': ended_positive,
+            'ended_negative': ended_negative,
+            'ended_flat': weeks - ended_positive - ended_negative,
+            'positive_ratio': _ratio(ended_positive, weeks),
+            'negative_ratio': _ratio(ended_negative, weeks),
+            'avg_final_change': _ratio(float(final_change.sum()), weeks)
+        }
+        if limit:
+            starts = a['week_start'][lo:hi][keep][::-1][:limit]
+            result['week_starts'] = np.datetime_as_string(starts, unit='D').tolist()
+        return result
@@ -0,0 +1,149 @@
+import contextlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(digest, version):
+    """Cache key for an upload: the SHA-256 hex digest of its bytes plus the analyzer version."""
+    return f"{digest}:{version}"
+
+
+class ResultCache:
+    """
+    Two-tier cache of serialized analysis results.
+
+    The in-memory tier is an LRU bounded by `maxsize` entries. The optional
+    disk tier is a SQLite database bounded by `disk_maxsize` entries. Entries
+    older than `max_age` seconds are treated as missing in both tiers.
+    """
+
+    def __init__(self, maxsize=64, max_age=None, db_path=None, disk_maxsize=1000):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self.db_path = db_path
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (created, body)
+        self._lock = threading.Lock()
+
+        if self.db_path:
+            self._init_db()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection for one transaction, committed on success and closed either way."""
+        # A connection's own context manager only ends the transaction, it does not close it
+        with contextlib.closing(sqlite3.connect(self.db_path, timeout=5)) as conn:
+            with conn:
+                yield conn
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, created REAL, accessed REAL, body BLOB)'
+            )
+
+    def _expired(self, created, now):
+        return self.max_age is not None and now - created > self.max_age
+
+    def get(self, key):
+        """Return the cached body for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, body = entry
+                if not self._expired(created, now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                del self._entries[key]
+
+        if self.db_path:
+            try:
+                body = self._disk_get(key, now)
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disk read failed: {str(e)}")
+                body = None
+            if body is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._memory_put(key, now, body)
+                return body
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, body):
+        """Store a serialized result in both tiers."""
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, now, body)
+
+        if self.db_path:
+            try:
+                self._disk_put(key, now, body)
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disk write failed: {str(e)}")
+
+    def _memory_put(self, key, created, body):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (created, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key, now):
+        with self._connect() as conn:
+            row = conn.execute('SELECT created, body FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            created, body = row
+            if self._expired(created, now):
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            return bytes(body)
+
+    def _disk_put(self, key, now, body):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, created, accessed, body) VALUES (?, ?, ?, ?)',
+                (key, now, now, body)
+            )
+            # Age-based eviction, then drop the least recently used entries over the limit
+            if self.max_age is not None:
+                conn.execute('DELETE FROM results WHERE created < ?', (now - self.max_age,))
+            conn.execute(
+                'DELETE FROM results WHERE key IN ('
+                'SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+                (self.disk_maxsize,)
+            )
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses
+            }
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    stats['disk_size'] = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            except sqlite3.Error as e:
+                logger.warning(f"Result cache disk stats failed: {str(e)}")
+        return stats
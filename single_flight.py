@@ -0,0 +1,93 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCallError(RuntimeError):
+    """Raised to callers that waited for a call that failed; the call's own exception is the cause."""
+
+
+class _Flight:
+    """One in-flight call, shared by every caller of its key until it finishes."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one.
+
+    The first caller of a key runs the function; callers arriving while it
+    runs wait for it and get its result instead of running it again. If it
+    raises, each waiter gets its own SharedCallError with the same message,
+    caused by that exception. A waiter that has not been answered after
+    `timeout` seconds stops waiting and runs the function itself. Only calls
+    in the same process are coalesced.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs), or wait for the call already running for `key`.
+
+        Returns:
+            Tuple of (result, whether it came from another caller's call)
+        Raises:
+            SharedCallError: If the call this caller waited for raised
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                flight.waiters += 1
+
+        if leader:
+            try:
+                flight.result = fn(*args, **kwargs)
+            except Exception as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+            return flight.result, False
+
+        if not flight.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+                self.calls += 1
+            logger.warning(f"Gave up waiting for {key} after {self.timeout}s, running it again")
+            return fn(*args, **kwargs), False
+
+        with self._lock:
+            self.coalesced += 1
+        if flight.error is not None:
+            # A new exception per waiter: the leader's is shared and must not be re-raised across threads
+            raise SharedCallError(str(flight.error)) from flight.error
+        return flight.result, True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'waiting': sum(flight.waiters for flight in self._flights.values()),
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'timeouts': self.timeouts
+            }
@@ -0,0 +1,108 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from incremental import daily_from_sums
+from weekly_analyzer import WeeklyAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+class StreamOrderError(ValueError):
+    """Raised when streamed rows are not in the expected order, so weeks cannot be closed as they arrive."""
+
+
+class DailyTotals:
+    """Running counts and sums of positive and negative Change % values."""
+
+    def __init__(self):
+        self.sums = {'positive_sum': 0, 'positive_count': 0, 'negative_sum': 0, 'negative_count': 0}
+
+    def add(self, positive_changes, negative_changes):
+        # Summing onto the running total keeps the order of a single sum() over all values
+        self.sums['positive_sum'] = sum(positive_changes, self.sums['positive_sum'])
+        self.sums['positive_count'] += len(positive_changes)
+        self.sums['negative_sum'] = sum(negative_changes, self.sums['negative_sum'])
+        self.sums['negative_count'] += len(negative_changes)
+
+    def results(self):
+        return daily_from_sums(self.sums)
+
+
+class WeekStream:
+    """
+    Weekly analysis of normalized rows fed in chunks, newest first or oldest first.
+
+    Every week that is complete once a chunk arrives is analyzed right away,
+    so only the rows of the open week (plus, oldest first, the row before
+    it) are kept between chunks. The results are the same as analyzing all
+    rows at once. A chunk out of order raises StreamOrderError.
+
+    Args:
+        newest_first: Order the chunks arrive in
+    """
+
+    def __init__(self, newest_first=True):
+        self.newest_first = newest_first
+        self.weekly_results = []  # Newest first when the chunks are; oldest first otherwise until finish()
+        self._pending = None  # Rows of the open week, newest first
+
+    def feed(self, df):
+        """Add normalized rows, as returned by WeeklyAnalyzer.prepare_frame."""
+        if df.empty:
+            return
+        if not self.newest_first:
+            self._feed_oldest_first(df)
+            return
+        if self._pending is None or self._pending.empty:
+            frame = df
+        else:
+            if df['Date'].iloc[0] > self._pending['Date'].iloc[-1]:
+                raise StreamOrderError("Rows are not sorted newest first")
+            frame = pd.concat([self._pending, df], ignore_index=True)
+
+        analyzer = WeeklyAnalyzer()
+        week_ids = analyzer._assign_weeks(frame)
+        open_start = int(np.flatnonzero(week_ids == week_ids[-1])[0])
+        if open_start > 0:
+            # The newest row of the open week gives the previous close of the last complete week
+            complete = frame.iloc[:open_start + 1]
+            self.weekly_results.extend(analyzer.week_results(complete))
+        self._pending = frame.iloc[open_start:].reset_index(drop=True)
+
+    def _feed_oldest_first(self, df):
+        # Chunks are normalized newest first within themselves
+        if self._pending is None:
+            frame = df
+        else:
+            if df['Date'].iloc[-1] < self._pending['Date'].iloc[0]:
+                raise StreamOrderError("Rows are not sorted oldest first")
+            frame = pd.concat([df, self._pending], ignore_index=True)
+
+        analyzer = WeeklyAnalyzer()
+        week_ids = analyzer._assign_weeks(frame)
+        open_end = int(np.flatnonzero(week_ids == 0)[-1]) + 1
+        if open_end < len(frame):
+            # The pending row before the weeks completed by the last chunk, if any,
+            # gives their previous close; alone in its week, it is not analyzed again
+            complete = frame.iloc[open_end:]
+            self.weekly_results.extend(analyzer.week_results(complete)[::-1])
+        # Keep the newest row of the last complete week for the previous close of the open week
+        self._pending = frame.iloc[:open_end + 1].reset_index(drop=True)
+
+    def finish(self):
+        """Analyze the remaining rows and return the weekly results, newest first."""
+        if self._pending is not None and not self._pending.empty:
+            results = WeeklyAnalyzer().week_results(self._pending)
+            self.weekly_results.extend(results if self.newest_first else results[::-1])
+            self._pending = None
+        if not self.newest_first:
+            self.weekly_results.reverse()
+
+        if not self.weekly_results:
+            logger.warning("No complete weeks found in the data")
+        return {
+            'weekly_results': self.weekly_results,
+            'total_weeks': len(self.weekly_results)
+        }
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The Flask app module, with its dataset store and result cache in a temporary directory."""
+    import app
+    from dataset_store import DatasetStore
+    from result_cache import ResultCache
+
+    monkeypatch.setattr(app, 'dataset_store', DatasetStore(str(tmp_path / 'datasets')))
+    monkeypatch.setattr(app, 'result_cache', ResultCache(maxsize=64))
+    monkeypatch.setitem(app.app.config, 'DATASET_STORE', True)
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
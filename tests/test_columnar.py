@@ -0,0 +1,69 @@
+import json
+import math
+
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from columnar import PROGRESS_VALUES, WEEK_DAYS, WEEK_VALUES, epoch_days, streak_mask, to_columnar
+from weekdays import STREAK_DIRECTIONS
+from weekly_analyzer import WeeklyAnalyzer
+
+
+@pytest.fixture
+def results():
+    weekly = WeeklyAnalyzer().process_table_data([HEADER] + generate_rows(200, seed=4))
+    return {'daily': {'positive_count': 3}, 'weekly': weekly}
+
+
+def _plain(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+
+def test_epoch_days_and_streak_masks():
+    assert epoch_days('1970-01-01') == 0
+    assert epoch_days('2024-03-04') == 19786
+    assert streak_mask('Monday-Tuesday') == 3
+    assert streak_mask('Wednesday-Thursday-Friday') == 28
+    assert streak_mask(None) == 0
+
+
+def test_columnar_results_hold_every_week(results):
+    columnar = to_columnar(results)
+
+    assert columnar['format'] == 'columnar'
+    assert columnar['daily'] == results['daily']
+    day_names = columnar['day_names']
+    weekly = columnar['weekly']
+    weeks = results['weekly']['weekly_results']
+    assert weekly['total_weeks'] == len(weeks)
+    columns = weekly['weeks']
+    for i, week in enumerate(weeks):
+        assert columns['week_start'][i] == epoch_days(week['week_start'])
+        assert columns['week_end'][i] == epoch_days(week['week_end'])
+        for field in WEEK_VALUES:
+            assert columns[field][i] == _plain(week[field]), field
+        for field in WEEK_DAYS:
+            code = columns[field][i]
+            assert (None if code is None else day_names[code]) == week[field], field
+        streak = week['longest_streak']
+        assert STREAK_DIRECTIONS[columns['longest_streak_direction'][i]] == streak['direction']
+        assert columns['longest_streak_count'][i] == streak['count']
+        assert columns['longest_streak_days'][i] == streak_mask(streak['days'])
+        assert day_names[columns['max_volatility_day'][i]] == week['max_volatility']['day']
+        assert columns['highest_point_value'][i] == _plain(week['highest_point']['value'])
+
+    progress = [day for week in weeks for day in week['daily_progress']]
+    assert len(weekly['daily_progress']['date']) == len(progress) == 5 * len(weeks)
+    for field in PROGRESS_VALUES:
+        assert weekly['daily_progress'][field] == [_plain(day[field]) for day in progress], field
+
+
+def test_columnar_results_are_strict_json(results):
+    results['weekly']['weekly_results'][0]['avg_negative'] = float('nan')
+    results['weekly']['weekly_results'][0]['daily_progress'][0]['change'] = float('inf')
+
+    columnar = to_columnar(results)
+
+    json.dumps(columnar, allow_nan=False)
+    assert columnar['weekly']['weeks']['avg_negative'][0] is None
+    assert columnar['weekly']['daily_progress']['change'][0] is None
@@ -0,0 +1,63 @@
+import gzip
+
+import pytest
+from werkzeug.http import parse_accept_header
+
+import compression
+from compression import choose_encoding, compress
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('gzip, deflate', 'gzip'),
+    ('*', 'gzip'),
+    ('identity', None),
+    ('', None),
+    ('gzip;q=0', None)
+])
+def test_gzip_is_chosen_when_accepted(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', None)
+
+    assert choose_encoding(parse_accept_header(header)) == expected
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('br, gzip', 'br'),
+    ('gzip, br;q=0.5', 'gzip'),
+    ('br', 'br'),
+    ('deflate', None)
+])
+def test_brotli_is_preferred_when_available(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', object())
+
+    assert choose_encoding(parse_accept_header(header)) == expected
+
+
+def test_gzip_output_is_deterministic():
+    data = b'{"weekly": []}' * 500
+
+    compressed = compress(data, 'gzip')
+
+    assert gzip.decompress(compressed) == data
+    assert compress(data, 'gzip') == compressed
+    assert len(compress(data, 'gzip', level=9)) <= len(compress(data, 'gzip', level=1))
+
+
+def test_brotli_output_decompresses():
+    brotli = pytest.importorskip('brotli')
+    data = b'{"weekly": []}' * 500
+
+    assert brotli.decompress(compress(data, 'br', level=9)) == data
+
+
+def test_large_responses_are_compressed(app_module, client, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    monkeypatch.setitem(app_module.app.config, 'COMPRESS_MIN_SIZE', 10)
+
+    compressed = client.get('/stats', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/stats')
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert 'Content-Encoding' not in plain.headers
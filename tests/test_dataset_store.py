@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from dataset_store import DatasetStore
+from weekly_analyzer import WeeklyAnalyzer
+
+DATASET_ID = 'd' * 64
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(str(tmp_path / 'datasets'))
+
+
+def _frame(count, seed=1):
+    return WeeklyAnalyzer().prepare_frame([HEADER] + generate_rows(count, seed=seed))
+
+
+def _index(columns):
+    return {'close': np.asarray(columns['Close']) * 2}
+
+
+def test_summary_and_index_are_stored_with_the_rows(store):
+    df = _frame(30)
+
+    store.save(DATASET_ID, df, {'total_weeks': 5}, _index)
+
+    assert os.listdir(store.root) == [DATASET_ID]
+    assert store.load_summary(DATASET_ID) == {'total_weeks': 5}
+    assert store.load_index(DATASET_ID)['close'].tolist() == (df['Close'][::-1] * 2).tolist()
+    assert store.load(DATASET_ID)['Date'].tolist() == df['Date'].tolist()
+
+
+def test_a_failed_commit_keeps_the_stored_dataset(store):
+    store.save(DATASET_ID, _frame(30), {'total_weeks': 5}, _index)
+
+    def broken_index(columns):
+        raise RuntimeError('index failed')
+
+    with pytest.raises(RuntimeError):
+        store.save(DATASET_ID, _frame(40, seed=2), {'total_weeks': 7}, broken_index)
+
+    assert os.listdir(store.root) == [DATASET_ID]
+    assert store.meta(DATASET_ID)['rows'] == 30
+    assert store.load_summary(DATASET_ID) == {'total_weeks': 5}
+
+
+def test_a_new_commit_replaces_the_dataset(store):
+    store.save(DATASET_ID, _frame(30), {'total_weeks': 5}, _index)
+
+    store.save(DATASET_ID, _frame(40, seed=2))
+
+    assert os.listdir(store.root) == [DATASET_ID]
+    assert store.meta(DATASET_ID)['rows'] == 40
+    assert store.load_summary(DATASET_ID) is None and store.load_index(DATASET_ID) is None
+
+
+@pytest.mark.parametrize('newest_first', [True, False])
+def test_chunks_are_joined_oldest_first(store, newest_first):
+    df = _frame(50)
+    chunks = [df.iloc[start:start + 9] for start in range(0, len(df), 9)]
+    writer = store.writer(DATASET_ID, newest_first)
+    for chunk in chunks if newest_first else chunks[::-1]:
+        writer.append(chunk)
+    meta = writer.commit()
+
+    assert store.load(DATASET_ID)['Date'].tolist() == df['Date'].tolist()
+    assert (meta['first_date'], meta['last_date']) == (str(df['Date'].iloc[-1].date()), str(df['Date'].iloc[0].date()))
+
+
+@pytest.mark.parametrize('newest_first', [True, False])
+def test_chunks_out_of_order_raise(store, newest_first):
+    df = _frame(30)
+    writer = store.writer(DATASET_ID, newest_first)
+    writer.append(df.iloc[10:20])
+
+    with pytest.raises(ValueError):
+        writer.append(df.iloc[:10] if newest_first else df.iloc[20:])
+    writer.abort()
@@ -0,0 +1,71 @@
+import csv
+import io
+import time
+
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from weekly_analyzer import WeeklyAnalyzer
+
+DATASET_ID = 'e' * 64
+
+
+def _csv(rows):
+    upload = io.StringIO()
+    csv.writer(upload).writerows([HEADER] + rows)
+    return io.BytesIO(upload.getvalue().encode())
+
+
+@pytest.fixture
+def dataset(app_module):
+    app_module.dataset_store.save(DATASET_ID, WeeklyAnalyzer().prepare_frame([HEADER] + generate_rows(60, seed=6)))
+    return DATASET_ID
+
+
+def test_uploads_have_no_etag(client):
+    response = client.post('/upload', data={'file': (_csv(generate_rows(60, seed=6)), 'export.csv')})
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+@pytest.mark.parametrize('path', ['', '/analyze', '/query/weekdays', '/query/weeks?limit=3', '/periods'])
+def test_dataset_resources_answer_if_none_match(client, dataset, path):
+    response = client.get(f'/datasets/{dataset}{path}')
+    etag = response.headers['ETag']
+
+    not_modified = client.get(f'/datasets/{dataset}{path}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200 and etag.startswith('W/')
+    assert not_modified.status_code == 304 and not_modified.get_data() == b''
+    assert not_modified.headers['ETag'] == etag
+
+
+def test_a_dataset_written_again_gets_a_new_etag(app_module, client, dataset):
+    etag = client.get(f'/datasets/{dataset}').headers['ETag']
+    time.sleep(0.01)
+    app_module.dataset_store.save(dataset, WeeklyAnalyzer().prepare_frame([HEADER] + generate_rows(60, seed=6)))
+
+    response = client.get(f'/datasets/{dataset}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_errors_and_unknown_datasets_have_no_etag(client, dataset):
+    assert 'ETag' not in client.get(f'/datasets/{dataset}/periods?period=year').headers
+    assert client.get(f'/datasets/{"f" * 64}', headers={'If-None-Match': '*'}).status_code == 404
+
+
+def test_finished_jobs_answer_if_none_match(client):
+    response = client.post('/upload?async=1', data={'file': (_csv(generate_rows(60, seed=6)), 'export.csv')})
+    status_url = response.headers['Location']
+    for _ in range(200):
+        response = client.get(status_url)
+        if response.get_json()['status'] == 'done':
+            break
+        assert 'ETag' not in response.headers
+        time.sleep(0.05)
+    etag = response.headers['ETag']
+
+    assert client.get(status_url, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(f'{status_url}?format=columnar', headers={'If-None-Match': etag}).status_code == 200
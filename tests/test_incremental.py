@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from incremental import append_rows, build_summary, new_rows, replace_weeks, tail_start
+from query_engine import QueryIndex
+from weekly_analyzer import WeeklyAnalyzer
+
+
+def _frame(rows):
+    return WeeklyAnalyzer().prepare_frame([HEADER] + rows).reset_index(drop=True)
+
+
+def _imported(rows):
+    """Rows and week results of a dataset imported from scratch."""
+    df = _frame(rows)
+    return df, WeeklyAnalyzer().process_frame(df)['weekly_results']
+
+
+def _append(stored, weekly_results, incoming):
+    """Append as the app does, passing append_rows only the stored rows from tail_start on."""
+    dates = stored['Date'][::-1].to_numpy(dtype='datetime64[D]')
+    new = new_rows(dates, incoming)
+    if new.empty:
+        return stored, weekly_results, 0
+    older = len(stored) - tail_start(dates, new)
+    merged, weeks, affected = append_rows(stored.iloc[:older], new)
+    merged = pd.concat([merged, stored.iloc[older:]], ignore_index=True)
+    return merged, replace_weeks(weekly_results, weeks, affected), len(new)
+
+
+def _assert_same_dataset(merged, weekly_results, rows):
+    expected, expected_weeks = _imported(rows)
+    pd.testing.assert_frame_equal(merged.reset_index(drop=True), expected)
+    # Dumped to JSON so NaN values compare equal
+    assert json.dumps(weekly_results) == json.dumps(expected_weeks)
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('new_days, overlap', [(1, 0), (3, 2), (7, 10), (40, 5)])
+def test_append_matches_a_full_reimport(seed, new_days, overlap):
+    rows = generate_rows(300, seed=seed)
+    stored, weeks = _imported(rows[new_days:])
+
+    merged, weeks, count = _append(stored, weeks, _frame(rows[:new_days + overlap]))
+
+    assert count == new_days
+    _assert_same_dataset(merged, weeks, rows)
+
+
+@pytest.mark.parametrize('missing', [[0], [5, 6], [120], [120, 121, 122, 123, 124], [298, 299]])
+def test_append_fills_gaps_in_stored_rows(missing):
+    rows = generate_rows(300, seed=7)
+    stored, weeks = _imported([row for index, row in enumerate(rows) if index not in missing])
+
+    merged, weeks, count = _append(stored, weeks, _frame(rows))
+
+    assert count == len(missing)
+    _assert_same_dataset(merged, weeks, rows)
+
+
+@pytest.mark.parametrize('week', [1, 10, 40])
+def test_append_of_a_week_last_day_reanalyzes_the_next_week(week):
+    rows = generate_rows(300, seed=7)
+    dates = _frame(rows)['Date']
+    # Newest-first positions of each week's last row: the next week's Monday close depends on it
+    last_days = dates.index[dates.dt.to_period('W') != dates.shift().dt.to_period('W')][1:]
+    missing = last_days[week]
+    stored, weeks = _imported(rows[:missing] + rows[missing + 1:])
+
+    merged, weeks, count = _append(stored, weeks, _frame(rows[missing:missing + 1]))
+
+    assert count == 1
+    _assert_same_dataset(merged, weeks, rows)
+
+
+def test_successive_appends_match_a_full_reimport():
+    rows = generate_rows(200, seed=11)
+    stored, weeks = _imported(rows[50:])
+    for start, stop in [(40, 55), (30, 45), (29, 31), (5, 30), (0, 6)]:
+        stored, weeks, _ = _append(stored, weeks, _frame(rows[start:stop]))
+
+    _assert_same_dataset(stored, weeks, rows)
+
+
+def test_only_rows_from_the_week_before_the_new_rows_are_needed():
+    rows = generate_rows(300, seed=3)
+    stored = _frame(rows[5:])
+    dates = stored['Date'][::-1].to_numpy(dtype='datetime64[D]')
+
+    start = tail_start(dates, new_rows(dates, _frame(rows[:8])))
+
+    monday = np.datetime64(_frame(rows[:5])['Date'].min().to_period('W').start_time, 'D')
+    assert 0 < start and dates[start] < monday and (dates[start + 1:] >= monday).all()
+
+
+def test_rows_already_stored_are_not_new():
+    rows = generate_rows(100, seed=1)
+    stored = _frame(rows[10:])
+    incoming = _frame(rows[:20] + rows[:3])
+
+    new = new_rows(stored['Date'], incoming)
+
+    assert new['Date'].tolist() == _frame(rows[:10])['Date'].tolist()
+
+
+def test_appended_datasets_get_their_own_id(app_module, client):
+    rows = generate_rows(300, seed=2)
+    stored, weeks = _imported(rows[12:])
+    dataset_id = 'a' * 64
+    app_module._store_dataset(dataset_id, stored, {'weekly': {'weekly_results': weeks}})
+    upload = io.StringIO()
+    csv.writer(upload).writerows([HEADER] + rows[:20])
+
+    response = client.post(f'/datasets/{dataset_id}/append',
+                           data={'file': (io.BytesIO(upload.getvalue().encode()), 'update.csv')})
+
+    body = response.get_json()
+    appended_id = body['dataset_id']
+    store = app_module.dataset_store
+    expected, expected_weeks = _imported(rows)
+    assert appended_id != dataset_id
+    assert store.meta(dataset_id)['rows'] == 288
+    assert (body['rows'], body['new_rows'], body['total_weeks']) == (300, 12, len(expected_weeks))
+    pd.testing.assert_frame_equal(store.load(appended_id), expected)
+    summary, expected_summary = store.load_summary(appended_id), build_summary(expected, expected_weeks)
+    assert summary['daily_sums'] == pytest.approx(expected_summary['daily_sums'])
+    assert summary['total_weeks'] == expected_summary['total_weeks']
+    fresh = QueryIndex.build(store.load_columns(appended_id), expected_weeks).arrays
+    patched = store.load_index(appended_id)
+    assert patched.keys() == fresh.keys()
+    for name, values in fresh.items():
+        np.testing.assert_array_equal(patched[name], values, err_msg=name)
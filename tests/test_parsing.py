@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows, write_csv
+from parsing import infer_decimal_separator, parse_numeric, split_changes
+from weekly_analyzer import WeeklyAnalyzer
+
+
+def _values(cells, kind='number', decimal=None):
+    return parse_numeric(cells, kind, decimal).values.tolist()
+
+
+def _european(rows):
+    """Rows with '.' thousands and ',' decimal separators."""
+    swap = str.maketrans(',.', '.,')
+    return [[row[0]] + [cell.translate(swap) for cell in row[1:]] for row in rows]
+
+
+@pytest.mark.parametrize('cells, expected', [
+    (['1.234,56', '12,5'], [1234.56, 12.5]),
+    (['1,234.56', '12.5'], [1234.56, 12.5]),
+    (['1.234.567', '7'], [1234567.0, 7.0]),
+    (['12.5', '1,234'], [12.5, 1234.0]),
+    (['12,50', '1.234'], [12.5, 1234.0]),
+    ([' 3 ', '−2.5'], [3.0, -2.5])
+])
+def test_numbers_follow_the_decimal_separator_of_the_column(cells, expected):
+    assert _values(cells) == expected
+
+
+def test_ambiguous_cells_are_read_with_the_given_separator():
+    assert _values(['1,234']) == [1234.0]
+    assert _values(['1,234'], decimal=',') == [1.234]
+    assert parse_numeric(['1,234']).decimal is None
+    assert parse_numeric(['1,234', '2,5']).decimal == ','
+    assert parse_numeric(['1,234'], decimal=',').decimal == ','
+
+
+@pytest.mark.parametrize('cells, decimal', [
+    (['1,234.56'], '.'), (['1.234,56'], ','), (['12.5'], '.'), (['12,5'], ','),
+    (['1,234'], None), (['1.234'], None), (['7', '-'], None)
+])
+def test_infer_decimal_separator(cells, decimal):
+    assert infer_decimal_separator(pd.Series(cells), default=None) == decimal
+
+
+def test_percentages_read_a_lone_separator_as_decimal():
+    assert _values(['1,234%', '-0.5 %', '2%'], 'percent') == [1.234, -0.5, 2.0]
+    assert _values(['1.234,5%', '1,234.5%'], 'percent', ',') == [1234.5, 1.2345]
+
+
+def test_volumes_take_suffixes():
+    assert _values(['1.5K', '2.25M', '3b', '700', '1,200K'], 'volume') == [1500.0, 2.25e6, 3e9, 700.0, 1.2e6]
+    assert _values(['2,5M', '1.200K'], 'volume') == [2.5e6, 1.2e6]
+
+
+def test_blanks_are_missing_and_junk_is_rejected():
+    parsed = parse_numeric(['', '-', 'n/a', None, 'abc', '1.5', '1.5x'])
+
+    assert np.isnan(parsed.values[:5]).all() and parsed.values[5] == 1.5
+    assert parsed.rejected.tolist() == ['abc', '1.5x']
+    assert parsed.rejected.index.tolist() == [4, 6]
+
+
+def test_split_changes():
+    positive, negative, rejected = split_changes(['1.5%', '-0,25%', '0%', '', 'x'])
+
+    assert positive == [1.5] and negative == [-0.25]
+    assert rejected.tolist() == ['x']
+
+
+def test_chunks_normalized_by_one_analyzer_match_the_whole_frame():
+    rows = _european(generate_rows(40, seed=3))
+    rows[5][3] = '1.005'  # High of 1005, or 1.005 if read on its own
+    whole = WeeklyAnalyzer().prepare_frame([HEADER] + rows)
+
+    analyzer = WeeklyAnalyzer()
+    chunks = [analyzer.prepare_frame([HEADER, row]) for row in rows]
+
+    assert whole.loc[5, 'High'] == 1005.0
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), whole)
+
+
+def test_streamed_spreadsheets_match_the_whole_file(app_module, tmp_path, monkeypatch):
+    rows = _european(generate_rows(40, seed=3))
+    rows[5][3] = '1.005'
+    path = tmp_path / 'export.csv'
+    write_csv(path, rows)
+
+    results = []
+    for chunk_rows in (1, 1000):
+        monkeypatch.setitem(app_module.app.config, 'SPREADSHEET_CHUNK_ROWS', chunk_rows)
+        results.append(app_module.process_spreadsheet(str(path)))
+
+    # Dumped to JSON so NaN values compare equal
+    assert json.dumps(results[0]) == json.dumps(results[1])
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from period_engine import analyze_periods, period_stats, rolling_stats
+from weekly_analyzer import WeeklyAnalyzer
+
+
+def _rows(dates, changes, close=None):
+    """Normalized rows, oldest first, with a 2% daily range."""
+    n = len(dates)
+    close = np.arange(100.0, 100.0 + n) if close is None else np.asarray(close, dtype=float)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(dates),
+        'Close': close,
+        'Open': close,
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Volume': 1.0,
+        'Change %': np.asarray(changes, dtype=float)
+    })
+
+
+def _columns(df):
+    df = df.sort_values('Date')
+    range_percent = ((df['High'] - df['Low']) / df['Low'] * 100).to_numpy()
+    return (df['Date'].to_numpy(dtype='datetime64[D]'), df['Change %'].to_numpy(dtype=float),
+            df['Close'].to_numpy(dtype=float), range_percent)
+
+
+def _longest_run(signs, direction):
+    longest = run = 0
+    for sign in signs:
+        run = run + 1 if sign == direction else 0
+        longest = max(longest, run)
+    return longest
+
+
+@pytest.fixture(scope='module')
+def export():
+    df = WeeklyAnalyzer().prepare_frame([HEADER] + generate_rows(400, seed=9))
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def test_flat_days_end_streaks():
+    # Monday-Friday: up, up, flat, up, up
+    df = _rows(pd.bdate_range('2024-01-08', periods=5), [1.0, 0.5, 0.0, 0.2, 0.3])
+
+    stats = period_stats(*_columns(df))
+
+    assert stats['longest_positive_streak'] == [2]
+    assert stats['longest_negative_streak'] == [0]
+    # Unlike the weekly analysis, where flat days do not break a streak
+    week = WeeklyAnalyzer().process_frame(df.iloc[::-1])['weekly_results'][0]
+    assert week['longest_streak']['count'] == 4
+
+
+def test_weeks_match_a_brute_force_grouping(export):
+    stats = period_stats(*_columns(export))
+
+    frame = export.assign(week=export['Date'].dt.to_period('W-SUN'))
+    prev_close = export['Close'].shift()
+    expected = []
+    for _, rows in frame.groupby('week'):
+        if len(rows) < 4:
+            continue
+        change = rows['Change %']
+        signs = np.sign(change).tolist()
+        expected.append({
+            'start': str(rows['week'].iloc[0].start_time.date()),
+            'days': len(rows),
+            'change': change.sum(),
+            'positive_days': int((change > 0).sum()),
+            'negative_days': int((change < 0).sum()),
+            'return_percent': (rows['Close'].iloc[-1] / prev_close[rows.index[0]] - 1) * 100,
+            'longest_positive_streak': _longest_run(signs, 1),
+            'longest_negative_streak': _longest_run(signs, -1)
+        })
+    # The oldest row has no previous close, so its week has no return
+    first_return = expected[0].pop('return_percent')
+
+    assert stats['start'] == [week['start'] for week in expected]
+    for column in expected[1]:
+        if column != 'start':
+            assert stats[column][1:] == pytest.approx([week[column] for week in expected[1:]]), column
+    assert stats['return_percent'][0] == (None if np.isnan(first_return) else pytest.approx(first_return))
+
+
+def test_weeks_can_start_on_another_day():
+    # Sunday-Thursday market; the Friday row is left out of its week
+    dates = pd.date_range('2024-01-07', '2024-01-19')
+    dates = dates[dates.weekday != 5]
+    df = _rows(dates, np.ones(len(dates)))
+
+    stats = period_stats(*_columns(df), week_start=6, trading_days=5)
+
+    assert stats['start'] == ['2024-01-07', '2024-01-14']
+    assert stats['days'] == [5, 5]
+    assert stats['first_date'] == ['2024-01-07', '2024-01-14']
+    assert stats['last_date'] == ['2024-01-11', '2024-01-18']
+    # The close of the left-out Friday is the previous close of the next week
+    assert stats['return_percent'][1] == pytest.approx((df['Close'].iloc[-2] / df['Close'].iloc[5] - 1) * 100)
+
+
+def test_months_and_min_days(export):
+    stats = period_stats(*_columns(export), period='month', min_days=15)
+
+    counts = export.groupby(export['Date'].dt.to_period('M')).size()
+    assert stats['start'] == [f'{month}-01' for month in counts[counts >= 15].index.astype(str)]
+    assert stats['days'] == counts[counts >= 15].tolist()
+
+
+@pytest.mark.parametrize('window', [1, 5, 20])
+def test_rolling_windows_match_a_brute_force_pass(export, window):
+    _, change, _, range_percent = _columns(export)
+
+    stats = rolling_stats(change, range_percent, windows=[window])[window]
+
+    assert all(value is None for value in stats['avg_change'][:window - 1])
+    for end in range(window - 1, len(change), 7):
+        days = change[end - window + 1:end + 1]
+        positive, negative = days[days > 0], days[days < 0]
+        signs = np.sign(days).tolist()
+        assert stats['avg_change'][end] == pytest.approx(days.mean())
+        assert stats['positive_ratio'][end] == pytest.approx(len(positive) / window)
+        assert stats['avg_positive'][end] == (pytest.approx(positive.mean()) if len(positive) else None)
+        assert stats['avg_negative'][end] == (pytest.approx(negative.mean()) if len(negative) else None)
+        assert stats['avg_range_percent'][end] == pytest.approx(range_percent[end - window + 1:end + 1].mean())
+        assert stats['longest_positive_streak'][end] == _longest_run(signs, 1)
+        assert stats['longest_negative_streak'][end] == _longest_run(signs, -1)
+
+
+def test_analyze_periods_accepts_rows_in_any_order(export):
+    oldest_first = analyze_periods(export, windows=[5])
+    newest_first = analyze_periods(export.iloc[::-1], windows=[5])
+
+    assert newest_first == oldest_first
+    assert oldest_first['week_start'] == 'Monday'
+    assert oldest_first['total_periods'] == len(oldest_first['periods']['start'])
+    assert len(oldest_first['rolling']['5']['avg_change']) == len(oldest_first['dates']) == len(export)
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'period': 'year'}, {'week_start': 7}, {'trading_days': 0}, {'trading_days': 8}, {'windows': [0]}
+])
+def test_invalid_settings_raise(export, kwargs):
+    with pytest.raises(ValueError):
+        analyze_periods(export, **kwargs)
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from query_engine import QueryIndex
+from weekdays import DAY_NAMES
+from weekly_analyzer import WeeklyAnalyzer
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    """Normalized rows, oldest first, and the query index built from them."""
+    analyzer = WeeklyAnalyzer()
+    df = analyzer.prepare_frame([HEADER] + generate_rows(600, seed=5))
+    weekly_results = analyzer.process_frame(df)['weekly_results']
+    df = df.iloc[::-1].reset_index(drop=True)
+    columns = {column: df[column].to_numpy() for column in df.columns}
+    return df, weekly_results, QueryIndex.build(columns, weekly_results)
+
+
+def _brute_force_weekdays(df, start=None, end=None, min_range=None, max_range=None):
+    """Per-weekday statistics, computed directly on the rows."""
+    if start:
+        df = df[df['Date'] >= start]
+    if end:
+        df = df[df['Date'] <= end]
+    range_percent = (df['High'] - df['Low']) / df['Low'] * 100
+    if min_range is not None or max_range is not None:
+        keep = np.isfinite(range_percent)
+        if min_range is not None:
+            keep &= range_percent >= min_range
+        if max_range is not None:
+            keep &= range_percent <= max_range
+        df, range_percent = df[keep], range_percent[keep]
+
+    stats = {}
+    for weekday, rows in df.groupby(df['Date'].dt.weekday):
+        change = rows['Change %']
+        stats[DAY_NAMES[weekday]] = {
+            'days': len(rows),
+            'avg_change': change.mean(),
+            'positive_days': int((change > 0).sum()),
+            'negative_days': int((change < 0).sum()),
+            'positive_ratio': (change > 0).mean(),
+            'avg_positive': change[change > 0].mean() if (change > 0).any() else 0,
+            'avg_negative': change[change < 0].mean() if (change < 0).any() else 0,
+            'avg_range_percent': range_percent[rows.index].mean()
+        }
+    return stats
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'start': '2023-03-01'},
+    {'end': '2023-06-30'},
+    {'start': '2023-02-14', 'end': '2024-02-15'},
+    {'min_range': 1.0},
+    {'max_range': 1.5},
+    {'start': '2023-05-01', 'end': '2024-05-31', 'min_range': 0.8, 'max_range': 2.0}
+])
+def test_weekdays_match_a_brute_force_count(dataset, filters):
+    df, _, index = dataset
+
+    stats = {day.pop('weekday'): day for day in index.weekdays(**filters)}
+
+    expected = _brute_force_weekdays(df, **filters)
+    assert stats.keys() == expected.keys()
+    for weekday, values in expected.items():
+        assert stats[weekday] == pytest.approx(values), weekday
+
+
+def test_weekdays_can_be_selected(dataset):
+    _, _, index = dataset
+
+    stats = index.weekdays(weekdays=[4, 0], start='2024-01-01')
+
+    assert [day['weekday'] for day in stats] == ['Friday', 'Monday']
+
+
+def test_weeks_are_bounded_by_their_start_dates(dataset):
+    _, weekly_results, index = dataset
+    starts = sorted(week['week_start'] for week in weekly_results)
+    start, end = starts[10], starts[30]
+
+    result = index.weeks(start=start, end=end, limit=100)
+
+    assert result['weeks'] == 21
+    assert result['week_starts'] == starts[10:31][::-1]
+    # Bounds between week starts only take the weeks starting inside them
+    day_after = str(np.datetime64(start) + 1)
+    assert index.weeks(start=day_after, end=end)['weeks'] == 20
+
+
+def test_weeks_report_how_matching_weeks_ended(dataset):
+    _, weekly_results, index = dataset
+
+    result = index.weeks(turned_negative_by=1, limit=3)
+
+    matching = [week for week in weekly_results
+                if week['turned_negative'] in ('Monday', 'Tuesday')]
+    assert result['weeks'] == len(matching)
+    assert result['ended_positive'] == sum(week['final_change'] > 0 for week in matching)
+    assert result['avg_final_change'] == pytest.approx(np.mean([week['final_change'] for week in matching]))
+    assert result['week_starts'] == sorted((week['week_start'] for week in matching), reverse=True)[:3]
+
+
+def test_weeks_reject_a_negative_limit(dataset):
+    _, _, index = dataset
+
+    with pytest.raises(ValueError, match='Limit'):
+        index.weeks(limit=-1)
+
+
+def test_weeks_endpoint_answers_400_to_a_negative_limit(app_module, client):
+    analyzer = WeeklyAnalyzer()
+    df = analyzer.prepare_frame([HEADER] + generate_rows(60, seed=2))
+    dataset_id = 'a' * 64
+    app_module.dataset_store.save(dataset_id, df)
+    app_module._save_query_index(dataset_id, analyzer.process_frame(df)['weekly_results'])
+
+    assert client.get(f'/datasets/{dataset_id}/query/weeks?limit=2').status_code == 200
+    response = client.get(f'/datasets/{dataset_id}/query/weeks?limit=-1')
+    assert response.status_code == 400
+    assert 'Limit' in response.get_json()['error']
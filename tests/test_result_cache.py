@@ -0,0 +1,115 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import result_cache
+from result_cache import ResultCache, content_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time the cache sees."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_cache, 'time', SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'results.sqlite3')
+
+
+def test_memory_tier_is_an_lru(clock):
+    cache = ResultCache(maxsize=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    cache.get('a')
+    cache.put('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1' and cache.get('c') == b'3'
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 3, 'disk_hits': 0, 'misses': 1}
+
+
+def test_disk_hits_are_promoted_to_memory(clock, db_path):
+    ResultCache(maxsize=2, db_path=db_path).put('a', b'1')
+    cache = ResultCache(maxsize=2, db_path=db_path)  # A new process: empty memory, same file
+
+    assert cache.get('a') == b'1'
+    assert cache.stats()['size'] == 1
+    assert cache.get('a') == b'1'
+    assert cache.stats() == {'size': 1, 'maxsize': 2, 'hits': 2, 'disk_hits': 1, 'misses': 0, 'disk_size': 1}
+
+
+def test_disk_tier_drops_the_least_recently_used(clock, db_path):
+    cache = ResultCache(maxsize=0, db_path=db_path, disk_maxsize=2)
+    cache.put('a', b'1')
+    clock.now += 1
+    cache.put('b', b'2')
+    clock.now += 1
+    cache.get('a')
+    clock.now += 1
+    cache.put('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1' and cache.get('c') == b'3'
+    assert cache.stats()['disk_size'] == 2
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_entries_expire_after_max_age(clock, db_path, on_disk):
+    cache = ResultCache(maxsize=0 if on_disk else 8, max_age=60, db_path=db_path if on_disk else None)
+    cache.put('a', b'1')
+
+    clock.now += 60
+    assert cache.get('a') == b'1'
+    clock.now += 1
+    assert cache.get('a') is None
+    if on_disk:
+        assert cache.stats()['disk_size'] == 0
+
+
+def test_keys_change_with_the_analyzer_version(clock, db_path):
+    cache = ResultCache(db_path=db_path)
+    cache.put(content_key('0' * 64, '3'), b'old')
+
+    assert cache.get(content_key('0' * 64, '4')) is None
+    assert cache.get(content_key('0' * 64, '3')) == b'old'
+
+
+def test_disk_connections_are_closed(clock, db_path, monkeypatch):
+    opened = []
+
+    class Connection(sqlite3.Connection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: connect(*args, factory=Connection, **kwargs))
+
+    cache = ResultCache(maxsize=0, max_age=60, db_path=db_path)
+    cache.put('a', b'1')
+    cache.get('a')
+    cache.get('missing')
+    clock.now += 61
+    cache.get('a')
+    cache.stats()
+
+    assert len(opened) == 6
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+
+def test_disk_errors_fall_back_to_memory(clock, tmp_path):
+    db_path = str(tmp_path / 'results.sqlite3')
+    cache = ResultCache(maxsize=8, db_path=db_path)
+    (tmp_path / 'results.sqlite3').unlink()
+    (tmp_path / 'results.sqlite3').mkdir()  # Unopenable from now on
+
+    cache.put('a', b'1')
+
+    assert cache.get('a') == b'1'
+    assert 'disk_size' not in cache.stats()
@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SharedCallError, SingleFlight
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def _run_concurrently(flights, key, fn, waiters):
+    """Start a leader running fn and `waiters` callers of the same key, wait for all; returns their outcomes."""
+    outcomes = [None] * (waiters + 1)
+
+    def call(index):
+        try:
+            outcomes[index] = flights.do(key, fn)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    _wait_for(lambda: flights.stats()['in_flight'] == 1)
+    for index in range(1, waiters + 1):
+        threads.append(threading.Thread(target=call, args=(index,)))
+        threads[-1].start()
+    return threads, outcomes
+
+
+def test_concurrent_calls_share_one_result():
+    flights = SingleFlight(timeout=5)
+    release = threading.Event()
+    calls = []
+
+    def analyze():
+        calls.append(1)
+        release.wait(5)
+        return {'weeks': 3}
+
+    threads, outcomes = _run_concurrently(flights, 'key', analyze, waiters=4)
+    _wait_for(lambda: flights.stats()['waiting'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert outcomes[0] == ({'weeks': 3}, False)
+    assert all(outcome == ({'weeks': 3}, True) for outcome in outcomes[1:])
+    assert all(outcome[0] is outcomes[0][0] for outcome in outcomes)
+    assert flights.stats() == {'in_flight': 0, 'waiting': 0, 'calls': 1, 'coalesced': 4, 'timeouts': 0}
+
+
+def test_finished_calls_are_not_reused():
+    flights = SingleFlight(timeout=5)
+    calls = []
+
+    assert flights.do('key', lambda: calls.append(1) or len(calls)) == (1, False)
+    assert flights.do('key', lambda: calls.append(1) or len(calls)) == (2, False)
+    assert flights.stats()['calls'] == 2
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight(timeout=5)
+    release = threading.Event()
+
+    threads, outcomes = _run_concurrently(flights, 'a', lambda: release.wait(5) and 'a', waiters=0)
+    assert flights.do('b', lambda: 'b') == ('b', False)
+    release.set()
+    threads[0].join()
+    assert outcomes[0] == ('a', False)
+
+
+def test_errors_reach_every_waiter():
+    flights = SingleFlight(timeout=5)
+    release = threading.Event()
+    error = ValueError('No /Root object')
+
+    def analyze():
+        release.wait(5)
+        raise error
+
+    threads, outcomes = _run_concurrently(flights, 'key', analyze, waiters=3)
+    _wait_for(lambda: flights.stats()['waiting'] == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes[0] is error
+    waiter_errors = outcomes[1:]
+    assert all(isinstance(e, SharedCallError) and e.__cause__ is error for e in waiter_errors)
+    assert all(str(e) == 'No /Root object' for e in waiter_errors)
+    assert len({id(e) for e in waiter_errors}) == 3
+    assert flights.stats()['in_flight'] == 0
+
+    # The failed call is forgotten: the next caller runs the function again
+    assert flights.do('key', lambda: 'ok') == ('ok', False)
+
+
+def test_waiters_run_the_call_themselves_after_the_timeout():
+    flights = SingleFlight(timeout=0.05)
+    release = threading.Event()
+    calls = []
+
+    def analyze():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            release.wait(5)
+        return len(calls)
+
+    threads, outcomes = _run_concurrently(flights, 'key', analyze, waiters=1)
+    threads[1].join()
+    release.set()
+    threads[0].join()
+
+    assert len(calls) == 2
+    assert outcomes[1] == (2, False)
+    assert outcomes[0][1] is False
+    assert flights.stats()['timeouts'] == 1
+    assert flights.stats()['coalesced'] == 0
+
+
+@pytest.mark.parametrize('timeout', [None, 5])
+def test_leader_exception_propagates_unchanged(timeout):
+    flights = SingleFlight(timeout=timeout)
+
+    with pytest.raises(KeyError):
+        flights.do('key', lambda: {}['missing'])
+    assert flights.stats()['in_flight'] == 0
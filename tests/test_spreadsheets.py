@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import random
+
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from weekly_analyzer import WeeklyAnalyzer
+
+VENDOR_HEADER = ['date', 'close', 'open', 'high', 'low', 'volume', 'change %']
+
+
+def _write(path, header, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _ordered(rows, order):
+    if order == 'oldest_first':
+        return rows[::-1]
+    if order == 'shuffled':
+        return random.Random(1).sample(rows, len(rows))
+    return rows
+
+
+@pytest.fixture
+def rows():
+    return generate_rows(90, seed=8)
+
+
+@pytest.fixture
+def expected(rows):
+    analyzer = WeeklyAnalyzer()
+    return analyzer.process_table_data([HEADER] + rows), analyzer.df
+
+
+@pytest.mark.parametrize('order', ['newest_first', 'oldest_first', 'shuffled'])
+def test_vendor_exports_are_analyzed_in_any_order(app_module, monkeypatch, tmp_path, rows, expected, order):
+    monkeypatch.setitem(app_module.app.config, 'SPREADSHEET_CHUNK_ROWS', 7)
+    path = tmp_path / 'export.csv'
+    _write(path, VENDOR_HEADER, _ordered(rows, order))
+
+    results = app_module.process_spreadsheet(str(path), dataset_id='b' * 64)
+
+    weekly, df = expected
+    # Dumped to JSON so NaN values compare equal
+    assert json.dumps(results['weekly']) == json.dumps(weekly)
+    change = df['Change %']
+    assert results['daily'] == pytest.approx({
+        'positive_count': (change > 0).sum(),
+        'negative_count': (change < 0).sum(),
+        'positive_avg': change[change > 0].mean(),
+        'negative_avg': change[change < 0].mean()
+    })
+    stored = app_module.dataset_store.load('b' * 64)
+    assert stored['Date'].tolist() == df['Date'].tolist()
+    assert stored['Close'].tolist() == df['Close'].tolist()
+
+
+def test_oldest_first_exports_are_streamed(app_module, monkeypatch, tmp_path, rows):
+    monkeypatch.setitem(app_module.app.config, 'SPREADSHEET_CHUNK_ROWS', 7)
+    path = tmp_path / 'export.csv'
+    _write(path, VENDOR_HEADER, rows[::-1])
+    sizes = []
+    spreadsheet_chunks = app_module._spreadsheet_chunks
+
+    def chunks(*args):
+        for cells, df in spreadsheet_chunks(*args):
+            sizes.append(len(df))
+            yield cells, df
+
+    monkeypatch.setattr(app_module, '_spreadsheet_chunks', chunks)
+    monkeypatch.setattr(app_module, 'read_spreadsheet_frame', None)  # Never read whole
+
+    app_module.process_spreadsheet(str(path))
+
+    assert max(sizes) == 7
+
+
+def test_vendor_exports_can_be_appended(app_module, client, monkeypatch, tmp_path, rows, expected):
+    monkeypatch.setitem(app_module.app.config, 'SPREADSHEET_CHUNK_ROWS', 7)
+    dataset_id = 'c' * 64
+    app_module.dataset_store.save(dataset_id, WeeklyAnalyzer().prepare_frame([HEADER] + rows[30:]))
+    upload = io.StringIO()
+    csv.writer(upload).writerows([VENDOR_HEADER] + rows[:40][::-1])
+
+    response = client.post(f'/datasets/{dataset_id}/append',
+                           data={'file': (io.BytesIO(upload.getvalue().encode()), 'update.csv')})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    weekly, df = expected
+    assert (body['new_rows'], body['total_weeks']) == (30, weekly['total_weeks'])
+    assert app_module.dataset_store.load(body['dataset_id'])['Date'].tolist() == df['Date'].tolist()
@@ -0,0 +1,88 @@
+import json
+import logging
+
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows
+from incremental import daily_sums
+from streaming import DailyTotals, StreamOrderError, WeekStream
+from weekly_analyzer import WeeklyAnalyzer
+
+
+def _frame(rows):
+    return WeeklyAnalyzer().prepare_frame([HEADER] + rows)
+
+
+def _split(rows, sizes):
+    """Consecutive slices of rows with the given sizes, repeated until the rows run out."""
+    chunks, start, index = [], 0, 0
+    while start < len(rows):
+        size = sizes[index % len(sizes)]
+        chunks.append(rows[start:start + size])
+        start += size
+        index += 1
+    return chunks
+
+
+@pytest.mark.parametrize('newest_first', [True, False])
+@pytest.mark.parametrize('sizes', [[1], [2, 3], [7], [13, 1, 4], [120]])
+def test_weeks_fed_in_chunks_match_the_whole_frame(sizes, newest_first):
+    rows = generate_rows(120, seed=4)
+    weeks = WeekStream(newest_first)
+    for chunk in _split(rows if newest_first else rows[::-1], sizes):
+        weeks.feed(_frame(chunk))
+
+    results = weeks.finish()
+
+    expected = WeeklyAnalyzer().process_frame(_frame(rows))
+    assert results['total_weeks'] == expected['total_weeks']
+    # Dumped to JSON so NaN values compare equal
+    assert json.dumps(results['weekly_results']) == json.dumps(expected['weekly_results'])
+
+
+def test_only_the_open_week_is_kept_between_chunks():
+    weeks = WeekStream()
+    for chunk in _split(generate_rows(100, seed=4), [9]):
+        weeks.feed(_frame(chunk))
+        assert len(weeks._pending) <= 5
+        assert weeks._pending['Date'].dt.to_period('W').nunique() == 1
+
+
+def test_oldest_first_streams_keep_one_row_before_the_open_week():
+    weeks = WeekStream(newest_first=False)
+    for chunk in _split(generate_rows(100, seed=4)[::-1], [9]):
+        weeks.feed(_frame(chunk))
+        assert len(weeks._pending) <= 6
+        assert weeks._pending['Date'].iloc[:-1].dt.to_period('W').nunique() == 1
+
+
+@pytest.mark.parametrize('newest_first', [True, False])
+def test_out_of_order_chunks_raise(newest_first):
+    rows = generate_rows(40, seed=4)
+    weeks = WeekStream(newest_first)
+    weeks.feed(_frame(rows[20:] if newest_first else rows[:20]))
+
+    with pytest.raises(StreamOrderError):
+        weeks.feed(_frame(rows[:20] if newest_first else rows[20:]))
+
+
+def test_missing_weeks_are_only_reported_at_the_end(caplog):
+    rows = generate_rows(3, seed=4)
+    weeks = WeekStream()
+    with caplog.at_level(logging.WARNING, logger='streaming'):
+        for chunk in _split(rows, [1]):
+            weeks.feed(_frame(chunk))
+        assert not caplog.records
+
+        assert weeks.finish() == {'weekly_results': [], 'total_weeks': 0}
+    assert [record.getMessage() for record in caplog.records] == ["No complete weeks found in the data"]
+
+
+def test_daily_totals_match_one_pass():
+    changes = _frame(generate_rows(300, seed=6))['Change %'].tolist()
+    totals = DailyTotals()
+    for start in range(0, len(changes), 17):
+        chunk = changes[start:start + 17]
+        totals.add([c for c in chunk if c > 0], [c for c in chunk if c < 0])
+
+    assert totals.sums == daily_sums(changes)
@@ -0,0 +1,89 @@
+import pdfplumber
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows, write_pdf
+from pdf_extractor import extract_page_tables, extract_text_tables, iter_page_tables, iter_table_rows
+
+
+def _rows(path, text_layer):
+    with pdfplumber.open(path) as pdf:
+        page_tables = iter_page_tables(pdf.pages, text_layer=text_layer)
+        return [[cell or '' for cell in row] for _, _, rows in iter_table_rows(page_tables) for row in rows]
+
+
+def _export(tmp_path, rows, pages=2, header_each_page=False):
+    path = str(tmp_path / 'export.pdf')
+    write_pdf(path, rows, pages, header_each_page)
+    return path
+
+
+@pytest.mark.parametrize('blank', [
+    [(0, 5)],  # Empty Vol. on the first row
+    [(59, 5)],  # Empty Vol. on the last row
+    [(29, 5), (30, 2)],  # Empty cells on both sides of a page break
+    [(10, 5), (11, 5), (12, 5)]
+])
+def test_text_layer_keeps_rows_with_blank_cells(tmp_path, blank):
+    rows = generate_rows(60, seed=3)
+    for row, column in blank:
+        rows[row][column] = ''
+    path = _export(tmp_path, rows)
+
+    assert _rows(path, text_layer=True) == _rows(path, text_layer=False) == rows
+
+
+@pytest.mark.parametrize('header_each_page', [False, True])
+def test_text_layer_matches_table_detection(tmp_path, header_each_page):
+    rows = generate_rows(200, seed=7)
+    path = _export(tmp_path, rows, pages=5, header_each_page=header_each_page)
+
+    with pdfplumber.open(path) as pdf:
+        columns = None
+        for page in pdf.pages:
+            tables, columns = extract_text_tables(page, columns)
+            assert tables is not None  # Read from the text layer, no fallback
+            assert tables == extract_page_tables(page)[0]
+    assert _rows(path, text_layer=True) == rows
+
+
+class FakePage:
+    """Stands in for a pdfplumber page: lines of (x0, text) words, one line per 20 points."""
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def extract_words(self):
+        words = []
+        for line_idx, line in enumerate(self.lines):
+            for x0, text in line:
+                words.append({'text': text, 'x0': x0, 'x1': x0 + 6 * len(text), 'top': 20 * line_idx})
+        return words
+
+
+def _line(cells):
+    return [(70 * index, cell) for index, cell in enumerate(cells) if cell]
+
+
+def test_text_layer_skips_page_furniture():
+    rows = generate_rows(3, seed=1)
+    rows[2][5] = ''
+    page = FakePage(
+        [[(0, 'Bitcoin'), (70, 'Historical'), (140, 'Data')], _line(HEADER)]
+        + [_line(row) for row in rows]
+        + [[(0, 'Page'), (30, '1'), (210, 'of'), (280, '3')]]
+    )
+
+    tables, _ = extract_text_tables(page)
+
+    assert tables == [[HEADER] + rows]
+
+
+def test_text_layer_falls_back_on_furniture_between_rows():
+    rows = generate_rows(4, seed=2)
+    page = FakePage(
+        [_line(HEADER)] + [_line(row) for row in rows[:2]]
+        + [[(0, 'Advertisement')]]
+        + [_line(row) for row in rows[2:]]
+    )
+
+    assert extract_text_tables(page)[0] is None
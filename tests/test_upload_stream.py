@@ -0,0 +1,81 @@
+import io
+import json
+
+import pytest
+
+from benchmarks.generate import HEADER, generate_rows, write_pdf
+from columnar import epoch_days
+from weekly_analyzer import WeeklyAnalyzer
+
+
+def _events(response):
+    events = []
+    for message in response.get_data(as_text=True).split('\n\n'):
+        if message:
+            event, data = message.split('\n', 1)
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def _post(client, content):
+    return client.post('/upload/stream', data={'file': (io.BytesIO(content), 'export.pdf')})
+
+
+def _streamed_week_starts(events):
+    """Start days of the weeks sent since the last reset, in the order sent."""
+    starts = []
+    for event, data in events:
+        if event == 'reset':
+            starts = []
+        elif event == 'weeks':
+            starts += data['weekly']['weeks']['week_start']
+    return starts
+
+
+@pytest.fixture
+def rows():
+    return generate_rows(120, seed=5)
+
+
+@pytest.mark.parametrize('oldest_first', [False, True])
+def test_events_of_an_upload(client, tmp_path, rows, oldest_first):
+    path = tmp_path / 'export.pdf'
+    write_pdf(path, rows[::-1] if oldest_first else rows, pages=4)
+    expected = WeeklyAnalyzer().process_table_data([HEADER] + rows)
+
+    response = _post(client, path.read_bytes())
+
+    events = _events(response)
+    names = [event for event, _ in events]
+    assert response.headers['X-Cache'] == 'MISS'
+    assert names[0] == 'start' and events[0][1] == {'pages': 4}
+    assert names[-1] == 'done' and 'error' not in names
+    pages = [data for event, data in events if event == 'page']
+    assert [page['page'] for page in pages[-4:]] == [1, 2, 3, 4]
+    assert pages[-1]['rows'] == 120
+    assert ('reset' in names) == oldest_first
+    done = events[-1][1]
+    assert done['total_weeks'] == expected['total_weeks'] and 'weekly' not in done
+    assert _streamed_week_starts(events) == [epoch_days(week['week_start']) for week in expected['weekly_results']]
+
+    cached = _events(_post(client, path.read_bytes()))
+
+    assert [event for event, _ in cached] == ['start', 'weeks', 'done']
+    assert cached[-1][1] == done
+
+
+def test_weeks_are_sent_before_the_last_page(client, tmp_path, rows):
+    path = tmp_path / 'export.pdf'
+    write_pdf(path, rows, pages=4)
+
+    names = [event for event, _ in _events(_post(client, path.read_bytes()))]
+
+    assert names.index('weeks') < max(index for index, name in enumerate(names) if name == 'page')
+
+
+def test_errors_end_the_stream_with_an_error_event(client):
+    events = _events(_post(client, b'%PDF-1.4 not really a PDF'))
+
+    assert events[-1][0] == 'error'
+    assert events[-1][1]['error'].startswith('Error processing PDF: ')
+    assert 'done' not in [event for event, _ in events]
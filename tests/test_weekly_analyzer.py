@@ -0,0 +1,202 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from weekly_analyzer import WEEKDAYS, WeeklyAnalyzer
+
+
+def _baseline_week(week_data):
+    """One week's result, computed row by row as the analyzer did before it was vectorized."""
+    week_data = sorted(week_data, key=lambda row: row['Date'])
+    week_start = min(row['Date'] for row in week_data)
+    max_volatility = max(
+        ((row['day_of_week'], row['Range_Percent'], row['Price_Range']) for row in week_data),
+        key=lambda item: item[1]
+    )
+
+    complete_week = {}
+    for number, day_name in enumerate(WEEKDAYS):
+        day_data = next((row for row in week_data if row['day_of_week'] == day_name), None)
+        if day_data is not None:
+            complete_week[day_name] = {
+                'change': day_data['Change %'], 'date': day_data['Date'], 'is_market_closed': False,
+                'price_range': day_data['Price_Range'], 'range_percent': day_data['Range_Percent'],
+                'high_change': day_data['High_Change_Percent'], 'low_change': day_data['Low_Change_Percent'],
+                'high': day_data['High'], 'low': day_data['Low']
+            }
+        else:
+            complete_week[day_name] = {
+                'change': 0.0, 'date': week_start + timedelta(days=number - week_start.weekday()),
+                'is_market_closed': True, 'price_range': 0.0, 'range_percent': 0.0,
+                'high_change': 0.0, 'low_change': 0.0, 'high': 0.0, 'low': 0.0
+            }
+
+    cumulative = 0.0
+    daily_progress = []
+    current_streak = {'direction': None, 'count': 0, 'days': []}
+    longest_streak = {'direction': None, 'count': 0, 'days': []}
+    highest_point = {'value': float('-inf'), 'day': None}
+    turned_positive = turned_negative = None
+    for day in WEEKDAYS:
+        data = complete_week[day]
+        change = data['change']
+        cumulative += change
+        daily_progress.append({
+            'day': day,
+            'date': data['date'].strftime('%Y-%m-%d'),
+            'change': change,
+            'cumulative': cumulative,
+            'arrow': '↑' if change > 0 else '↓' if change < 0 else '→',
+            **{key: data[key] for key in ('is_market_closed', 'price_range', 'range_percent',
+                                          'high_change', 'low_change', 'high', 'low')}
+        })
+        if cumulative > highest_point['value']:
+            highest_point = {'value': cumulative, 'day': day}
+        if turned_positive is None and cumulative > 0:
+            turned_positive = day
+        if turned_negative is None and cumulative < 0:
+            turned_negative = day
+        if not data['is_market_closed']:
+            direction = 'positive' if change > 0 else 'negative' if change < 0 else None
+            if direction:
+                if current_streak['direction'] == direction:
+                    current_streak['count'] += 1
+                    current_streak['days'].append(day)
+                else:
+                    if current_streak['count'] > longest_streak['count']:
+                        longest_streak = current_streak.copy()
+                    current_streak = {'direction': direction, 'count': 1, 'days': [day]}
+    if current_streak['count'] > longest_streak['count']:
+        longest_streak = current_streak
+
+    changes = [row['Change %'] for row in week_data]
+    positive_changes = [c for c in changes if c > 0]
+    negative_changes = [c for c in changes if c < 0]
+    day_changes = [(row['day_of_week'], row['Change %']) for row in week_data]
+    max_positive = max(((day, c) for day, c in day_changes if c > 0), default=(None, 0))
+    max_negative = min(((day, c) for day, c in day_changes if c < 0), key=lambda x: x[1], default=(None, 0))
+
+    return {
+        'week_start': week_start.strftime('%Y-%m-%d'),
+        'week_end': max(row['Date'] for row in week_data).strftime('%Y-%m-%d'),
+        'avg_positive': sum(positive_changes) / len(positive_changes) if positive_changes else 0,
+        'avg_negative': sum(negative_changes) / len(negative_changes) if negative_changes else 0,
+        'max_positive_day': max_positive[0],
+        'max_positive_value': max_positive[1],
+        'max_negative_day': max_negative[0],
+        'max_negative_value': max_negative[1],
+        'days_in_week': len(week_data),
+        'daily_progress': daily_progress,
+        'final_change': cumulative,
+        'highest_point': highest_point,
+        'turned_positive': turned_positive,
+        'turned_negative': turned_negative,
+        'longest_streak': {
+            'direction': longest_streak['direction'],
+            'count': longest_streak['count'],
+            'days': '-'.join(longest_streak['days']) if longest_streak['days'] else None
+        },
+        'max_volatility': {
+            'day': max_volatility[0],
+            'range_percent': max_volatility[1],
+            'price_range': max_volatility[2]
+        }
+    }
+
+
+def _baseline_weeks(df):
+    """Week results of normalized rows, newest first, with the original row-by-row loop."""
+    df = df.copy()
+    df['Prev_Close'] = df['Close'].shift(-1)
+    df['day_of_week'] = df['Date'].dt.day_name()
+    df['Price_Range'] = df['High'] - df['Low']
+    df['Range_Percent'] = (df['Price_Range'] / df['Low']) * 100
+    df['High_Change_Percent'] = ((df['High'] - df['Prev_Close']) / df['Prev_Close']) * 100
+    df['Low_Change_Percent'] = ((df['Low'] - df['Prev_Close']) / df['Prev_Close']) * 100
+
+    weekly_results = []
+    current_week = []
+    week_start = None
+    for _, row in df.iterrows():
+        if week_start is None:
+            week_start = row['Date'] - timedelta(days=row['Date'].weekday())
+        if week_start <= row['Date'] < week_start + timedelta(days=5):
+            current_week.append(row)
+        else:
+            if len(current_week) >= 4:
+                weekly_results.append(_baseline_week(current_week))
+            current_week = [row]
+            week_start = row['Date'] - timedelta(days=row['Date'].weekday())
+    if len(current_week) >= 4:
+        weekly_results.append(_baseline_week(current_week))
+    return weekly_results
+
+
+def _random_frame(seed, rows=400):
+    """Normalized rows, newest first, with holidays, weekend sessions, flat days and zero lows."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-01-05', periods=rows * 2)
+    keep = rng.random(len(dates)) > 0.15  # Holidays
+    dates = dates[keep][:rows]
+    weekend = pd.DatetimeIndex(rng.choice(dates, size=rows // 40, replace=False)) + pd.Timedelta(days=5)
+    dates = dates.union(weekend)[:rows]
+    n = len(dates)
+
+    close = 100 + rng.normal(0, 2, n).cumsum()
+    change = np.round(rng.normal(0, 1, n), 2)
+    change[rng.random(n) < 0.1] = 0.0
+    low = close - rng.random(n) * 2
+    low[rng.random(n) < 0.02] = 0.0
+    df = pd.DataFrame({
+        'Date': dates,
+        'Close': close,
+        'Open': close + rng.normal(0, 1, n),
+        'High': close + rng.random(n) * 2,
+        'Low': low,
+        'Volume': rng.random(n) * 1e6,
+        'Change %': change
+    })
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def _assert_same(actual, expected, path='result'):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for key in expected:
+            _assert_same(actual[key], expected[key], f'{path}.{key}')
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for index, (a, e) in enumerate(zip(actual, expected)):
+            _assert_same(a, e, f'{path}[{index}]')
+    elif isinstance(expected, float) and math.isnan(expected):
+        assert isinstance(actual, float) and math.isnan(actual), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_vectorized_weeks_match_the_row_by_row_baseline(seed):
+    df = _random_frame(seed)
+
+    results = WeeklyAnalyzer().process_frame(df)
+
+    expected = _baseline_weeks(df)
+    assert results['total_weeks'] == len(expected) > 0
+    _assert_same(results['weekly_results'], expected)
+
+
+def test_short_weeks_are_skipped():
+    dates = pd.to_datetime(['2024-01-12', '2024-01-11', '2024-01-10', '2024-01-05', '2024-01-04',
+                            '2024-01-03', '2024-01-02'])
+    df = pd.DataFrame({
+        'Date': dates, 'Close': 10.0, 'Open': 10.0, 'High': 11.0, 'Low': 9.0, 'Volume': 1.0,
+        'Change %': [1.0, -1.0, 0.5, 0.2, -0.3, 0.0, 0.4]
+    })
+
+    results = WeeklyAnalyzer().process_frame(df)
+
+    assert [week['week_start'] for week in results['weekly_results']] == ['2024-01-02']
+    _assert_same(results['weekly_results'], _baseline_weeks(df))
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+import pytest
+
+import worker_pool
+from benchmarks.generate import HEADER, generate_rows, write_pdf
+from result_cache import ResultCache
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(worker_pool, 'max_workers', 2)
+    yield
+    worker_pool.shutdown()
+
+
+def test_parallel_extraction_matches_serial(app_module, monkeypatch, tmp_path, pool):
+    monkeypatch.setitem(app_module.app.config, 'PDF_PARALLEL_MIN_PAGES', 1)
+    path = tmp_path / 'export.pdf'
+    write_pdf(path, generate_rows(150, seed=9), pages=6)
+
+    serial = app_module.extract_pdf_rows(str(path), workers=1)
+    parallel = app_module.extract_pdf_rows(str(path), workers=3)
+    with open(path, 'rb') as f:
+        from_bytes = app_module.extract_pdf_rows(io.BytesIO(f.read()), workers=4)
+
+    assert serial[0][0] == HEADER and len(serial[0]) == 151
+    assert parallel == serial
+    assert from_bytes == serial
+
+
+def test_requests_share_one_pool(pool):
+    assert worker_pool.shared_pool() is worker_pool.shared_pool()
+    assert worker_pool.shared_pool()._mp_context.get_start_method() in ('forkserver', 'spawn')
+
+
+def test_parallel_batches_match_serial(app_module, client, monkeypatch, pool):
+    # Worker processes read their configuration from the environment, where the dataset store is off
+    monkeypatch.setitem(app_module.app.config, 'DATASET_STORE', False)
+
+    def post():
+        files = []
+        for seed in range(3):
+            upload = io.StringIO()
+            csv.writer(upload).writerows([HEADER] + generate_rows(40, seed=seed))
+            files.append((io.BytesIO(upload.getvalue().encode()), f'export{seed}.csv'))
+        monkeypatch.setattr(app_module, 'result_cache', ResultCache(maxsize=64))
+        return client.post('/upload/batch', data={'files': files}).get_data(as_text=True)
+
+    monkeypatch.setitem(app_module.app.config, 'BATCH_WORKERS', 1)
+    serial = post()
+    monkeypatch.setitem(app_module.app.config, 'BATCH_WORKERS', 2)
+    parallel = post()
+
+    assert [entry['filename'] for entry in json.loads(parallel)['files']] == ['export0.csv', 'export1.csv', 'export2.csv']
+    assert parallel == serial
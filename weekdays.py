@@ -0,0 +1,20 @@
+# Day names by weekday number (Monday = 0), as they appear in the results
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_CODES = {name: code for code, name in enumerate(DAY_NAMES)}
+# Directions of a week's longest streak by code, as used in the columnar format and query index
+STREAK_DIRECTIONS = {0: None, 1: 'positive', -1: 'negative'}
+STREAK_CODES = {direction: code for code, direction in STREAK_DIRECTIONS.items()}
+
+
+def day_code(name):
+    """Weekday number of a day name from the results, or None if there is no day."""
+    return None if name is None else DAY_CODES[name]
+
+
+def parse_weekday(name):
+    """Weekday number (Monday = 0) of a day name given by a user or its first three letters, e.g. 'tue' -> 1."""
+    key = str(name).strip().lower()
+    for code, day in enumerate(DAY_NAMES):
+        if key in (day.lower(), day[:3].lower()):
+            return code
+    raise ValueError(f"Unknown weekday: {name}")
@@ -1,12 +1,25 @@
 import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
 import logging
 
+from metrics import timed
+from parsing import describe_rejected, parse_numeric
+from weekdays import DAY_NAMES, STREAK_DIRECTIONS
+
 logger = logging.getLogger(__name__)
 
+# Bump whenever the analysis output changes, so cached results are not reused
+ANALYZER_VERSION = '4'
+
+WEEKDAYS = DAY_NAMES[:5]
+# Position of each weekday's name in alphabetical order, indexed by weekday number
+DAY_NAME_RANK = [sorted(DAY_NAMES).index(name) for name in DAY_NAMES]
+
 class WeeklyAnalyzer:
     def __init__(self):
         self.weekly_data = []
+        self.df = None  # Normalized rows of the last analysis, newest first
+        self.decimals = {}  # Decimal separator of each numeric column, once a frame showed it
 
     def process_table_data(self, table_data):
         """
@@ -18,296 +31,385 @@ class WeeklyAnalyzer:
             Dictionary containing weekly analysis results
         """
         try:
-            # Validate table data
-            if not table_data or len(table_data) < 2:  # Need at least headers and one row
-                logger.error("Table data is empty or has insufficient rows")
-                raise ValueError("Invalid table data: insufficient rows")
+            with timed('weekly_prepare'):
+                df = self.prepare_frame(table_data)
+            return self.process_frame(df)
+        except Exception as e:
+            logger.error(f"Error processing weekly data: {str(e)}", exc_info=True)
+            raise
 
-            # Check if we have enough columns
-            required_columns = 7  # Date, Price, Open, High, Low, Volume, Change%
-            if not all(len(row) >= required_columns for row in table_data):
-                logger.error(f"Some rows have insufficient columns. Expected {required_columns} columns.")
-                raise ValueError("Invalid table data: insufficient columns")
+    def prepare_frame(self, table_data):
+        """
+        Validate table rows and normalize them into a DataFrame.
+        
+        Args:
+            table_data: List of lists containing rows with [date, price, open, high, low, volume, change%]
+        Returns:
+            DataFrame with Date, Close, Open, High, Low, Volume and Change % columns, newest first
+        """
+        # Validate table data
+        if not table_data or len(table_data) < 2:  # Need at least headers and one row
+            logger.error("Table data is empty or has insufficient rows")
+            raise ValueError("Invalid table data: insufficient rows")
 
-            # Convert table data to DataFrame, skipping the header row
-            df = pd.DataFrame(table_data[1:])  # Skip header row
-            
-            # Get column names from the first row
-            headers = table_data[0]
-            
-            # Ensure all columns are present
-            df.columns = headers
-            
-            # Log the column names for debugging
-            logger.debug(f"Column names in data: {list(df.columns)}")
-            
-            # Map column names to standardized names
-            column_mapping = {
-                'Date': 'Date',
-                'Price': 'Close',  # Map 'Price' to 'Close'
-                'Open': 'Open',
-                'High': 'High',
-                'Low': 'Low',
-                'Vol.': 'Volume',
-                'Change %': 'Change %'
-            }
-            
-            # Verify all required columns are present
-            missing_columns = [col for col in column_mapping.keys() if col not in df.columns]
-            if missing_columns:
-                logger.error(f"Missing required columns: {missing_columns}")
-                raise ValueError(f"Missing required columns: {missing_columns}")
-            
-            # Rename columns to match our expected names
-            df = df.rename(columns=column_mapping)
-            
-            # Convert date strings to datetime objects
+        # Check if we have enough columns
+        required_columns = 7  # Date, Price, Open, High, Low, Volume, Change%
+        if not all(len(row) >= required_columns for row in table_data):
+            logger.error(f"Some rows have insufficient columns. Expected {required_columns} columns.")
+            raise ValueError("Invalid table data: insufficient columns")
+
+        # Convert table data to DataFrame, skipping the header row
+        df = pd.DataFrame(table_data[1:])  # Skip header row
+        
+        # Get column names from the first row
+        headers = table_data[0]
+        
+        # Ensure all columns are present
+        df.columns = headers
+        
+        return self.normalize_frame(df)
+
+    def normalize_frame(self, df):
+        """
+        Normalize a DataFrame of table cells with the PDF header names.
+        
+        The decimal separator of each numeric column is kept once a frame
+        shows it, so when the chunks of one file are normalized by the same
+        analyzer, a chunk whose cells could be read either way (e.g. only
+        '1,234') is read like the chunks before it.
+        
+        Args:
+            df: DataFrame with Date, Price, Open, High, Low, Vol. and Change % columns of strings
+        Returns:
+            DataFrame with Date, Close, Open, High, Low, Volume and Change % columns, newest first
+        """
+        # Log the column names for debugging
+        logger.debug("Column names in data: %s", list(df.columns))
+        
+        # Map column names to standardized names
+        column_mapping = {
+            'Date': 'Date',
+            'Price': 'Close',  # Map 'Price' to 'Close'
+            'Open': 'Open',
+            'High': 'High',
+            'Low': 'Low',
+            'Vol.': 'Volume',
+            'Change %': 'Change %'
+        }
+        
+        # Verify all required columns are present
+        missing_columns = [col for col in column_mapping.keys() if col not in df.columns]
+        if missing_columns:
+            logger.error(f"Missing required columns: {missing_columns}")
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        
+        # Rename columns to match our expected names
+        df = df.rename(columns=column_mapping)
+        
+        # Convert date strings to datetime objects
+        try:
+            # First try with explicit format (DD/MM/YYYY)
+            df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
+        except:
             try:
-                # First try with explicit format (DD/MM/YYYY)
-                df['Date'] = pd.to_datetime(df['Date'], format='%d/%m/%Y')
+                # Try with default format
+                df['Date'] = pd.to_datetime(df['Date'])
             except:
                 try:
-                    # Try with default format
-                    df['Date'] = pd.to_datetime(df['Date'])
-                except:
-                    try:
-                        # Try with another common format (YYYY-MM-DD)
-                        df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
-                    except Exception as e:
-                        logger.error(f"Could not parse dates: {e}")
-                        logger.debug(f"Date values: {df['Date'].values}")
-                        raise ValueError("Could not parse date values")
-            
-            # Convert numeric columns and handle potential errors
-            numeric_columns = ['Open', 'High', 'Low', 'Close', 'Change %']
-            for col in numeric_columns:
-                try:
-                    df[col] = df[col].apply(lambda x: float(str(x).strip().replace(',', '').replace('%', '')))
+                    # Try with another common format (YYYY-MM-DD)
+                    df['Date'] = pd.to_datetime(df['Date'], format='%Y-%m-%d')
                 except Exception as e:
-                    logger.error(f"Error converting column {col} to numeric: {e}")
-                    logger.debug(f"Values in {col}: {df[col].values}")
-                    raise ValueError(f"Could not convert {col} values to numeric format")
-            
-            # Sort by date in descending order (newest to oldest)
-            df = df.sort_values('Date', ascending=False)
-            
-            # Calculate previous day's close for percentage calculations
-            df['Prev_Close'] = df['Close'].shift(-1)
-            
-            # Add day of week
-            df['day_of_week'] = df['Date'].dt.day_name()
-            
-            # Calculate additional metrics
-            df['Price_Range'] = df['High'] - df['Low']
-            df['Range_Percent'] = (df['Price_Range'] / df['Low']) * 100
-            df['High_Change_Percent'] = ((df['High'] - df['Prev_Close']) / df['Prev_Close']) * 100
-            df['Low_Change_Percent'] = ((df['Low'] - df['Prev_Close']) / df['Prev_Close']) * 100
-            
-            # Group into weeks (Monday-Friday sequences)
-            weekly_results = []
-            current_week = []
-            
-            # Find the first day of the current week
-            current_date = None
-            week_start = None
-            
-            for idx, row in df.iterrows():
-                if current_date is None:
-                    current_date = row['Date']
-                    week_start = current_date - timedelta(days=current_date.weekday())
-                
-                # Check if this row belongs to the current week
-                if row['Date'] >= week_start and row['Date'] < week_start + timedelta(days=5):
-                    current_week.append(row)
-                else:
-                    # Process completed week if it has 4 or 5 days
-                    if len(current_week) >= 4:
-                        weekly_results.append(self._analyze_week(current_week))
-                    # Start new week
-                    current_week = [row]
-                    current_date = row['Date']
-                    week_start = current_date - timedelta(days=current_date.weekday())
-            
-            # Process the last week if complete (4 or 5 days)
-            if len(current_week) >= 4:
-                weekly_results.append(self._analyze_week(current_week))
-            
-            if not weekly_results:
-                logger.warning("No complete weeks found in the data")
-                return {
-                    'weekly_results': [],
-                    'total_weeks': 0
-                }
-            
-            return {
-                'weekly_results': weekly_results,
-                'total_weeks': len(weekly_results)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error processing weekly data: {str(e)}", exc_info=True)
-            raise
+                    logger.error(f"Could not parse dates: {e}")
+                    logger.debug("Date values: %s", df['Date'].values)
+                    raise ValueError("Could not parse date values")
+        
+        # Convert numeric columns and handle potential errors
+        numeric_columns = {'Open': 'number', 'High': 'number', 'Low': 'number', 'Close': 'number', 'Change %': 'percent'}
+        for col, kind in numeric_columns.items():
+            df[col], rejected = self._parse(df[col], col, kind)
+            if not rejected.empty:
+                logger.error(f"Error converting column {col} to numeric: {describe_rejected(rejected)}")
+                raise ValueError(f"Could not convert {col} values to numeric format")
+        
+        # Volume is informational only: unparseable cells are left empty
+        df['Volume'] = self._parse(df['Volume'], 'Volume', 'volume')[0]
+        
+        # Sort by date in descending order (newest to oldest)
+        return df.sort_values('Date', ascending=False)
+
+    def _parse(self, cells, col, kind):
+        """parse_numeric with the decimal separator an earlier frame showed for the column; returns (values, rejected)."""
+        values, rejected, decimal = parse_numeric(cells, kind, self.decimals.get(col))
+        self.decimals[col] = decimal
+        return values, rejected
 
-    def _analyze_week(self, week_data):
+    def process_frame(self, df):
         """
-        Analyze a single week of data with enhanced metrics.
+        Analyze weekly changes of normalized rows, as returned by prepare_frame.
+        
+        Args:
+            df: DataFrame with Date, Close, Open, High, Low and Change % columns
+        Returns:
+            Dictionary containing weekly analysis results
         """
-        # Sort the week data by date in chronological order (Monday to Friday)
-        week_data = sorted(week_data, key=lambda x: x['Date'])
-        
-        # Get all trading days in the week
-        week_days = set(row['day_of_week'] for row in week_data)
-        all_days = {'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'}
-        
-        # Create a complete week dictionary with 0% for missing days
-        complete_week = {}
-        week_start = min(row['Date'] for row in week_data)
-        
-        # Find the day with highest volatility
-        volatility_data = [(row['day_of_week'], row['Range_Percent'], row['Price_Range']) for row in week_data]
-        max_volatility = max(volatility_data, key=lambda x: x[1])
-        
-        for day_name in all_days:
-            day_data = next((row for row in week_data if row['day_of_week'] == day_name), None)
-            if day_data is not None:
-                complete_week[day_name] = {
-                    'change': day_data['Change %'],
-                    'date': day_data['Date'],
-                    'is_market_closed': False,
-                    'price_range': day_data['Price_Range'],
-                    'range_percent': day_data['Range_Percent'],
-                    'high_change': day_data['High_Change_Percent'],
-                    'low_change': day_data['Low_Change_Percent'],
-                    'high': day_data['High'],
-                    'low': day_data['Low']
-                }
-            else:
-                # Calculate the date for the missing day
-                day_to_num = {'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3, 'Friday': 4}
-                missing_day_num = day_to_num[day_name]
-                missing_date = week_start + timedelta(days=missing_day_num - week_start.weekday())
-                complete_week[day_name] = {
-                    'change': 0.0,
-                    'date': missing_date,
-                    'is_market_closed': True,
-                    'price_range': 0.0,
-                    'range_percent': 0.0,
-                    'high_change': 0.0,
-                    'low_change': 0.0,
-                    'high': 0.0,
-                    'low': 0.0
-                }
+        weekly_results = self.week_results(df)
         
-        # Calculate cumulative changes and find streaks
-        cumulative = 0.0
-        daily_progress = []
-        current_streak = {'direction': None, 'count': 0, 'days': []}
-        longest_streak = {'direction': None, 'count': 0, 'days': []}
-        highest_point = {'value': float('-inf'), 'day': None}
-        turned_positive_day = None
-        turned_negative_day = None
-        
-        # Process days in chronological order
-        for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-            data = complete_week[day]
-            change = data['change']
-            cumulative += change
-            
-            # Format daily progress with arrows and colors
-            arrow = '↑' if change > 0 else '↓' if change < 0 else '→'
-            daily_progress.append({
-                'day': day,
-                'date': data['date'].strftime('%Y-%m-%d'),
-                'change': change,
-                'cumulative': cumulative,
-                'arrow': arrow,
-                'is_market_closed': data['is_market_closed'],
-                'price_range': data['price_range'],
-                'range_percent': data['range_percent'],
-                'high_change': data['high_change'],
-                'low_change': data['low_change'],
-                'high': data['high'],
-                'low': data['low']
-            })
-            
-            # Track highest point
-            if cumulative > highest_point['value']:
-                highest_point = {'value': cumulative, 'day': day}
-            
-            # Track when change turns positive/negative
-            if turned_positive_day is None and cumulative > 0:
-                turned_positive_day = day
-            if turned_negative_day is None and cumulative < 0:
-                turned_negative_day = day
-            
-            # Track streaks
-            if not data['is_market_closed']:
-                current_direction = 'positive' if change > 0 else 'negative' if change < 0 else None
-                if current_direction:
-                    if current_streak['direction'] == current_direction:
-                        current_streak['count'] += 1
-                        current_streak['days'].append(day)
-                    else:
-                        if current_streak['count'] > longest_streak['count']:
-                            longest_streak = current_streak.copy()
-                        current_streak = {'direction': current_direction, 'count': 1, 'days': [day]}
-        
-        # Check final streak
-        if current_streak['count'] > longest_streak['count']:
-            longest_streak = current_streak
-        
-        # Calculate basic statistics from actual trading days
-        changes = [row['Change %'] for row in week_data]
-        positive_changes = [c for c in changes if c > 0]
-        negative_changes = [c for c in changes if c < 0]
-        
-        # Find best and worst days from actual trading days
-        day_changes = [(row['day_of_week'], row['Change %']) for row in week_data]
-        max_positive = max(((day, change) for day, change in day_changes if change > 0), default=(None, 0))
-        max_negative = min(((day, change) for day, change in day_changes if change < 0), key=lambda x: x[1], default=(None, 0))
-        
-        result = {
-            'week_start': week_start.strftime('%Y-%m-%d'),
-            'week_end': max(row['Date'] for row in week_data).strftime('%Y-%m-%d'),
-            'avg_positive': sum(positive_changes) / len(positive_changes) if positive_changes else 0,
-            'avg_negative': sum(negative_changes) / len(negative_changes) if negative_changes else 0,
-            'max_positive_day': max_positive[0],
-            'max_positive_value': max_positive[1],
-            'max_negative_day': max_negative[0],
-            'max_negative_value': max_negative[1],
-            'days_in_week': len(week_data),
-            'daily_progress': daily_progress,
-            'final_change': cumulative,
-            'highest_point': highest_point,
-            'turned_positive': turned_positive_day,
-            'turned_negative': turned_negative_day,
-            'longest_streak': {
-                'direction': longest_streak['direction'],
-                'count': longest_streak['count'],
-                'days': '-'.join(longest_streak['days']) if longest_streak['days'] else None
-            },
-            'max_volatility': {
-                'day': max_volatility[0],
-                'range_percent': max_volatility[1],
-                'price_range': max_volatility[2]
+        if not weekly_results:
+            logger.warning("No complete weeks found in the data")
+            return {
+                'weekly_results': [],
+                'total_weeks': 0
             }
+        
+        return {
+            'weekly_results': weekly_results,
+            'total_weeks': len(weekly_results)
         }
+
+    def week_results(self, df):
+        """
+        List of the week results of normalized rows, as in process_frame, without
+        warning when there are none (e.g. for the partial weeks of a stream).
+        """
+        if not df['Date'].is_monotonic_decreasing:
+            df = df.sort_values('Date', ascending=False)
+        self.df = df
         
-        return result
+        # Group into weeks (Monday-Friday sequences) and analyze the ones with 4 or 5 days
+        with timed('weekly_segment'):
+            week_ids = self._assign_weeks(df)
+        with timed('weekly_analyze'):
+            return self._analyze_weeks(self._add_metrics(df), week_ids)
 
-def calculate_daily_range(intraday_high, intraday_low):
-    if intraday_low == 0:  # Avoid division by zero
-        return 0
-    return ((intraday_high - intraday_low) / intraday_low) * 100
+    def _add_metrics(self, df):
+        """Add the previous close and the daily range columns used by the week analysis."""
+        # Calculate previous day's close for percentage calculations
+        prev_close = df['Close'].shift(-1)
+        
+        # Calculate additional metrics
+        price_range = df['High'] - df['Low']
+        return df.assign(
+            Prev_Close=prev_close,
+            Price_Range=price_range,
+            Range_Percent=(price_range / df['Low']) * 100,
+            High_Change_Percent=((df['High'] - prev_close) / prev_close) * 100,
+            Low_Change_Percent=((df['Low'] - prev_close) / prev_close) * 100
+        )
 
-# Assuming you have a data structure for daily progress
-daily_progress = {
-    "Monday": {"intraday_high": 24.28, "intraday_low": 7.49},
-    "Tuesday": {"intraday_high": 13.89, "intraday_low": -9.98},
-    "Wednesday": {"intraday_high": 12.56, "intraday_low": -8.37},
-    "Thursday": {"intraday_high": 7.74, "intraday_low": -4.95},
-    "Friday": {"intraday_high": 12.64, "intraday_low": -4.58},
-}
+    def _assign_weeks(self, df):
+        """
+        Give every row of a date-descending frame the id of the week it belongs to.
+        
+        A week is a run of consecutive rows sharing the same Monday. A weekend
+        row always starts a new week, which the earlier days of its week then join.
+        """
+        if df['Date'].isna().any():
+            raise ValueError("Could not parse date values")
+        
+        dates = df['Date'].to_numpy(dtype='datetime64[D]')
+        weekday = df['Date'].dt.weekday.to_numpy()
+        monday = dates - weekday.astype('timedelta64[D]')
+        
+        new_week = np.ones(len(df), dtype=bool)
+        new_week[1:] = (monday[1:] != monday[:-1]) | (weekday[1:] >= 5)
+        return np.cumsum(new_week) - 1
 
-for day, data in daily_progress.items():
-    data['range_percentage'] = calculate_daily_range(data['intraday_high'], data['intraday_low'])
\ No newline at end of file
+    def _analyze_weeks(self, df, week_ids):
+        """
+        Analyze every week with at least 4 trading days with enhanced metrics.
+        
+        All per-week metrics are computed at once on (weeks x days) arrays; only
+        the final result dictionaries are built per week.
+        """
+        sizes = np.bincount(week_ids)
+        keep = sizes[week_ids] >= 4
+        if not keep.any():
+            return []
+        
+        # Order each week's rows chronologically, ties keeping their frame order
+        position = np.arange(len(df))
+        dates = df['Date'].to_numpy(dtype='datetime64[D]')
+        order = np.lexsort((position, dates, week_ids))
+        order = order[keep[order]]
+        
+        week = week_ids[order]
+        week_starts = np.flatnonzero(np.r_[True, week[1:] != week[:-1]])
+        n_weeks = len(week_starts)
+        counts = np.diff(np.r_[week_starts, len(order)])
+        week = np.repeat(np.arange(n_weeks), counts)  # Renumber weeks 0..n_weeks-1
+        rank = np.arange(len(order)) - np.repeat(week_starts, counts)
+        width = counts.max()
+        
+        dates = dates[order]
+        date_strings = np.datetime_as_string(dates, unit='D')
+        weekday = df['Date'].dt.weekday.to_numpy()[order]
+        change = df['Change %'].to_numpy(dtype=float)[order]
+        range_percent = df['Range_Percent'].to_numpy(dtype=float)[order]
+        price_range = df['Price_Range'].to_numpy(dtype=float)[order]
+        
+        def by_rank(values, fill):
+            matrix = np.full((n_weeks, width), fill, dtype=values.dtype)
+            matrix[week, rank] = values
+            return matrix
+        
+        # Monday-Friday slots: the first row of each weekday, 0% for missing days
+        is_weekday = weekday < 5
+        slot_key = week[is_weekday] * 5 + weekday[is_weekday]
+        slot_key, first = np.unique(slot_key, return_index=True)
+        slot_rows = np.flatnonzero(is_weekday)[first]
+        slot_week, slot_day = np.divmod(slot_key, 5)
+        
+        def by_slot(values):
+            matrix = np.zeros((n_weeks, 5))
+            matrix[slot_week, slot_day] = values[slot_rows]
+            return matrix
+        
+        is_market_closed = np.ones((n_weeks, 5), dtype=bool)
+        is_market_closed[slot_week, slot_day] = False
+        slot_change = by_slot(change)
+        slot_columns = {
+            'price_range': by_slot(price_range),
+            'range_percent': by_slot(range_percent),
+            'high_change': by_slot(df['High_Change_Percent'].to_numpy(dtype=float)[order]),
+            'low_change': by_slot(df['Low_Change_Percent'].to_numpy(dtype=float)[order]),
+            'high': by_slot(df['High'].to_numpy(dtype=float)[order]),
+            'low': by_slot(df['Low'].to_numpy(dtype=float)[order])
+        }
+        
+        first_date = dates[week_starts]
+        first_weekday = weekday[week_starts]
+        slot_dates = (first_date[:, None]
+                      + (np.arange(5)[None, :] - first_weekday[:, None]).astype('timedelta64[D]'))
+        slot_dates[slot_week, slot_day] = dates[slot_rows]
+        slot_date_strings = np.datetime_as_string(slot_dates, unit='D')
+        
+        # Cumulative change through the week, starting from 0.0
+        cumulative = np.cumsum(np.hstack([np.zeros((n_weeks, 1)), slot_change]), axis=1)[:, 1:]
+        
+        # Highest cumulative point: first maximum, ignoring NaN
+        comparable = np.where(np.isnan(cumulative), -np.inf, cumulative)
+        highest_day = comparable.argmax(axis=1)
+        highest_value = comparable[np.arange(n_weeks), highest_day]
+        has_highest = highest_value > -np.inf
+        
+        turned_positive = cumulative > 0
+        turned_negative = cumulative < 0
+        turned_positive_day = np.where(turned_positive.any(axis=1), turned_positive.argmax(axis=1), -1)
+        turned_negative_day = np.where(turned_negative.any(axis=1), turned_negative.argmax(axis=1), -1)
+        
+        # Streaks of same-direction trading days; closed and flat days do not break them
+        direction = np.where(is_market_closed, 0, np.sign(np.nan_to_num(slot_change)).astype(int))
+        current_direction = np.zeros(n_weeks, dtype=int)
+        current_count = np.zeros(n_weeks, dtype=int)
+        current_days = np.zeros(n_weeks, dtype=int)
+        longest_direction = np.zeros(n_weeks, dtype=int)
+        longest_count = np.zeros(n_weeks, dtype=int)
+        longest_days = np.zeros(n_weeks, dtype=int)
+        for day in range(5):
+            day_direction = direction[:, day]
+            active = day_direction != 0
+            same = active & (current_direction == day_direction)
+            switch = active & ~same
+            promote = switch & (current_count > longest_count)
+            longest_direction = np.where(promote, current_direction, longest_direction)
+            longest_count = np.where(promote, current_count, longest_count)
+            longest_days = np.where(promote, current_days, longest_days)
+            current_count = np.where(same, current_count + 1, np.where(switch, 1, current_count))
+            current_days = np.where(same, current_days | (1 << day), np.where(switch, 1 << day, current_days))
+            current_direction = np.where(switch, day_direction, current_direction)
+        promote = current_count > longest_count
+        longest_direction = np.where(promote, current_direction, longest_direction)
+        longest_count = np.where(promote, current_count, longest_count)
+        longest_days = np.where(promote, current_days, longest_days)
+        
+        # Statistics over the actual trading days, summed in chronological order
+        change_matrix = by_rank(change, 0.0)
+        positive = change_matrix > 0
+        negative = change_matrix < 0
+        positive_count = positive.sum(axis=1)
+        negative_count = negative.sum(axis=1)
+        positive_sum = np.cumsum(np.where(positive, change_matrix, 0.0), axis=1)[:, -1]
+        negative_sum = np.cumsum(np.where(negative, change_matrix, 0.0), axis=1)[:, -1]
+        
+        # Best day: the (day name, change) maximum, as a tuple comparison would pick it
+        name_rank = by_rank(np.asarray(DAY_NAME_RANK)[weekday], -1)
+        name_rank = np.where(positive, name_rank, -1)
+        best_rank = name_rank.max(axis=1)
+        best_candidates = np.where(name_rank == best_rank[:, None], change_matrix, -np.inf)
+        best_row = best_candidates.argmax(axis=1)
+        worst_row = np.where(negative, change_matrix, np.inf).argmin(axis=1)
+        
+        # Most volatile day: first maximum range percent, where a leading NaN wins
+        volatility = by_rank(range_percent, -np.inf)
+        volatility_row = np.where(np.isnan(volatility), -np.inf, volatility).argmax(axis=1)
+        volatility_row[np.isnan(volatility[:, 0])] = 0
+        
+        row_at = week_starts  # Offset of each week's first row in the sorted arrays
+        names = [DAY_NAMES[d] for d in weekday.tolist()]
+        changes = change.tolist()
+        range_percents = range_percent.tolist()
+        price_ranges = price_range.tolist()
+        slot_changes = slot_change.tolist()
+        slot_values = {key: matrix.tolist() for key, matrix in slot_columns.items()}
+        slot_closed = is_market_closed.tolist()
+        slot_date_lists = slot_date_strings.tolist()
+        cumulative_lists = cumulative.tolist()
+        
+        weekly_results = []
+        for i in range(n_weeks):
+            daily_progress = []
+            for day in range(5):
+                day_change = slot_changes[i][day]
+                daily_progress.append({
+                    'day': WEEKDAYS[day],
+                    'date': slot_date_lists[i][day],
+                    'change': day_change,
+                    'cumulative': cumulative_lists[i][day],
+                    'arrow': '↑' if day_change > 0 else '↓' if day_change < 0 else '→',
+                    'is_market_closed': slot_closed[i][day],
+                    'price_range': slot_values['price_range'][i][day],
+                    'range_percent': slot_values['range_percent'][i][day],
+                    'high_change': slot_values['high_change'][i][day],
+                    'low_change': slot_values['low_change'][i][day],
+                    'high': slot_values['high'][i][day],
+                    'low': slot_values['low'][i][day]
+                })
+            
+            first_row = int(row_at[i])
+            last_row = first_row + int(counts[i]) - 1
+            best = first_row + int(best_row[i])
+            worst = first_row + int(worst_row[i])
+            volatile = first_row + int(volatility_row[i])
+            streak_days = [WEEKDAYS[day] for day in range(5) if longest_days[i] & (1 << day)]
+            
+            weekly_results.append({
+                'week_start': date_strings[first_row],
+                'week_end': date_strings[last_row],
+                'avg_positive': float(positive_sum[i]) / int(positive_count[i]) if positive_count[i] else 0,
+                'avg_negative': float(negative_sum[i]) / int(negative_count[i]) if negative_count[i] else 0,
+                'max_positive_day': names[best] if positive_count[i] else None,
+                'max_positive_value': changes[best] if positive_count[i] else 0,
+                'max_negative_day': names[worst] if negative_count[i] else None,
+                'max_negative_value': changes[worst] if negative_count[i] else 0,
+                'days_in_week': int(counts[i]),
+                'daily_progress': daily_progress,
+                'final_change': cumulative_lists[i][4],
+                'highest_point': {
+                    'value': float(highest_value[i]) if has_highest[i] else float('-inf'),
+                    'day': WEEKDAYS[highest_day[i]] if has_highest[i] else None
+                },
+                'turned_positive': WEEKDAYS[turned_positive_day[i]] if turned_positive_day[i] >= 0 else None,
+                'turned_negative': WEEKDAYS[turned_negative_day[i]] if turned_negative_day[i] >= 0 else None,
+                'longest_streak': {
+                    'direction': STREAK_DIRECTIONS[int(longest_direction[i])],
+                    'count': int(longest_count[i]),
+                    'days': '-'.join(streak_days) if streak_days else None
+                },
+                'max_volatility': {
+                    'day': names[volatile],
+                    'range_percent': range_percents[volatile],
+                    'price_range': price_ranges[volatile]
+                }
+            })
+        
+        return weekly_results
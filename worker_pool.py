@@ -0,0 +1,67 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Worker processes shared by every request; set by the app (PROCESS_WORKERS) before the pool is first used
+max_workers = os.cpu_count() or 1
+
+_lock = threading.Lock()
+_pool = None
+
+
+def start_method():
+    """
+    Start method of the worker processes: forkserver where available, else spawn.
+
+    Requests run in threads, and forking a process while other threads hold
+    locks (logging, caches, pdfminer) can leave the child stuck on them.
+    """
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def shared_pool():
+    """The process pool shared by every request, created on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            logger.debug("Starting %s worker processes (%s)", max_workers, start_method())
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(start_method()))
+        return _pool
+
+
+def _discard(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(fn, *args):
+    """
+    Run fn(*args) in the shared pool, returning its future.
+
+    A worker that dies (e.g. killed for memory) breaks the whole pool: its
+    futures fail with BrokenProcessPool, and the next call starts a new pool.
+    """
+    pool = shared_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        logger.warning("Worker pool broken, starting a new one")
+        _discard(pool)
+        return shared_pool().submit(fn, *args)
+
+
+def shutdown():
+    """Stop the shared pool, if started; the next submit starts a new one."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()